@@ -0,0 +1,321 @@
+"""End-to-end scan benchmark against a synthetic listener farm.
+
+    python bench/scan.py [--hosts 32] [--open 64] [--filtered 8] [--ports 10000-20000]
+                         [--workers 1,4] [--gui] [--delay MS] [--json out.json]
+                         [--baseline old.json]
+
+The farm is plain sockets held by this process on loopback aliases
+(127.1.0.1, 127.1.0.2, ...): `--open` listeners per host answer, and
+`--filtered` listeners per host have their accept queue stuffed so the
+kernel drops further SYNs, which looks exactly like a filtering
+firewall. Every other port answers with an RST. `--delay MS` adds
+latency to the loopback device with tc netem (Linux, root), if
+available.
+
+Each scan runs in a fresh interpreter so peak RSS belongs to that run
+alone. Reported per run: ports/sec, time to first result and to first
+open port, peak RSS (scanner and worker processes), and accuracy against
+the farm's ground truth. `--gui` also drives MainWindow offscreen
+and measures how late a 5 ms QTimer fires while the scan runs (event
+loop lag). `--json` saves everything; `--baseline` prints the change
+against an earlier file.
+"""
+import argparse
+import ipaddress
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC)
+
+from engine import parse_ports  # noqa: E402
+from fdbudget import raise_fd_limit  # noqa: E402
+
+FARM_BASE = ipaddress.IPv4Address("127.1.0.1")
+FILLERS = 3         # listen(0) navbatini to'ldirish uchun ulanishlar
+TICK = 0.005
+# ru_maxrss: Linux'da KiB, macOS'da bayt
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+METRICS = ("ports_per_sec", "first_result", "first_open", "rss_mb", "worker_rss_mb", "accuracy",
+           "lag_p50_ms", "lag_p99_ms", "lag_max_ms")
+
+
+def build_farm(hosts, open_count, filtered_count, ports, seed):
+    """Bind the farm; returns (sockets, open set, filtered set)."""
+    rng = random.Random(seed)
+    sockets, opened, filtered = [], set(), set()
+    stuffed = []
+    for i in range(hosts):
+        host = str(FARM_BASE + i)
+        chosen = rng.sample(ports, min(len(ports), open_count + filtered_count))
+        for n, port in enumerate(chosen):
+            drop = n >= open_count
+            sock = socket.socket()
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                sock.bind((host, port))
+                sock.listen(0 if drop else 128)
+            except OSError:
+                sock.close()
+                continue
+            sockets.append(sock)
+            if not drop:
+                opened.add((host, port))
+                continue
+            filtered.add((host, port))
+            for _ in range(FILLERS):
+                filler = socket.socket()
+                filler.setblocking(False)
+                filler.connect_ex((host, port))
+                sockets.append(filler)
+                stuffed.append(filler)
+    if stuffed:
+        time.sleep(0.3)     # handshakes complete, the queues are full
+    return sockets, opened, filtered
+
+
+def set_delay(ms):
+    """Add `ms` of netem delay to lo; returns a cleanup callable or None."""
+    if not ms:
+        return lambda: None
+    cmd = ["tc", "qdisc", "add", "dev", "lo", "root", "netem", "delay", f"{ms}ms"]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError as e:
+        print(f"delay skipped: {e}")
+        return None
+    if proc.returncode != 0:
+        print(f"delay skipped: {proc.stderr.strip()}")
+        return None
+    return lambda: subprocess.run(["tc", "qdisc", "del", "dev", "lo", "root"],
+                                  capture_output=True)
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    return resource.getrusage(who).ru_maxrss * RSS_UNIT / 2**20
+
+
+def child_scan(config):
+    from engine import ScanEngine
+    from parallel import ParallelScanEngine
+
+    raise_fd_limit()
+    ports = parse_ports(config["ports"])
+    if config["workers"] > 1:
+        engine = ParallelScanEngine(config["target"], ports, config["timeout"],
+                                    config["concurrency"], config["workers"])
+    else:
+        engine = ScanEngine(config["target"], ports, config["timeout"], config["concurrency"])
+
+    opened, filtered = [], []
+    errors = 0
+    first = first_open = None
+    started = time.perf_counter()
+    for result in engine:
+        if first is None:
+            first = time.perf_counter() - started
+        if result.status == "OPEN":
+            if first_open is None:
+                first_open = time.perf_counter() - started
+            opened.append((result.host, result.port))
+        elif result.status == "FILTERED":
+            filtered.append((result.host, result.port))
+        elif result.status == "ERROR":
+            errors += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed": elapsed,
+        "scanned": engine.scanned,
+        "ports_per_sec": engine.scanned / elapsed,
+        "first_result": first,
+        "first_open": first_open,
+        "rss_mb": peak_rss_mb(),
+        "worker_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        "errors": errors,
+        "open": opened,
+        "filtered": filtered,
+    }
+
+
+def child_gui(config):
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+
+    from targets import TargetSpec
+    from ui import MainWindow
+
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    window.concurrency.setValue(config["concurrency"])
+    window.workers.setValue(config["workers"])
+    app.processEvents()
+
+    lags = []
+    last = [time.perf_counter()]
+
+    def tick():
+        now = time.perf_counter()
+        lags.append(max(0.0, now - last[0] - TICK))
+        last[0] = now
+
+    timer = QTimer()
+    timer.timeout.connect(tick)
+    timer.start(int(TICK * 1000))
+    started = time.perf_counter()
+    window.launch_scan(TargetSpec(config["target"]), config["ports"], None)
+    window.thread.finished.connect(app.quit)
+    app.exec_()
+    elapsed = time.perf_counter() - started
+
+    lags.sort()
+    return {
+        "elapsed": elapsed,
+        "rows": window.results_model.rowCount(),
+        "lag_p50_ms": lags[len(lags) // 2] * 1000 if lags else None,
+        "lag_p99_ms": lags[int(len(lags) * 0.99)] * 1000 if lags else None,
+        "lag_max_ms": lags[-1] * 1000 if lags else None,
+        "rss_mb": peak_rss_mb(),
+    }
+
+
+def run_child(mode, config):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    with tempfile.TemporaryDirectory(prefix="bench-home-") as home:
+        # MainWindow history/checkpoint fayllari foydalanuvchinikiga yozilmasin
+        env["HOME"] = env["USERPROFILE"] = home
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), f"--child-{mode}",
+                               json.dumps(config)], cwd=SRC, env=env, capture_output=True,
+                              text=True)
+    if proc.returncode != 0:
+        return None, (proc.stderr.strip().splitlines() or ["failed"])[-1]
+    return json.loads(proc.stdout), None
+
+
+def accuracy(result, opened, filtered, total):
+    found_open = {tuple(p) for p in result.pop("open")}
+    found_filtered = {tuple(p) for p in result.pop("filtered")}
+    missed_open = len(opened - found_open)
+    missed_filtered = len(filtered - found_filtered)
+    wrong = missed_open + missed_filtered + len(found_open - opened) \
+        + len(found_filtered - filtered) + result["errors"]
+    return {
+        "open_found": len(found_open & opened),
+        "open_missed": missed_open,
+        "filtered_found": len(found_filtered & filtered),
+        "filtered_missed": missed_filtered,
+        # tizimdagi 0.0.0.0 servislar yoki tushib qolgan RST'lar
+        "unexpected_open": len(found_open - opened),
+        "unexpected_filtered": len(found_filtered - filtered),
+        "accuracy": 1 - wrong / total if total else 1.0,
+    }
+
+
+def compare(results, baseline):
+    """Print relative change per metric for runs present in both."""
+    if baseline.get("config") != results["config"]:
+        print("  note: baseline was run with a different farm/config")
+    old = {run["name"]: run for run in baseline.get("runs", [])}
+    for run in results["runs"]:
+        before = old.get(run["name"])
+        if not before:
+            continue
+        changes = [
+            f"{key} {100 * (run[key] - before[key]) / before[key]:+.1f}%"
+            for key in METRICS if run.get(key) is not None and before.get(key)
+        ]
+        print(f"  vs baseline {run['name']}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=32)
+    parser.add_argument("--open", type=int, default=64, help="open listeners per host")
+    parser.add_argument("--filtered", type=int, default=8, help="dropping listeners per host")
+    parser.add_argument("--ports", default="10000-20000")
+    parser.add_argument("--workers", default="1")
+    parser.add_argument("-c", "--concurrency", type=int, default=2000)
+    parser.add_argument("-t", "--timeout", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--delay", type=int, default=0, metavar="MS",
+                        help="loopback latency via tc netem (Linux, root)")
+    parser.add_argument("--gui", action="store_true", help="also measure GUI event-loop lag")
+    parser.add_argument("--json", metavar="FILE", help="save results to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="compare with an earlier --json")
+    parser.add_argument("--child-scan", help=argparse.SUPPRESS)
+    parser.add_argument("--child-gui", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_scan or args.child_gui:
+        child = child_scan if args.child_scan else child_gui
+        print(json.dumps(child(json.loads(args.child_scan or args.child_gui))))
+        return
+
+    raise_fd_limit()
+    ports = parse_ports(args.ports)
+    target = f"{FARM_BASE}-{FARM_BASE + args.hosts - 1}"
+    total = args.hosts * len(ports)
+    sockets, opened, filtered = build_farm(args.hosts, args.open, args.filtered, ports, args.seed)
+    undo_delay = set_delay(args.delay)
+    print(f"farm: {args.hosts} hosts x {len(ports)} ports, {len(opened)} open, "
+          f"{len(filtered)} filtered listeners, {os.cpu_count()} CPUs")
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items()
+                   if not key.startswith(("child", "json", "baseline"))},
+        "runs": [],
+    }
+    try:
+        for workers in (int(w) for w in args.workers.split(",")):
+            config = {"target": target, "ports": args.ports, "timeout": args.timeout,
+                      "concurrency": args.concurrency, "workers": workers}
+            modes = ("scan", "gui") if args.gui else ("scan",)
+            for mode in modes:
+                name = f"{mode}-w{workers}"
+                result, err = run_child(mode, config)
+                if result is None:
+                    print(f"{name:10s} skipped: {err}")
+                    continue
+                if mode == "scan":
+                    result.update(accuracy(result, opened, filtered, total))
+                    print(f"{name:10s} {result['ports_per_sec']:10,.0f} ports/s  "
+                          f"{result['elapsed']:6.2f} s  first {result['first_result'] * 1000:6.1f} ms  "
+                          f"rss {result['rss_mb']:.0f}+{result['worker_rss_mb']:.0f} MB  "
+                          f"accuracy {result['accuracy']:.4%} (missed {result['open_missed']} open, "
+                          f"{result['filtered_missed']} filtered)")
+                else:
+                    print(f"{name:10s} {result['elapsed']:6.2f} s  {result['rows']} rows  "
+                          f"lag p50 {result['lag_p50_ms']:.1f} ms  p99 {result['lag_p99_ms']:.1f} ms  "
+                          f"max {result['lag_max_ms']:.1f} ms")
+                result.update(name=name, mode=mode, workers=workers)
+                results["runs"].append(result)
+    finally:
+        if undo_delay:
+            undo_delay()
+        for sock in sockets:
+            sock.close()
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            compare(results, json.load(file))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"saved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
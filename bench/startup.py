@@ -0,0 +1,54 @@
+"""Cold-start comparison: headless CLI vs. GUI window construction.
+
+    python bench/startup.py [-n RUNS]
+
+Each path runs in a fresh interpreter. The CLI path scans one loopback
+port end to end; the GUI path builds QApplication + MainWindow (offscreen,
+no display needed) and exits. Reports min/median wall time in ms.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+CLI = [sys.executable, os.path.join(SRC, "cli.py"), "127.0.0.1", "-p", "1", "-t", "0.2"]
+GUI = [
+    sys.executable,
+    "-c",
+    "import sys; from PyQt5.QtWidgets import QApplication; from ui import MainWindow; "
+    "app = QApplication(sys.argv); w = MainWindow(); w.show(); app.processEvents()",
+]
+
+
+def measure(cmd, runs, env):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=SRC, env=env, capture_output=True)
+        samples.append((time.perf_counter() - started) * 1000)
+        if proc.returncode != 0:
+            return None, proc.stderr.decode(errors="replace").strip().splitlines()[-1:]
+    return samples, None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    for name, cmd in (("cli", CLI), ("gui", GUI)):
+        samples, err = measure(cmd, args.runs, env)
+        if samples is None:
+            print(f"{name:4s} skipped: {' '.join(err)}")
+            continue
+        print(f"{name:4s} min {min(samples):7.1f} ms   median {statistics.median(samples):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
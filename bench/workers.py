@@ -0,0 +1,75 @@
+"""Ports/sec vs. worker-process count against local listeners.
+
+    python bench/workers.py [--hosts 8] [--ports 1-20000] [--workers 1,2,4]
+
+Opens a few listeners on 127.0.0.x, scans them with ScanEngine (1
+worker) and ParallelScanEngine (N workers), and checks every run finds
+exactly the listeners that were opened. Loopback answers closed ports
+with an immediate RST, so this measures the CPU-bound scan path.
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from engine import ScanEngine, parse_ports  # noqa: E402
+from parallel import ParallelScanEngine  # noqa: E402
+
+
+def open_listeners(hosts, ports):
+    listeners, truth = [], set()
+    for i in range(hosts):
+        host = f"127.0.0.{i + 1}"
+        for port in ports[:: max(1, len(ports) // 4)][:4]:
+            sock = socket.socket()
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                sock.bind((host, port))
+            except OSError:
+                sock.close()
+                continue
+            sock.listen(64)
+            listeners.append(sock)
+            truth.add((host, port))
+    return listeners, truth
+
+
+def run(engine, truth):
+    started = time.perf_counter()
+    found = {(r.host, r.port) for r in engine if r.status == "OPEN"}
+    elapsed = time.perf_counter() - started
+    missed = len(truth - found)
+    return engine.scanned / elapsed, elapsed, missed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=8)
+    parser.add_argument("--ports", default="1-20000")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("-c", "--concurrency", type=int, default=2000)
+    args = parser.parse_args()
+
+    ports = parse_ports(args.ports)
+    target = f"127.0.0.1-{args.hosts}"
+    listeners, truth = open_listeners(args.hosts, ports)
+    print(f"{args.hosts} hosts x {len(ports)} ports, {len(truth)} listeners, "
+          f"{os.cpu_count()} CPUs")
+    try:
+        for workers in (int(w) for w in args.workers.split(",")):
+            if workers == 1:
+                engine = ScanEngine(target, ports, 1.0, args.concurrency)
+            else:
+                engine = ParallelScanEngine(target, ports, 1.0, args.concurrency, workers)
+            rate, elapsed, missed = run(engine, truth)
+            print(f"workers={workers:<3d} {rate:12,.0f} ports/s  {elapsed:6.2f} s  missed={missed}")
+    finally:
+        for sock in listeners:
+            sock.close()
+
+
+if __name__ == "__main__":
+    main()
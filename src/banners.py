@@ -0,0 +1,277 @@
+"""Banner grabbing / service fingerprinting for open ports.
+
+The connect loop hands each freshly connected socket to a BannerGrabber
+(engine.probe's on_open hook) instead of closing it. The grabber runs on
+its own thread and selector with its own concurrency limit, so slow
+services never hold up connect-phase probing. Each connection reads into
+a fixed slot of one preallocated buffer (recv_into on a memoryview), has
+a hard deadline, and ends up as a (host, port, service) string such as
+"SSH OpenSSH_9.6" or "HTTP nginx/1.24.0".
+"""
+import collections
+import os
+import selectors
+import threading
+import time
+
+from fdbudget import abort
+from services import service_name
+
+DEFAULT_CONCURRENCY = 64
+DEFAULT_TIMEOUT = 2.0
+BUFFER_SIZE = 2048
+MAX_SERVICE = 80
+
+# Server avval gapiradimi kutiladi, keyin so'rov yuboriladi
+GREETING_WAIT = 0.6
+# javob kelib, shuncha vaqt jim tursa - tugagan deb hisoblaymiz
+IDLE_WAIT = 0.3
+
+TLS_PORTS = {443, 465, 563, 636, 853, 989, 990, 992, 993, 994, 995, 5061, 8443, 9443}
+HTTP_PORTS = {80, 81, 591, 3000, 5000, 8000, 8008, 8080, 8081, 8088, 8888, 9000}
+HTTP_PROBE = b"HEAD / HTTP/1.0\r\nUser-Agent: port-scanner\r\nAccept: */*\r\n\r\n"
+
+_TLS_VERSIONS = {0x0300: "SSL 3.0", 0x0301: "TLS 1.0", 0x0302: "TLS 1.1",
+                 0x0303: "TLS 1.2", 0x0304: "TLS 1.3"}
+
+
+def _client_hello():
+    """A minimal TLS 1.2/1.3 ClientHello; any ServerHello (or alert)
+    identifies the port as TLS."""
+    suites = bytes.fromhex("130113021303c02bc02fc02cc030cca9cca8009c009d002f0035")
+    extensions = b"".join([
+        bytes.fromhex("002b0005") + bytes.fromhex("0403040303"),          # supported_versions
+        bytes.fromhex("000a0006") + bytes.fromhex("0004001d0017"),        # supported_groups
+        bytes.fromhex("000d0008") + bytes.fromhex("0006040308040401"),    # signature_algorithms
+        bytes.fromhex("000b0002") + bytes.fromhex("0100"),                # ec_point_formats
+        bytes.fromhex("003300260024001d0020") + os.urandom(32),          # key_share x25519
+    ])
+    session = os.urandom(32)
+    body = (b"\x03\x03" + os.urandom(32) + bytes([len(session)]) + session
+            + len(suites).to_bytes(2, "big") + suites + b"\x01\x00"
+            + len(extensions).to_bytes(2, "big") + extensions)
+    handshake = b"\x01" + len(body).to_bytes(3, "big") + body
+    return b"\x16\x03\x01" + len(handshake).to_bytes(2, "big") + handshake
+
+
+def _tls_version(data):
+    """Negotiated version from a ServerHello record, or None."""
+    if len(data) < 11 or data[0] != 0x16 or data[5] != 0x02:
+        return None
+    version = int.from_bytes(data[9:11], "big")
+    pos = 11 + 32
+    if pos < len(data):
+        pos += 1 + data[pos] + 3      # session id, cipher suite, compression
+        if pos + 2 <= len(data):
+            end = min(len(data), pos + 2 + int.from_bytes(data[pos:pos + 2], "big"))
+            pos += 2
+            while pos + 4 <= end:
+                kind = int.from_bytes(data[pos:pos + 2], "big")
+                size = int.from_bytes(data[pos + 2:pos + 4], "big")
+                if kind == 0x002B and size == 2:
+                    version = int.from_bytes(data[pos + 4:pos + 6], "big")
+                pos += 4 + size
+    return _TLS_VERSIONS.get(version, "TLS")
+
+
+def _clean(text):
+    text = "".join(ch if ch.isprintable() else " " for ch in text)
+    return " ".join(text.split())
+
+
+def fingerprint(port, data):
+    """Service string for what a server sent back (may be empty)."""
+    name = service_name(port)
+    if not data:
+        return name
+    if data[0] in (0x15, 0x16) and data[1:2] == b"\x03":
+        return _tls_version(data) or "TLS"
+
+    text = data.decode("latin-1")
+    first = text.split("\n", 1)[0].strip()
+    if first.startswith("SSH-"):
+        return _clean("SSH " + first.split("-", 2)[-1])
+    if first.startswith("HTTP/"):
+        for line in text.split("\r\n")[1:]:
+            header, _, value = line.partition(":")
+            if header.strip().lower() == "server" and value.strip():
+                return _clean("HTTP " + value)
+        return "HTTP"
+    if first.startswith("220"):
+        kind = "SMTP" if "SMTP" in first.upper() else "FTP" if "FTP" in first.upper() else name
+        return _clean(f"{kind or '220'} {first[3:].strip(' -')}")
+    if first.startswith("+OK"):
+        return _clean("POP3 " + first[3:])
+    if first.startswith("* OK"):
+        return _clean("IMAP " + first[4:])
+    if len(data) > 5 and data[4] == 10 and b"\x00" in data[5:64]:
+        version = data[5:data.index(b"\x00", 5)].decode("latin-1")
+        return _clean("MYSQL " + version)       # MySQL/MariaDB handshake v10
+    banner = _clean(first)
+    if not banner:
+        return name
+    return f"{name} {banner}" if name else banner
+
+
+def _trim(service):
+    return service if len(service) <= MAX_SERVICE else service[:MAX_SERVICE - 3] + "..."
+
+
+class _Grab:
+    __slots__ = ("sock", "ip", "port", "slot", "filled", "started", "last", "deadline",
+                 "probe", "sent")
+
+    def __init__(self, sock, ip, port, slot, now, timeout):
+        self.sock = sock
+        self.ip = ip
+        self.port = port
+        self.slot = slot
+        self.filled = 0
+        self.started = self.last = now
+        self.deadline = now + timeout
+        if port in TLS_PORTS:
+            self.probe = _client_hello()
+        elif port in HTTP_PORTS:
+            self.probe = HTTP_PROBE
+        else:
+            self.probe = None       # avval greeting kutamiz
+        self.sent = False
+
+
+class BannerGrabber:
+    """Plug into ScanEngine(banners=...). Config is plain data until
+    start(), so it can be passed to worker processes."""
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT,
+                 buffer_size=BUFFER_SIZE):
+        if concurrency < 1 or timeout <= 0 or buffer_size < 64:
+            raise ValueError("banner concurrency, timeout and buffer size must be positive")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.buffer_size = buffer_size
+        self.held = set()       # engine thread: (ip, port) handed over, result not yet taken
+        self.grabbed = 0
+        self._thread = None
+
+    def __getstate__(self):
+        return {"concurrency": self.concurrency, "timeout": self.timeout,
+                "buffer_size": self.buffer_size}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def start(self):
+        self._pending = collections.deque()
+        self._finished = collections.deque()
+        self._stop = threading.Event()
+        self._buffer = bytearray(self.concurrency * self.buffer_size)
+        self._view = memoryview(self._buffer)
+        self._thread = threading.Thread(target=self._run, name="banner-grabber", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        while self._pending:
+            abort(self._pending.popleft()[0])
+
+    def submit(self, sock, ip, port):
+        """probe() on_open hook: take ownership of a connected socket.
+        Returns False (caller closes it) when the stage is saturated."""
+        if self._thread is None or len(self.held) >= self.concurrency * 2:
+            return False
+        self.held.add((ip, port))
+        self._pending.append((sock, ip, port))
+        return True
+
+    def finished(self):
+        """Pop (ip, port, service) results that are ready."""
+        finished = self._finished
+        while finished:
+            ip, port, service = finished.popleft()
+            self.held.discard((ip, port))
+            self.grabbed += 1
+            yield ip, port, service
+
+    def _run(self):
+        sel = selectors.DefaultSelector()
+        active = {}
+        free = list(range(self.concurrency))
+        size = self.buffer_size
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                while free and self._pending:
+                    sock, ip, port = self._pending.popleft()
+                    grab = _Grab(sock, ip, port, free.pop(), now, self.timeout)
+                    active[sock.fileno()] = grab
+                    events = selectors.EVENT_READ
+                    if grab.probe is not None:
+                        events |= selectors.EVENT_WRITE
+                    sel.register(sock, events, grab)
+
+                if not active:
+                    self._stop.wait(0.02)
+                    continue
+
+                for key, events in sel.select(0.02):     # close() shu oraliqda kutadi
+                    grab = key.data
+                    if events & selectors.EVENT_WRITE and not grab.sent:
+                        self._send(sel, grab)
+                        continue
+                    if events & selectors.EVENT_READ:
+                        start = grab.slot * size
+                        view = self._view[start + grab.filled:start + size]
+                        try:
+                            n = grab.sock.recv_into(view)
+                        except (BlockingIOError, InterruptedError):
+                            continue
+                        except OSError:
+                            n = 0
+                        grab.filled += n
+                        grab.last = time.monotonic()
+                        if n == 0 or grab.filled >= size or self._complete(grab):
+                            self._finish(sel, active, free, grab)
+
+                now = time.monotonic()
+                for grab in list(active.values()):
+                    if now >= grab.deadline or (grab.filled and now - grab.last >= IDLE_WAIT):
+                        self._finish(sel, active, free, grab)
+                    elif not grab.sent and not grab.filled and now - grab.started >= GREETING_WAIT:
+                        grab.probe = HTTP_PROBE     # jim server: HTTP bo'lishi mumkin
+                        sel.modify(grab.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, grab)
+        finally:
+            for grab in active.values():
+                abort(grab.sock)
+            sel.close()
+
+    def _send(self, sel, grab):
+        try:
+            grab.sock.send(grab.probe)
+        except OSError:
+            pass
+        grab.sent = True
+        sel.modify(grab.sock, selectors.EVENT_READ, grab)
+
+    def _complete(self, grab):
+        """Enough bytes to fingerprint without waiting for the deadline."""
+        start = grab.slot * self.buffer_size
+        end = start + grab.filled
+        buffer = self._buffer
+        # memoryview'da `in` int qidiradi - bytearray.find() ishlatamiz
+        if buffer[start] in (0x15, 0x16):
+            return grab.filled >= 5 + int.from_bytes(buffer[start + 3:start + 5], "big")
+        if buffer.startswith(b"HTTP/", start, end):
+            return buffer.find(b"\r\n\r\n", start, end) != -1
+        return buffer.find(b"\n", start, end) != -1
+
+    def _finish(self, sel, active, free, grab):
+        sel.unregister(grab.sock)
+        del active[grab.sock.fileno()]
+        abort(grab.sock)
+        start = grab.slot * self.buffer_size
+        data = bytes(self._view[start:start + grab.filled])
+        free.append(grab.slot)
+        self._finished.append((grab.ip, grab.port, _trim(fingerprint(grab.port, data))))
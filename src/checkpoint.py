@@ -0,0 +1,167 @@
+"""Append-only scan checkpoints for resuming interrupted scans.
+
+File layout:
+
+    MAGIC | u32 header length | JSON header (target, ports, seed, ...)
+    then a stream of records:
+        b"H" u16 len, host bytes      -> defines the next host id
+        b"R" u32 host id, u16 port, u8 state
+        b"E"                          -> scan completed
+
+Results are buffered in memory and written in bulk by flush(), so the
+probe loop only pays for a dict lookup and a struct pack per result.
+Replaying the file rebuilds a portstate.ScanStore whose non-UNSCANNED
+entries are exactly the (host, port) pairs that are done.
+"""
+import json
+import os
+import struct
+
+from portstate import STATE_IDS, STATE_NAMES, UNSCANNED, ScanStore
+
+MAGIC = b"PSCKPT1\n"
+_LEN = struct.Struct("<I")
+_HOST = struct.Struct("<cH")
+_RESULT = struct.Struct("<cIHB")
+
+
+class CheckpointError(Exception):
+    pass
+
+
+class Checkpoint:
+    def __init__(self, path, header, store=None, complete=False):
+        self.path = path
+        self.header = header
+        self.store = store if store is not None else ScanStore()
+        self.complete = complete
+        self._host_ids = {}
+        self._buffer = bytearray()
+        self._file = None
+
+    @property
+    def target(self):
+        return self.header["target"]
+
+    @property
+    def ports(self):
+        return self.header["ports"]
+
+    @property
+    def seed(self):
+        return self.header.get("seed")
+
+    @classmethod
+    def create(cls, path, target, ports, seed=None):
+        """Start a new checkpoint file; `ports` is a port spec string."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        header = {"version": 1, "target": str(target), "ports": ports, "seed": seed}
+        raw = json.dumps(header).encode("utf-8")
+        ckpt = cls(path, header)
+        ckpt._file = open(path, "wb")
+        ckpt._file.write(MAGIC + _LEN.pack(len(raw)) + raw)
+        ckpt._file.flush()
+        return ckpt
+
+    @classmethod
+    def load(cls, path):
+        """Replay an existing checkpoint; call resume() to keep appending.
+        A damaged file raises CheckpointError."""
+        with open(path, "rb") as file:
+            data = file.read()
+        if not data.startswith(MAGIC):
+            raise CheckpointError(f"not a scan checkpoint: {path}")
+        try:
+            return cls._replay(path, data)
+        except (struct.error, ValueError, IndexError, KeyError) as e:
+            raise CheckpointError(f"corrupt checkpoint {path}: {e}") from None
+
+    @classmethod
+    def _replay(cls, path, data):
+        pos = len(MAGIC)
+        if len(data) < pos + _LEN.size:
+            raise CheckpointError(f"truncated checkpoint header: {path}")
+        (size,) = _LEN.unpack_from(data, pos)
+        pos += _LEN.size
+        if pos + size > len(data):
+            raise CheckpointError(f"truncated checkpoint header: {path}")
+        header = json.loads(data[pos:pos + size].decode("utf-8"))
+        if not isinstance(header, dict) or "target" not in header or "ports" not in header:
+            raise CheckpointError(f"checkpoint header lacks target/ports: {path}")
+        pos += size
+
+        store = ScanStore()
+        hosts = []
+        complete = False
+        end = len(data)
+        while pos < end:
+            kind = data[pos:pos + 1]
+            if kind == b"R":
+                if pos + _RESULT.size > end:
+                    break   # yarim yozilgan yozuv (crash)
+                _, hid, port, state = _RESULT.unpack_from(data, pos)
+                store.record(hosts[hid], port, STATE_NAMES[state])
+                pos += _RESULT.size
+            elif kind == b"H":
+                if pos + _HOST.size > end:
+                    break
+                _, length = _HOST.unpack_from(data, pos)
+                start = pos + _HOST.size
+                if start + length > end:
+                    break
+                hosts.append(data[start:start + length].decode("utf-8"))
+                pos = start + length
+            elif kind == b"E":
+                complete = True
+                pos += 1
+            else:
+                raise CheckpointError(f"corrupt checkpoint record at byte {pos}")
+
+        ckpt = cls(path, header, store, complete)
+        ckpt._host_ids = {host: i for i, host in enumerate(hosts)}
+        ckpt._valid_size = pos
+        return ckpt
+
+    def resume(self):
+        """Open a loaded checkpoint for appending (drops a torn tail record)."""
+        self._file = open(self.path, "r+b")
+        self._file.truncate(getattr(self, "_valid_size", os.path.getsize(self.path)))
+        self._file.seek(0, os.SEEK_END)
+        return self
+
+    def is_done(self, host, port):
+        return self.store.is_done(host, port)
+
+    def add(self, host, port, status):
+        state = STATE_IDS[status]
+        if state == UNSCANNED:
+            return      # local errors are retried on resume
+        self.store.record(host, port, status)
+        hid = self._host_ids.get(host)
+        if hid is None:
+            hid = self._host_ids[host] = len(self._host_ids)
+            raw = host.encode("utf-8")
+            self._buffer += _HOST.pack(b"H", len(raw)) + raw
+        self._buffer += _RESULT.pack(b"R", hid, port, state)
+
+    def flush(self):
+        if self._buffer and self._file is not None:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self._buffer = bytearray()
+
+    def finish(self):
+        self.flush()
+        if self._file is not None:
+            self._file.write(b"E")
+            self._file.flush()
+        self.complete = True
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,456 @@
+"""Headless port scanner: python cli.py TARGET -p 1-1024
+
+Never imports PyQt5, so it starts fast and runs without a display
+(cron, CI, ssh sessions).
+"""
+import argparse
+import contextlib
+import os
+import random
+import signal
+import sys
+import time
+
+from banners import DEFAULT_CONCURRENCY as BANNER_CONCURRENCY, BannerGrabber
+from checkpoint import Checkpoint, CheckpointError
+from congestion import AimdWindow, FixedWindow
+from discovery import DEFAULT_TTL as DISCOVERY_TTL, DISCOVERY_PORTS, HostDiscovery
+from engine import ScanEngine, parse_ports
+from exporters import EXPORTERS, open_exporter
+from history import DEFAULT_PATH as HISTORY_PATH, DEFAULT_TTL, ScanHistory, parse_age
+from metrics import MetricsServer, write_textfile
+from resolver import DEFAULT_WORKERS as DNS_WORKERS, Resolver
+from portstate import OPEN, ScanStore
+from profiling import Profiler
+from rtt import DEFAULT_CEILING, DEFAULT_FLOOR, AdaptiveTimeout
+from services import service_name
+from targets import TargetSpec
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Headless TCP connect scanner.")
+    parser.add_argument("target", nargs="?",
+                        help="host, CIDR (10.0.0.0/24), range (10.0.0.1-50) or @file; "
+                             "comma-separate several")
+    family = parser.add_mutually_exclusive_group()
+    family.add_argument("-4", dest="family", action="store_const", const="4",
+                        help="scan IPv4 addresses of host names only")
+    family.add_argument("-6", dest="family", action="store_const", const="6",
+                        help="scan IPv6 addresses of host names only")
+    parser.add_argument("--all-addresses", action="store_true",
+                        help="scan every address a name resolves to, not just the first "
+                             "per address family")
+    parser.add_argument("--dns-workers", type=int, default=DNS_WORKERS,
+                        help=f"concurrent name lookups (default: {DNS_WORKERS})")
+    parser.add_argument("--discover", action="store_true",
+                        help="check each host with a few quick connects first and skip "
+                             "hosts that answer none of them")
+    parser.add_argument("--discover-ports", default=",".join(map(str, DISCOVERY_PORTS)),
+                        help="ports probed by --discover (default: %(default)s)")
+    parser.add_argument("--discover-timeout", type=float, default=1.0,
+                        help="--discover probe timeout in seconds (default: 1.0)")
+    parser.add_argument("--discovery-ttl", default=f"{DISCOVERY_TTL:g}", metavar="AGE",
+                        help="reuse up/down verdicts cached in the history DB for AGE, "
+                             "e.g. 30m; 0 disables the cache (default: %(default)ss)")
+    parser.add_argument("--force", metavar="HOSTS",
+                        help="hosts to scan even when --discover finds them down "
+                             "(same syntax as TARGET)")
+    parser.add_argument("-p", "--ports", default="1-1024",
+                        help="port spec, e.g. 22,80,8000-8100 or top:100 for the 100 most "
+                             "often open ports (default: 1-1024)")
+    parser.add_argument("--top-ports", type=int, metavar="N",
+                        help="scan the N most often open ports, most likely first "
+                             "(same as -p top:N)")
+    parser.add_argument("--randomize", action="store_true",
+                        help="probe (host, port) pairs in a pseudo-random order")
+    parser.add_argument("--seed", type=int,
+                        help="seed for --randomize, to repeat an order (implies --randomize)")
+    parser.add_argument("-c", "--concurrency", type=int, default=500,
+                        help="connects kept in flight at once; the ceiling with --aimd "
+                             "(default: 500)")
+    parser.add_argument("--aimd", action="store_true",
+                        help="grow/shrink the in-flight window from timeout and error ratios")
+    parser.add_argument("--max-rate", type=float, default=0,
+                        help="hard cap on connects per second (default: unlimited)")
+    parser.add_argument("--fd-limit", type=int, metavar="N",
+                        help="raise the open-file limit to N for the scan (default: the hard "
+                             "limit; 0 leaves it unchanged); the window is capped to fit it")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="worker processes to shard (host, port) pairs across (default: 1)")
+    parser.add_argument("-t", "--timeout", type=float, default=0.5,
+                        help="per-probe timeout in seconds; the starting value with "
+                             "--adaptive (default: 0.5)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="derive per-host timeouts from measured RTT")
+    parser.add_argument("--min-timeout", type=float, default=DEFAULT_FLOOR,
+                        help=f"adaptive timeout floor (default: {DEFAULT_FLOOR})")
+    parser.add_argument("--max-timeout", type=float, default=DEFAULT_CEILING,
+                        help=f"adaptive timeout ceiling (default: {DEFAULT_CEILING})")
+    parser.add_argument("--silent-timeout", type=float, metavar="SECONDS",
+                        help="adaptive: longest timeout for a host that has not answered yet; "
+                             "it backs off towards this (default: --timeout)")
+    parser.add_argument("-b", "--banners", action="store_true",
+                        help="read banners / send small probes on open ports to identify "
+                             "the service and version")
+    parser.add_argument("--banner-timeout", type=float, default=2.0,
+                        help="per-port banner deadline in seconds (default: 2.0)")
+    parser.add_argument("--banner-concurrency", type=int, default=BANNER_CONCURRENCY,
+                        help=f"banner grabs in flight at once (default: {BANNER_CONCURRENCY})")
+    parser.add_argument("-a", "--all", action="store_true",
+                        help="print closed/filtered ports too, not only open ones")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="also stream printed rows to FILE (.csv, .ndjson or .pscan "
+                             "binary; add .gz to compress)")
+    parser.add_argument("--format", choices=sorted(EXPORTERS),
+                        help="format for --output when the extension does not say")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write Prometheus metrics (RTT histograms, outcomes, rate, ETA) "
+                             "to FILE every second")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics at http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="profile the scan to FILE: cProfile for .prof, sampled "
+                             "collapsed stacks for .folded (worker processes not included)")
+    parser.add_argument("--checkpoint", metavar="FILE",
+                        help="record progress to FILE so the scan can be resumed")
+    parser.add_argument("--resume", metavar="FILE",
+                        help="continue the scan recorded in checkpoint FILE")
+    parser.add_argument("--unscanned", metavar="FILE",
+                        help="if interrupted, write the ports left unscanned to FILE as "
+                             "'TARGET PORTS' lines instead of listing them on stderr")
+    parser.add_argument("--history", nargs="?", const=HISTORY_PATH, metavar="DB",
+                        help=f"store results in SQLite DB (default: {HISTORY_PATH}); "
+                             "query it with history.py")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse results from earlier scans of the same target that are "
+                             "still within their TTL; implies --history")
+    parser.add_argument("--ttl", action="append", default=[], metavar="STATE=AGE",
+                        help="how long a result stays fresh with --incremental, e.g. "
+                             "closed=12h or open=0 (defaults: "
+                             + ", ".join(f"{k.lower()}={v}s" for k, v in DEFAULT_TTL.items())
+                             + ")")
+    return parser
+
+
+def parse_ttl(values):
+    ttl = dict(DEFAULT_TTL)
+    for value in values:
+        state, sep, age = value.partition("=")
+        state = state.strip().upper()
+        if not sep or state not in ttl:
+            raise ValueError(f"bad --ttl {value!r}; expected open|closed|filtered=AGE")
+        try:
+            ttl[state] = parse_age(age.strip())
+        except ValueError:
+            raise ValueError(f"bad --ttl age {age!r}") from None
+    return ttl
+
+
+def _print_result(out, host, port, status, service):
+    out.write(f"{host}\t{port}\t{status}\t{service}\n")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.profile:
+        return scan(parser, args)
+    profiler = Profiler(args.profile)
+    profiler.start()
+    try:
+        return scan(parser, args)
+    finally:
+        try:
+            print(f"profile: {profiler.stop()}", file=sys.stderr)
+        except OSError as e:
+            print(f"error: profile: {e}", file=sys.stderr)
+
+
+def scan(parser, args):
+    checkpoint = None
+    if args.resume:
+        try:
+            checkpoint = Checkpoint.load(args.resume)
+        except (OSError, CheckpointError) as e:
+            print(f"error: cannot resume: {e}", file=sys.stderr)
+            return 2
+        args.target = checkpoint.target
+        args.ports = checkpoint.ports
+        args.seed = checkpoint.seed
+    elif not args.target:
+        parser.error("a target is required unless --resume is given")
+    else:
+        if args.top_ports:
+            args.ports = f"top:{args.top_ports}"
+        if args.randomize and args.seed is None:
+            args.seed = random.getrandbits(63)
+
+    try:
+        ports = parse_ports(args.ports)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        targets = TargetSpec(args.target)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    ttl = None
+    if args.incremental:
+        try:
+            ttl = parse_ttl(args.ttl)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+        args.history = args.history or HISTORY_PATH
+
+    timeout = args.timeout
+    if args.adaptive:
+        try:
+            timeout = AdaptiveTimeout(args.timeout, args.min_timeout, args.max_timeout,
+                                      args.silent_timeout)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+
+    resolver = Resolver(args.family or "any", args.all_addresses, max(1, args.dns_workers))
+
+    discovery = None
+    if args.discover:
+        try:
+            force = set(TargetSpec(args.force)) if args.force else ()
+            discovery = HostDiscovery(parse_ports(args.discover_ports), args.discover_timeout,
+                                      force=force, cache_path=args.history or HISTORY_PATH,
+                                      ttl=parse_age(args.discovery_ttl))
+        except ValueError as e:
+            print(f"error: discovery: {e}", file=sys.stderr)
+            return 2
+
+    banners = None
+    if args.banners:
+        try:
+            banners = BannerGrabber(args.banner_concurrency, args.banner_timeout)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+
+    if args.aimd:
+        window = AimdWindow(args.concurrency, max_rate=args.max_rate)
+    else:
+        window = FixedWindow(args.concurrency, max_rate=args.max_rate)
+
+    out = sys.stdout
+    exporter = None
+    export_rows = []
+    history = None
+    server = None
+    db_errors = ()
+
+    def emit(row):
+        _print_result(out, *row)
+        if exporter:
+            export_rows.append(row)
+
+    # setup: biror narsa ochilmasa, shu paytgacha yaratilgan fayllar yopiladi/o'chiriladi
+    with contextlib.ExitStack() as setup:
+        if args.output:
+            try:
+                exporter = open_exporter(args.output, args.format)
+            except (OSError, ValueError) as e:
+                print(f"error: output: {e}", file=sys.stderr)
+                return 2
+            setup.callback(_discard, exporter.close, exporter.path)
+
+        try:
+            if checkpoint:
+                setup.callback(_discard, checkpoint.close)
+                for host, port, status in checkpoint.store.items(OPEN):
+                    emit((host, port, status, service_name(port)))
+                out.flush()
+                if checkpoint.complete:
+                    setup.pop_all()
+                    if exporter:
+                        exporter.write_rows(export_rows)
+                        exporter.close()
+                    return 0
+                checkpoint.resume()
+            elif args.checkpoint:
+                checkpoint = Checkpoint.create(args.checkpoint, targets, args.ports, args.seed)
+                setup.callback(_discard, checkpoint.close, checkpoint.path)
+        except OSError as e:
+            print(f"error: checkpoint: {e}", file=sys.stderr)
+            return 2
+
+        done = checkpoint.store if checkpoint else ScanStore() if ttl else None
+        if args.workers > 1:
+            from parallel import ParallelScanEngine     # multiprocessing faqat -w bilan
+
+            engine = ParallelScanEngine(targets, ports, timeout, window, args.workers, done,
+                                        args.seed, banners, resolver, discovery, args.fd_limit)
+        else:
+            engine = ScanEngine(targets, ports, timeout=timeout, concurrency=window, done=done,
+                                seed=args.seed, banners=banners, resolver=resolver,
+                                discovery=discovery, fd_limit=args.fd_limit)
+
+        if args.metrics_port is not None:
+            try:
+                server = MetricsServer(engine, args.metrics_port)
+                print(f"metrics: http://127.0.0.1:{server.port}/metrics", file=sys.stderr)
+            except OSError as e:
+                print(f"error: metrics: {e}", file=sys.stderr)
+                return 2
+            setup.callback(server.close)
+
+        # tarix oxirida: scan yozuvi ochilgach boshqa setup xatosi bo'lmaydi
+        if args.history:
+            import sqlite3
+
+            db_errors = (sqlite3.Error,)
+            try:
+                history = ScanHistory(args.history)
+                setup.callback(history.close)
+                scan_id = history.begin_scan(targets, args.ports)
+                if checkpoint:
+                    history.add_results(scan_id, (
+                        (host, port, status, "")
+                        for host, port, status in checkpoint.store.items()
+                    ))
+                if ttl:
+                    cached = []
+                    for row in history.fresh_results(targets, ports, ttl):
+                        host, port, status = row[:3]
+                        if not done.is_done(host, port):
+                            done.record(host, port, status)
+                            cached.append(row)
+                    history.add_cached(scan_id, cached)
+            except (sqlite3.Error, OSError) as e:
+                print(f"error: history: {e}", file=sys.stderr)
+                return 2
+        setup.pop_all()     # endi skan tsiklining finally bloki yopadi
+
+    if history and ttl:
+        for row in cached:
+            if row[2] == "OPEN" or args.all:
+                emit(row[:4])
+        out.flush()
+        print(f"incremental: {len(cached)} port(s) still fresh, not re-probed",
+              file=sys.stderr)
+    history_rows = []
+
+    previous = signal.getsignal(signal.SIGINT)
+
+    def interrupt(signum, frame):
+        # 1-Ctrl+C: skan to'xtaydi, natijalar yoziladi; 2-si darhol chiqaradi
+        signal.signal(signal.SIGINT, previous)
+        engine.cancel()
+
+    signal.signal(signal.SIGINT, interrupt)
+    record = checkpoint.add if checkpoint else None
+    next_flush = time.monotonic() + 1.0
+    try:
+        for result in engine:
+            if record:
+                record(result.host, result.port, result.status)
+            if history:
+                history_rows.append(result)
+            if time.monotonic() >= next_flush:
+                engine.throughput.update(engine.scanned)
+                if args.metrics:
+                    write_textfile(args.metrics, engine)
+                if checkpoint:
+                    checkpoint.flush()
+                if history:
+                    history.add_results(scan_id, history_rows)
+                    history_rows = []
+                if exporter:
+                    exporter.write_rows(export_rows)
+                    export_rows.clear()
+                next_flush = time.monotonic() + 1.0
+            if result.status == "OPEN":
+                emit(result)
+                out.flush()
+            elif args.all:
+                emit(result)
+        if checkpoint and not engine.interrupted:
+            checkpoint.finish()
+    except KeyboardInterrupt:
+        engine.cancel()
+        return 130
+    except (RuntimeError, OSError, ValueError, *db_errors) as e:
+        engine.cancel()
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        signal.signal(signal.SIGINT, previous)
+        if server:
+            server.close()
+        if args.metrics:
+            try:
+                write_textfile(args.metrics, engine)
+            except OSError as e:
+                print(f"error: metrics: {e}", file=sys.stderr)
+        if checkpoint:
+            checkpoint.close()
+        if history:
+            try:
+                history.add_results(scan_id, history_rows)
+                history.finish_scan(scan_id, "stopped" if engine.interrupted else "completed")
+            except sqlite3.Error as e:
+                print(f"error: history: {e}", file=sys.stderr)
+            history.close()
+        if exporter:
+            try:
+                exporter.write_rows(export_rows)
+                exporter.close()
+            except OSError as e:
+                print(f"error: output: {e}", file=sys.stderr)
+
+    stats = engine.socket_stats
+    if any(stats.get(key) for key in ("window_capped", "local_errors")):
+        print(f"sockets: fd limit {stats['fd_limit']}, window capped "
+              f"{stats.get('window_capped', 0)}x, {stats.get('local_errors', 0)} local error(s), "
+              f"{stats.get('retries', 0)} retried, {stats.get('gave_up', 0)} given up, "
+              f"{stats.get('rst_closes', 0)} RST close(s)", file=sys.stderr)
+    if discovery:
+        print(f"discovery: {engine.dead_hosts} host(s) down, skipped", file=sys.stderr)
+    for host, err in engine.failed_hosts.items():
+        print(f"error: cannot resolve {host}: {err}", file=sys.stderr)
+    if engine.interrupted:
+        print(f"interrupted in {engine.stop_latency * 1000:.0f} ms: {engine.unscanned:,} of "
+              f"{engine.total:,} port(s) not scanned, {len(engine.aborted):,} aborted in flight",
+              file=sys.stderr)
+        _report_unscanned(engine, args.unscanned)
+        return 130
+    return 2 if engine.failed_hosts else 0
+
+
+def _discard(close, path=None):
+    """Close a file opened during setup; remove it if setup created it."""
+    try:
+        close()
+        if path:
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def _report_unscanned(engine, path):
+    """Every unscanned port as "TARGET PORTS" lines, to `path` or stderr."""
+    if path:
+        try:
+            with open(path, "w", encoding="utf-8") as file:
+                for line in engine.unscanned_lines():
+                    file.write(line + "\n")
+        except OSError as e:
+            print(f"error: unscanned: {e}", file=sys.stderr)
+        else:
+            print(f"unscanned ports written to {path}", file=sys.stderr)
+        return
+    for line in engine.unscanned_lines():
+        print(f"unscanned: {line}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""In-flight window control for the probe loop.
+
+FixedWindow keeps a constant window; AimdWindow grows it while probes
+come back cleanly and halves it when, in an epoch, the share of
+timeouts/local errors or the share of refusals (ECONNREFUSED - an
+RST-injecting rate limiter looks like this) spikes above its running
+baseline. A host that filters or refuses everything raises the
+baseline, not the alarm. Both support a hard packets-per-second cap and
+report the measured send rate.
+"""
+
+GOOD_STATES = ("OPEN", "CLOSED")     # the window grows on these
+
+EPOCH_MIN = 32
+SPIKE = 0.2
+BASELINE_WEIGHT = 0.2
+RATE_INTERVAL = 0.5
+
+
+class FixedWindow:
+    def __init__(self, size: int, max_rate: float = None):
+        self.window = size
+        self.maximum = size
+        self.max_rate = max_rate or None
+        self.rate = 0.0
+        self._tokens = 0.0
+        self._last_fill = None
+        self._sent = 0
+        self._rate_started = None
+
+    @property
+    def limit(self):
+        return max(1, int(self.window))
+
+    def acquire(self, now):
+        """Count one send at `now`; returns 0, or seconds to wait for the pps cap."""
+        if self.max_rate:
+            burst = max(1.0, self.max_rate / 20)
+            if self._last_fill is None:
+                self._tokens = burst
+            else:
+                self._tokens = min(burst, self._tokens + (now - self._last_fill) * self.max_rate)
+            self._last_fill = now
+            if self._tokens < 1.0:
+                return (1.0 - self._tokens) / self.max_rate
+            self._tokens -= 1.0
+
+        self._sent += 1
+        if self._rate_started is None:
+            self._rate_started = now
+        elif now - self._rate_started >= RATE_INTERVAL:
+            current = self._sent / (now - self._rate_started)
+            self.rate = current if not self.rate else 0.7 * self.rate + 0.3 * current
+            self._sent = 0
+            self._rate_started = now
+        return 0.0
+
+    def record(self, state):
+        pass
+
+    def split(self, parts):
+        """Per-worker share of this window (see parallel.py)."""
+        rate = self.max_rate / parts if self.max_rate else None
+        return FixedWindow(max(1, -(-self.maximum // parts)), rate)
+
+
+class AimdWindow(FixedWindow):
+    def __init__(self, maximum: int, initial: int = 64, minimum: int = 8,
+                 max_rate: float = None):
+        super().__init__(maximum, max_rate)
+        self.minimum = max(1, min(minimum, maximum))
+        self.window = float(max(self.minimum, min(initial, maximum)))
+        self.ssthresh = float(maximum)
+        self.baseline = None
+        self.refused_baseline = None
+        self.decreases = 0
+        self._completed = 0
+        self._bad = 0
+        self._refused = 0
+
+    def record(self, state):
+        self._completed += 1
+        good = state in GOOD_STATES
+        if not good:
+            self._bad += 1
+        elif state == "CLOSED":
+            self._refused += 1
+        # asosan filtered hostda timeout - odatiy holat, oynani o'stiramiz
+        if good or (self.baseline is not None and self.baseline >= 0.5):
+            if self.window < self.ssthresh:
+                self.window += 1.0
+            else:
+                self.window += 1.0 / self.window
+            self.window = min(self.window, float(self.maximum))
+
+        if self._completed >= max(EPOCH_MIN, int(self.window)):
+            ratio = self._bad / self._completed
+            refused = self._refused / self._completed
+            if self.baseline is None:
+                self.baseline = ratio
+                self.refused_baseline = refused
+            else:
+                if ratio > self.baseline + SPIKE or refused > self.refused_baseline + SPIKE:
+                    self.window = max(float(self.minimum), self.window / 2)
+                    self.ssthresh = self.window
+                    self.decreases += 1
+                self.baseline += BASELINE_WEIGHT * (ratio - self.baseline)
+                self.refused_baseline += BASELINE_WEIGHT * (refused - self.refused_baseline)
+            self._completed = 0
+            self._bad = 0
+            self._refused = 0
+
+    def split(self, parts):
+        rate = self.max_rate / parts if self.max_rate else None
+        return AimdWindow(max(1, -(-self.maximum // parts)),
+                          max(1, int(self.window) // parts), self.minimum, rate)
@@ -0,0 +1,93 @@
+"""Host discovery: a quick liveness pass before the port sweep.
+
+Every address gets TCP connects to a few likely ports. Any answer,
+including a refusal (RST), proves the host is up. Hosts where every probe
+times out are treated as dead and skipped. Checking stops as soon as
+one answer arrives. Verdicts are cached in the history database, so
+repeated runs within `ttl` skip re-discovery.
+"""
+import time
+
+from congestion import FixedWindow
+from engine import probe
+from history import ScanHistory
+from rtt import FixedTimeout
+
+DISCOVERY_PORTS = (80, 443, 22, 3389, 445, 139, 21, 25, 8080, 135)
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_CONCURRENCY = 256
+DEFAULT_TTL = 1800.0
+
+
+class HostDiscovery:
+    """Plug into ScanEngine(discovery=...) or ParallelScanEngine, which runs
+    it once in the coordinator. `force` holds host names or addresses that
+    are always scanned. `cache_path` is a history database (None disables
+    caching). alive() may run on several threads at once."""
+
+    def __init__(self, ports=DISCOVERY_PORTS, timeout=DEFAULT_TIMEOUT,
+                 concurrency=DEFAULT_CONCURRENCY, force=(), cache_path=None, ttl=DEFAULT_TTL):
+        if not ports or timeout <= 0 or concurrency < 1:
+            raise ValueError("discovery needs ports, a positive timeout and concurrency")
+        self.ports = tuple(ports)
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.force = frozenset(force)
+        self.cache_path = cache_path
+        self.ttl = ttl
+
+    def alive(self, addresses, forced=(), should_stop=lambda: False):
+        """The subset of `addresses` that answered (order kept)."""
+        import sqlite3
+
+        up = set(forced)
+        unknown = [ip for ip in addresses if ip not in up]
+        history = self._open_cache()
+        try:
+            if history and unknown:
+                try:
+                    known = history.host_states(unknown, self.ttl)
+                except sqlite3.Error:
+                    known = {}      # kesh ishlamasa ham discovery davom etadi
+                up.update(ip for ip, alive in known.items() if alive)
+                unknown = [ip for ip in unknown if ip not in known]
+            if unknown:
+                found = self._probe(unknown, should_stop)
+                up |= found
+                if history and not should_stop():
+                    now = time.time()
+                    try:
+                        history.record_hosts((ip, ip in found, now) for ip in unknown)
+                    except sqlite3.Error:
+                        pass
+        finally:
+            if history:
+                history.close()
+        return [ip for ip in addresses if ip in up]
+
+    def _open_cache(self):
+        if not self.cache_path or self.ttl <= 0:
+            return None
+        import sqlite3
+
+        try:
+            return ScanHistory(self.cache_path)
+        except (sqlite3.Error, OSError):
+            return None
+
+    def _probe(self, addresses, should_stop):
+        found = set()
+
+        def work():
+            for port in self.ports:
+                for ip in addresses:
+                    if ip not in found:
+                        yield ip, port
+
+        timeouts = FixedTimeout(self.timeout)
+        window = FixedWindow(self.concurrency)
+        for ip, _, state in probe(work(), timeouts, window, should_stop):
+            # RST ham javob; mahalliy xato (ERROR) bo'lsa ham hostni tashlamaymiz
+            if state != "FILTERED":
+                found.add(ip)
+        return found
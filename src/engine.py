@@ -0,0 +1,566 @@
+import errno
+import heapq
+import selectors
+import socket
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from itertools import islice
+from typing import NamedTuple
+
+from congestion import FixedWindow
+from fdbudget import FD_ERRORS, RESERVE, RETRY_DELAY, FdBudget
+from metrics import ScanMetrics, Throughput
+from permutation import Permutation
+from resolver import Resolver
+from rtt import FixedTimeout
+from services import service_name, top_ports
+from targets import HOST_BLOCK, TargetSpec
+from unscanned import UnscannedReport
+
+# Windows select() FD_SETSIZE 512 bilan cheklangan
+MAX_CONCURRENCY = 500 if sys.platform == "win32" else 4096
+
+# Linux'da EAGAIN = ephemeral portlar tugadi, Windows'da esa "jarayonda"
+_IN_PROGRESS = {errno.EINPROGRESS, errno.EALREADY}
+if sys.platform == "win32":
+    _IN_PROGRESS.add(errno.EWOULDBLOCK)
+
+# mahalliy resurs xatolari - port holati emas
+_LOCAL_ERRORS = {errno.EAGAIN, errno.EADDRNOTAVAIL, errno.ENOBUFS, errno.EMFILE, errno.ENFILE}
+
+# DNS/discovery kutilayotganda cancel() shu oraliqda tekshiriladi
+STOP_POLL = 0.02
+
+
+def _classify(err):
+    if err == 0:
+        return "OPEN"
+    if err == errno.ECONNREFUSED:
+        return "CLOSED"
+    if err in _LOCAL_ERRORS:
+        return "ERROR"
+    return "FILTERED"
+
+
+def probe(work, timeouts, window, should_stop=lambda: False, on_open=None, budget=None,
+          metrics=None, wakeup=None, aborted=None):
+    """Yield (ip, port, state) for every (ip, port) in `work`, keeping up
+    to `window.limit` non-blocking connects in flight at once.
+
+    `timeouts` supplies each probe's deadline (timeouts.timeout(ip)) and
+    is fed the RTT of every answered connect (timeouts.observe(ip, rtt))
+    and told of every timeout (timeouts.expired(ip)).
+    `window` (congestion.FixedWindow/AimdWindow) paces sends and is told
+    every outcome. `on_open(sock, ip, port)` may take over a connected
+    socket by returning True; otherwise it is closed with an RST.
+    `budget` (fdbudget.FdBudget) caps the window to the descriptor limit
+    and decides when probes that failed locally are retried. `metrics`
+    (metrics.ScanMetrics) records every outcome, RTT and in-flight depth.
+
+    should_stop() is checked before every send and every result. `wakeup`,
+    a socket that becomes readable when it turns true, cuts short the
+    wait in select(). Probes still in flight or waiting for a retry when
+    the loop stops are closed without a verdict and their (ip, port)
+    appended to the `aborted` list.
+    """
+    if budget is None:
+        budget = FdBudget(fd_limit=0)
+    sel = selectors.DefaultSelector()
+    if wakeup is not None:
+        sel.register(wakeup, selectors.EVENT_READ, None)
+    pending = iter(work)
+    probes = {}     # seq -> (sock, ip, port, started, attempt)
+    deadlines = []  # heap of (deadline, seq)
+    retries = []    # heap of (ready, seq, ip, port, attempt)
+    seq = 0
+    exhausted = False
+    paused = 0.0
+
+    def retry(ip, port, attempt, err):
+        # mahalliy xato: portni yo'qotmasdan keyinroq qayta urinamiz
+        nonlocal seq
+        budget.local_error(err, len(probes))
+        delay = budget.retry_delay(attempt + 1)
+        if delay is None:
+            return False
+        window.record("ERROR")
+        seq += 1
+        heapq.heappush(retries, (time.monotonic() + delay, seq, ip, port, attempt + 1))
+        return True
+
+    def finished(sock, ip, port, state):
+        if state != "OPEN":
+            sock.close()
+        elif not (on_open and on_open(sock, ip, port)):
+            budget.close_open(sock)
+
+    try:
+        while not should_stop():
+            throttle = 0.0
+            while len(probes) < budget.cap(min(window.limit, MAX_CONCURRENCY)):
+                if should_stop():
+                    break
+                now = time.monotonic()
+                if now < paused:
+                    throttle = paused - now
+                    break
+                if retries and retries[0][0] <= now:
+                    _, _, ip, port, attempt = heapq.heappop(retries)
+                elif exhausted:
+                    break
+                else:
+                    item = next(pending, None)
+                    if item is None:
+                        exhausted = True
+                        continue
+                    (ip, port), attempt = item, 0
+                throttle = window.acquire(now)
+                if throttle:
+                    seq += 1
+                    heapq.heappush(retries, (now, seq, ip, port, attempt))
+                    break
+
+                sock = None
+                try:
+                    family = socket.AF_INET6 if ":" in ip else socket.AF_INET
+                    sock = socket.socket(family, socket.SOCK_STREAM)
+                    sock.setblocking(False)
+                    err = sock.connect_ex((ip, port))
+                except OSError as e:
+                    if sock is not None:
+                        sock.close()
+                    if e.errno in _LOCAL_ERRORS and retry(ip, port, attempt, e.errno):
+                        if e.errno in FD_ERRORS:
+                            # descriptor bo'shaguncha yangi socket ochmaymiz
+                            throttle = RETRY_DELAY
+                            paused = time.monotonic() + throttle
+                            break
+                        continue
+                    window.record("ERROR")
+                    if metrics:
+                        metrics.record("ERROR", None, len(probes))
+                    yield ip, port, "ERROR"
+                    continue
+
+                if err in _IN_PROGRESS:
+                    seq += 1
+                    started = time.monotonic()
+                    probes[seq] = (sock, ip, port, started, attempt)
+                    sel.register(sock, selectors.EVENT_WRITE, seq)
+                    heapq.heappush(deadlines, (started + timeouts.timeout(ip), seq))
+                    continue
+                state = _classify(err)
+                finished(sock, ip, port, state)
+                if state == "ERROR" and retry(ip, port, attempt, err):
+                    continue
+                window.record(state)
+                if metrics:
+                    metrics.record(state, 0.0, len(probes))
+                yield ip, port, state
+
+            if not probes:
+                if exhausted and not retries:
+                    break
+                wait = throttle or (retries[0][0] - time.monotonic() if retries else 0.0)
+                if wait > 0 and wakeup is not None:
+                    sel.select(min(wait, 0.2))
+                elif wait > 0:
+                    time.sleep(min(wait, 0.2))
+                continue
+
+            wait = max(0.0, min(deadlines[0][0] - time.monotonic(), 0.2))
+            if throttle:
+                wait = min(wait, throttle)
+            if retries:
+                wait = max(0.0, min(wait, retries[0][0] - time.monotonic()))
+            for key, _ in sel.select(wait):
+                if key.data is None or should_stop():
+                    continue    # wakeup: to'xtash while shartida tekshiriladi
+                sock, ip, port, started, attempt = probes.pop(key.data)
+                sel.unregister(sock)
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                state = _classify(err)
+                finished(sock, ip, port, state)
+                if state == "ERROR" and retry(ip, port, attempt, err):
+                    continue
+                rtt = time.monotonic() - started
+                if state in ("OPEN", "CLOSED"):
+                    timeouts.observe(ip, rtt)
+                window.record(state)
+                if metrics:
+                    metrics.record(state, rtt, len(probes))
+                yield ip, port, state
+
+            now = time.monotonic()
+            while deadlines and deadlines[0][0] <= now and not should_stop():
+                _, expired = heapq.heappop(deadlines)
+                entry = probes.pop(expired, None)
+                if entry is None:
+                    continue
+                sock, ip, port, *_ = entry
+                sel.unregister(sock)
+                sock.close()
+                timeouts.expired(ip)
+                window.record("FILTERED")
+                if metrics:
+                    metrics.record("FILTERED", None, len(probes))
+                yield ip, port, "FILTERED"
+    finally:
+        sel.close()     # avval epoll: har bir close() uni yangilamasin
+        for sock, ip, port, *_ in probes.values():
+            sock.close()
+            if aborted is not None:
+                aborted.append((ip, port))
+        if aborted is not None:
+            aborted.extend((ip, port) for _, _, ip, port, _ in sorted(retries))
+
+
+def parse_ports(spec: str):
+    """Parse "22,80,8000-8100" into an ascending list of unique ports.
+
+    "top:N" adds the N most frequently open ports; they come first, most
+    likely first, and the rest follow in ascending order. Past the ports
+    the service index ranks, the top ports go on in port order (named
+    ports first).
+    """
+    ports = set()
+    ranked = []
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        if part.lower().startswith("top:"):
+            try:
+                count = int(part[4:])
+            except ValueError:
+                raise ValueError(f"bad port spec: {part!r}") from None
+            if not 1 <= count <= 65535:
+                raise ValueError(f"top port count out of bounds: {part!r}")
+            if count > len(ranked):
+                ranked = top_ports(count)
+            continue
+        lo, sep, hi = part.partition("-")
+        try:
+            start = int(lo)
+            end = int(hi) if sep else start
+        except ValueError:
+            raise ValueError(f"bad port spec: {part!r}") from None
+        if not 1 <= start <= end <= 65535:
+            raise ValueError(f"port range out of bounds: {part!r}")
+        ports.update(range(start, end + 1))
+    if not ports and not ranked:
+        raise ValueError("empty port spec")
+    if ranked:
+        ports.difference_update(ranked)
+        return ranked + sorted(ports)
+    return sorted(ports)
+
+
+class ScanResult(NamedTuple):
+    host: str
+    port: int
+    status: str     # OPEN / CLOSED / FILTERED / ERROR
+    service: str
+
+
+class ScanEngine:
+    """Qt-free scanner: iterate it to get one ScanResult per probed port.
+
+    `target` is a TargetSpec or any string it accepts (host, CIDR, range,
+    @file). `timeout` is either seconds (fixed) or an rtt.AdaptiveTimeout;
+    `concurrency` is either a window size or a congestion.AimdWindow.
+    Hosts that fail to resolve are skipped and collected in `failed_hosts`.
+    `done` (e.g. a resumed checkpoint's ScanStore) marks (ip, port) pairs
+    to skip. With a `seed`, each block of hosts is probed in a seeded
+    pseudo-random order over its (host, port) pairs instead of port-major.
+    `banners` (a banners.BannerGrabber) fingerprints open ports; their
+    results then arrive once the grab finishes, with the detected service.
+    `resolver` (resolver.Resolver) picks address families and whether
+    every address of a name is scanned; `total` grows as names resolve
+    to more than one address. `discovery` (discovery.HostDiscovery) drops
+    hosts that answer none of its liveness probes; they are counted in
+    `dead_hosts`. `fd_limit` is the RLIMIT_NOFILE soft limit to ask for
+    (None: the hard limit, 0: unchanged); the window is capped to fit it
+    and socket events are counted in `socket_stats`. `metrics` holds
+    outcome counters and RTT/depth histograms (see metrics.py); callers
+    feed `throughput` with `scanned` for the smoothed rate and ETA.
+
+    cancel() may be called from any thread: the probe loop wakes at once,
+    closes every in-flight socket and ends the iteration, within tens of
+    milliseconds even with a full window (`stop_latency`). Results that completed are still
+    yielded; probes cut short are listed in `aborted` and, like ports never
+    reached, counted in `unscanned` - they are not recorded as done, so a
+    resumed scan probes them again. unscanned_lines() lists all of them.
+    """
+
+    def __init__(self, target, ports, timeout=0.5, concurrency=500, done=None, seed=None,
+                 banners=None, resolver=None, discovery=None, fd_limit=None):
+        self.targets = target if isinstance(target, TargetSpec) else TargetSpec(target)
+        self.target = str(self.targets)
+        self.ports = ports
+        self.timeout = timeout
+        self.timeouts = timeout if hasattr(timeout, "observe") else FixedTimeout(timeout)
+        self.concurrency = concurrency
+        self.congestion = concurrency if hasattr(concurrency, "record") else FixedWindow(concurrency)
+        self.total = len(self.targets) * len(ports)
+        self.scanned = 0
+        self.skipped = 0        # already in `done`, counted in `scanned`
+        self.failed_hosts = {}
+        self.done = done
+        self.seed = seed
+        self.banners = banners
+        self.resolver = resolver if resolver is not None else Resolver()
+        self.discovery = discovery
+        self.dead_hosts = 0
+        self.lookahead = 1      # blocks resolved/discovered ahead of the probe loop
+        # banner bosqichi ham socket ushlab turadi
+        reserve = RESERVE + (banners.concurrency * 2 if banners is not None else 0)
+        self.budget = FdBudget(fd_limit, reserve)
+        self.metrics = ScanMetrics()
+        self.throughput = Throughput()
+        self.aborted = []
+        self.stop_latency = None
+        self._reached = 0       # blocks handed out by address_blocks()
+        self._frontier = None   # (addresses, pairs, number) of the block being probed
+        self._cursor = 0        # pairs of it handed to probe() so far
+        self._cancelled = False
+        self._cancel_at = None
+        self._wakeup = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    @property
+    def interrupted(self):
+        """Cancelled before every port had a result."""
+        return self._cancelled and (self.unscanned > 0 or bool(self.aborted))
+
+    @property
+    def unscanned(self):
+        """Ports without a result: aborted, or never reached."""
+        return max(0, self.total - self.scanned)
+
+    @property
+    def window(self):
+        limit = self.congestion.limit
+        return min(limit, self.budget.limit) if self.budget.limit else limit
+
+    @property
+    def socket_stats(self):
+        return dict(self.budget.counters, fd_limit=self.budget.fd_limit or 0)
+
+    @property
+    def rate(self):
+        return self.congestion.rate
+
+    def cancel(self):
+        if self._cancelled:
+            return
+        self._cancel_at = time.monotonic()
+        self._cancelled = True
+        wakeup = self._wakeup
+        if wakeup is not None:
+            try:
+                wakeup.send(b"x")
+            except OSError:
+                pass    # skan allaqachon tugagan
+
+    def work_items(self):
+        """Lazily yield (ip, port), interleaving ports across a block of hosts."""
+        for number, addresses in enumerate(self.address_blocks()):
+            yield from self._block_items(addresses, number)
+
+    def address_blocks(self):
+        """Lazily yield the addresses to probe, one block of targets at a time.
+
+        The next `lookahead` blocks' names resolve (and, with discovery, get
+        their liveness check) in the background while the current block is
+        probed. Failed and dead hosts are accounted for here.
+        """
+        resolver = self.resolver
+        blocks = self.targets.blocks()
+        depth = max(1, self.lookahead)
+        pool = None
+        if self.discovery is not None:
+            pool = ThreadPoolExecutor(depth, thread_name_prefix="discovery")
+        staged = deque()
+
+        def refill():
+            while len(staged) < depth:
+                resolving = resolver.submit(next(blocks, []))
+                if not resolving:
+                    return
+                staged.append(pool.submit(self._discover, resolving) if pool else resolving)
+
+        refill()
+        try:
+            while staged and not self._cancelled:
+                current = staged.popleft()
+                refill()
+                if pool:
+                    if not self._ready(current):
+                        break
+                    addresses = self._apply(*current.result())
+                else:
+                    addresses = self._apply(*self._collect(current)[:3])
+                if self._cancelled:
+                    break
+                self._reached += 1
+                yield addresses
+        finally:
+            resolver.close()
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def _collect(self, resolving):
+        """(addresses, failures, extra addresses, forced addresses) for a
+        resolving block; runs off the probe thread when discovery is on."""
+        force = self.discovery.force if self.discovery is not None else ()
+        addresses, seen, failed, forced = [], set(), {}, set()
+        extra = 0
+        for host, future in resolving:
+            if not self._ready(future):
+                break
+            try:
+                ips = future.result()
+            except OSError as e:
+                failed[host] = str(e)
+                continue
+            extra += len(ips) - 1
+            for ip in ips:
+                if ip in seen:
+                    extra -= 1
+                    continue
+                seen.add(ip)
+                addresses.append(ip)
+                if host in force or ip in force:
+                    forced.add(ip)
+        return addresses, failed, extra, forced
+
+    def _ready(self, future):
+        """Wait for `future` unless the scan is cancelled first."""
+        while not future.done():
+            if self._cancelled:
+                return False
+            wait_futures((future,), STOP_POLL)
+        return True
+
+    def _discover(self, resolving):
+        addresses, failed, extra, forced = self._collect(resolving)
+        alive = self.discovery.alive(addresses, forced, lambda: self._cancelled)
+        return alive, failed, extra, len(addresses) - len(alive)
+
+    def _apply(self, addresses, failed, extra, dead=0):
+        ports = len(self.ports)
+        self.failed_hosts.update(failed)
+        self.total += extra * ports
+        self.scanned += (len(failed) + dead) * ports
+        self.dead_hosts += dead
+        return addresses
+
+    def _pairs(self, count):
+        """Port-major indices (port index * count + host index) of the pairs
+        of a block of `count` hosts that this engine probes."""
+        return range(count * len(self.ports))
+
+    def _block_items(self, addresses, number):
+        count = len(addresses)
+        pairs = self._pairs(count)
+        self._frontier, self._cursor = (addresses, pairs, number), 0
+        if not pairs:
+            return
+        order = pairs
+        if self.seed is not None:
+            order = map(pairs.__getitem__, Permutation(len(pairs), self.seed + number))
+        done, ports = self.done, self.ports
+        for index in order:
+            self._cursor += 1
+            port_index, host_index = divmod(index, count)
+            ip, port = addresses[host_index], ports[port_index]
+            if done is not None and done.is_done(ip, port):
+                self.scanned += 1
+                self.skipped += 1
+                continue
+            yield ip, port
+
+    def unscanned_lines(self):
+        """"TARGET PORTS" lines (see unscanned.py) for every pair without a
+        result once an interrupted scan has stopped: probes cut short, the
+        rest of the block being probed and the targets never reached."""
+        report = UnscannedReport(self.ports, self.done)
+        for ip, port in self.aborted:
+            report.add(ip, port)
+        self._add_tail(report)
+        return report.lines(self.unreached())
+
+    def _add_tail(self, report):
+        """Add the pairs of the current block not yet handed to probe()."""
+        if self._frontier is None:
+            return
+        addresses, pairs, number = self._frontier
+        count, ports = len(addresses), self.ports
+        if self.seed is None:
+            rest = pairs[self._cursor:]
+        else:
+            # tartib aralashgan: olinganlarni ayiramiz (ular kamroq)
+            order = Permutation(len(pairs), self.seed + number)
+            pulled = set(map(pairs.__getitem__, islice(order, self._cursor)))
+            rest = (index for index in pairs if index not in pulled)
+        for index in rest:
+            port_index, host_index = divmod(index, count)
+            report.add(addresses[host_index], ports[port_index])
+
+    def unreached(self):
+        """Target items (hosts, with `done`) in blocks never handed out."""
+        skip = self._reached * HOST_BLOCK
+        if self.done is not None:
+            return islice(iter(self.targets), skip, None)   # done'ni host bo'yicha ayirish uchun
+        return self.targets.after(skip)
+
+    def __iter__(self):
+        return self.results()
+
+    def results(self):
+        grabber = self.banners
+        on_open = None
+        if grabber is not None:
+            grabber.start()
+            on_open = grabber.submit
+        wakeup, self._wakeup = socket.socketpair()
+        wakeup.setblocking(False)
+        self._wakeup.setblocking(False)
+        try:
+            for ip, port, state in probe(self.work_items(), self.timeouts, self.congestion,
+                                         lambda: self._cancelled, on_open, self.budget,
+                                         self.metrics, wakeup, self.aborted):
+                self.scanned += 1
+                if grabber is not None:
+                    yield from self._grabbed(grabber)
+                    if state == "OPEN" and (ip, port) in grabber.held:
+                        continue    # natija banner tayyor bo'lganda chiqadi
+                service = service_name(port) if state == "OPEN" else ""
+                yield ScanResult(ip, port, state, service)
+
+            if grabber is not None:
+                while grabber.held and not self._cancelled:
+                    time.sleep(0.02)
+                    yield from self._grabbed(grabber)
+                grabber.close()
+                yield from self._grabbed(grabber)
+                for ip, port in sorted(grabber.held):     # cancelled mid-grab
+                    yield ScanResult(ip, port, "OPEN", service_name(port))
+                grabber.held.clear()
+        finally:
+            if grabber is not None:
+                grabber.close()
+            self._wakeup.close()
+            wakeup.close()
+            if self._cancel_at is not None:
+                self.stop_latency = time.monotonic() - self._cancel_at
+
+    @staticmethod
+    def _grabbed(grabber):
+        for ip, port, service in grabber.finished():
+            yield ScanResult(ip, port, "OPEN", service)
@@ -0,0 +1,229 @@
+"""Streaming result exporters: CSV, NDJSON and a compact binary format.
+
+Rows are (host, port, status, service) tuples, written in batches while
+the scan runs, so memory stays constant however many rows there are.
+A ".gz" suffix on the path gzips the stream.
+
+    python exporters.py scan.pscan.gz scan.csv     # convert between formats
+
+Binary layout (".pscan"):
+
+    MAGIC, then a stream of records:
+        b"H" u16 len, host bytes      -> defines the next host id
+        b"S" u16 len, service bytes   -> defines the next service id (1-based)
+        b"R" u32 host id, u16 port, u8 status, u32 service id (0 = none)
+
+Version 1 files (PSEXPT1, u16 service id) are still read.
+"""
+import io
+import json
+import struct
+import sys
+
+MAGIC = b"PSEXPT2\n"
+MAGIC_V1 = b"PSEXPT1\n"
+_HOST = struct.Struct("<cH")
+# bannerlar ko'p bo'lsa 65535 ta service yetmaydi: id u32
+_RESULT = struct.Struct("<cIHBI")
+_RESULT_V1 = struct.Struct("<cIHBH")
+STATUS_CODES = {"ERROR": 0, "OPEN": 1, "CLOSED": 2, "FILTERED": 3}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+HEADERS = ("host", "port", "status", "service")
+
+BUFFER_SIZE = 1 << 20
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".pscan": "binary"}
+
+
+def _open_raw(path, mode):
+    if path.endswith(".gz"):
+        import gzip
+
+        return gzip.open(path, mode, compresslevel=6)
+    return open(path, mode, buffering=BUFFER_SIZE)
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    for suffix, fmt in FORMATS.items():
+        if name.lower().endswith(suffix):
+            return fmt
+    raise ValueError(f"unknown export format for {path!r}; use .csv, .ndjson or .pscan")
+
+
+class Exporter:
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._file = _open_raw(path, "wb")
+
+    def write_rows(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvExporter(Exporter):
+    def __init__(self, path):
+        import csv
+
+        super().__init__(path)
+        self._text = io.TextIOWrapper(self._file, encoding="utf-8", newline="")
+        self._writer = csv.writer(self._text)
+        self._writer.writerow(HEADERS)
+
+    def write_rows(self, rows):
+        rows = list(rows)
+        self._writer.writerows(rows)
+        self.rows += len(rows)
+
+    def close(self):
+        if self._file is not None:
+            self._text.close()      # ostidagi faylni ham yopadi
+            self._file = None
+
+
+class NdjsonExporter(Exporter):
+    def write_rows(self, rows):
+        dumps = json.dumps
+        chunk = "".join(
+            f'{{"host": {dumps(host)}, "port": {port}, "status": "{status}", '
+            f'"service": {dumps(service)}}}\n'
+            for host, port, status, service in rows
+        )
+        if chunk:
+            self.rows += chunk.count("\n")
+            self._file.write(chunk.encode("utf-8"))
+
+
+class BinaryExporter(Exporter):
+    def __init__(self, path):
+        super().__init__(path)
+        self._hosts = {}
+        self._services = {"": 0}
+        self._file.write(MAGIC)
+
+    @staticmethod
+    def _intern(chunk, table, kind, value):
+        raw = value.encode("utf-8")
+        index = table[value] = len(table)
+        chunk += _HOST.pack(kind, len(raw)) + raw
+        return index
+
+    def write_rows(self, rows):
+        chunk = bytearray()
+        hosts, services = self._hosts, self._services
+        pack = _RESULT.pack
+        count = 0
+        for host, port, status, service in rows:
+            hid = hosts.get(host)
+            if hid is None:
+                hid = self._intern(chunk, hosts, b"H", host)
+            sid = services.get(service or "")
+            if sid is None:
+                sid = self._intern(chunk, services, b"S", service)
+            chunk += pack(b"R", hid, port, STATUS_CODES[status], sid)
+            count += 1
+        self._file.write(chunk)
+        self.rows += count
+
+
+EXPORTERS = {"csv": CsvExporter, "ndjson": NdjsonExporter, "binary": BinaryExporter}
+
+
+def open_exporter(path, fmt=None):
+    return EXPORTERS[fmt or detect_format(path)](path)
+
+
+def read_binary(path):
+    """Yield (host, port, status, service) rows from a .pscan[.gz] file."""
+    hosts, services = [], [""]
+    with _open_raw(path, "rb") as file:
+        magic = file.read(len(MAGIC))
+        if magic not in (MAGIC, MAGIC_V1):
+            raise ValueError(f"not a binary scan export: {path}")
+        result = _RESULT if magic == MAGIC else _RESULT_V1
+        buffer = b""
+        while True:
+            data = file.read(BUFFER_SIZE)
+            if not data:
+                break
+            buffer += data
+            pos, end = 0, len(buffer)
+            while pos < end:
+                kind = buffer[pos:pos + 1]
+                if kind == b"R":
+                    if pos + result.size > end:
+                        break
+                    _, hid, port, code, sid = result.unpack_from(buffer, pos)
+                    yield hosts[hid], port, STATUS_NAMES[code], services[sid]
+                    pos += result.size
+                elif kind in (b"H", b"S"):
+                    if pos + _HOST.size > end:
+                        break
+                    _, length = _HOST.unpack_from(buffer, pos)
+                    start = pos + _HOST.size
+                    if start + length > end:
+                        break
+                    value = buffer[start:start + length].decode("utf-8")
+                    (hosts if kind == b"H" else services).append(value)
+                    pos = start + length
+                else:
+                    raise ValueError(f"corrupt export record in {path}")
+            buffer = buffer[pos:]
+        if buffer:
+            raise ValueError(f"truncated export: {path}")
+
+
+def read_rows(path):
+    fmt = detect_format(path)
+    if fmt == "binary":
+        yield from read_binary(path)
+        return
+    with io.TextIOWrapper(_open_raw(path, "rb"), encoding="utf-8", newline="") as text:
+        if fmt == "csv":
+            import csv
+
+            reader = csv.reader(text)
+            next(reader, None)
+            for host, port, status, service in reader:
+                yield host, int(port), status, service
+        else:
+            for line in text:
+                row = json.loads(line)
+                yield row["host"], row["port"], row["status"], row["service"]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: python exporters.py INPUT OUTPUT", file=sys.stderr)
+        return 2
+    source, dest = argv
+    try:
+        rows = read_rows(source)
+        with open_exporter(dest) as exporter:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= 10000:
+                    exporter.write_rows(batch)
+                    batch = []
+            exporter.write_rows(batch)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    print(f"{exporter.rows} rows written to {dest}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
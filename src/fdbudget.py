@@ -0,0 +1,110 @@
+"""File-descriptor budget and socket lifecycle for the connect loop.
+
+Every in-flight probe holds one descriptor, so the window has to fit
+under RLIMIT_NOFILE. FdBudget raises the soft limit towards the hard one
+once per process, keeps a reserve for pipes, SQLite, exports and the GUI,
+and shrinks the cap to what actually fits when the kernel still says
+EMFILE/ENFILE. Probes that fail for a local reason (no descriptors,
+ephemeral ports used up, no buffers) are retried with backoff instead of
+being reported as missed ports. Connected sockets are closed with
+SO_LINGER 0, i.e. an RST instead of a FIN, so the scanner does not pile
+up TIME_WAIT entries and burn through ephemeral ports.
+"""
+import collections
+import errno
+import socket
+import struct
+import sys
+
+try:
+    import resource
+except ImportError:     # Windows: select() limiti MAX_CONCURRENCY bilan
+    resource = None
+
+RESERVE = 64
+MIN_WINDOW = 16
+MAX_RETRIES = 3
+RETRY_DELAY = 0.05
+
+FD_ERRORS = {errno.EMFILE, errno.ENFILE}
+_LINGER = struct.pack("hh" if sys.platform == "win32" else "ii", 1, 0)
+
+
+def abort(sock):
+    """Close a connected socket with an RST (no TIME_WAIT on our side)."""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER)
+    except OSError:
+        pass
+    sock.close()
+
+
+def raise_fd_limit(target=None):
+    """Raise the soft RLIMIT_NOFILE to `target` (default: the hard limit).
+    Returns (soft, hard) after the change; (None, None) where unsupported."""
+    if resource is None:
+        return None, None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = hard if target is None else target
+    if hard != resource.RLIM_INFINITY:
+        wanted = min(wanted, hard)
+    if wanted > soft:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+            soft = wanted
+        except (ValueError, OSError):
+            pass    # macOS: hard limit kern.maxfilesperproc dan katta bo'lishi mumkin
+    return soft, hard
+
+
+class FdBudget:
+    """How many probes may hold a descriptor at once, plus counters.
+
+    `fd_limit` is the soft limit to ask for (None: the hard limit, 0:
+    leave it alone). `reserve` descriptors are never used for probes.
+    """
+
+    def __init__(self, fd_limit=None, reserve=RESERVE, retries=MAX_RETRIES):
+        self.retries = retries
+        self.counters = collections.Counter()
+        self.fd_limit = self.limit = None
+        if resource is not None:
+            soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+            if fd_limit != 0:
+                raised = raise_fd_limit(fd_limit)[0]
+                if raised > soft:
+                    self.counters["limit_raised"] += 1
+                soft = raised
+            if soft != resource.RLIM_INFINITY:
+                self.fd_limit = soft
+                self.limit = max(MIN_WINDOW, soft - reserve)
+        self._capped = False
+
+    def cap(self, window):
+        """The in-flight limit for a window of `window` probes."""
+        if self.limit is None or window <= self.limit:
+            self._capped = False
+            return window
+        if not self._capped:
+            self._capped = True
+            self.counters["window_capped"] += 1
+        return self.limit
+
+    def local_error(self, err, in_flight):
+        """Note a local failure; on fd exhaustion shrink to what fit."""
+        self.counters["local_errors"] += 1
+        if err in FD_ERRORS:
+            self.counters["fd_exhausted"] += 1
+            self.limit = max(MIN_WINDOW, in_flight)
+
+    def retry_delay(self, attempt):
+        """Seconds before retry number `attempt` (from 1), or None to give up."""
+        if attempt > self.retries:
+            self.counters["gave_up"] += 1
+            return None
+        self.counters["retries"] += 1
+        return RETRY_DELAY * 2 ** (attempt - 1)
+
+    def close_open(self, sock):
+        self.counters["rst_closes"] += 1
+        abort(sock)
@@ -0,0 +1,257 @@
+"""SQLite scan history: every scan and every probed port, queryable
+across runs without loading whole scans into Python.
+
+    python history.py scans
+    python history.py diff OLD_ID NEW_ID
+    python history.py newly-open 10.0.0.0/24 --since 24h
+
+It doubles as the cache for incremental re-scans: fresh_results() returns
+the ports whose last observation is still within its state's TTL.
+"""
+import argparse
+import os
+import sys
+import time
+
+from portstate import STATE_IDS, STATE_NAMES, OPEN
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".port_scanner", "history.sqlite3")
+PAGE_SIZE = 1000
+
+# Qayta tekshirish muddati (soniya): ochiq portlar har safar tekshiriladi
+DEFAULT_TTL = {"OPEN": 0, "CLOSED": 6 * 3600, "FILTERED": 3600}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id          INTEGER PRIMARY KEY,
+    target      TEXT NOT NULL,
+    ports       TEXT NOT NULL,
+    started_at  REAL NOT NULL,
+    finished_at REAL,
+    status      TEXT NOT NULL DEFAULT 'running'
+);
+CREATE TABLE IF NOT EXISTS results (
+    scan_id INTEGER NOT NULL REFERENCES scans(id) ON DELETE CASCADE,
+    host    TEXT NOT NULL,
+    port    INTEGER NOT NULL,
+    state   INTEGER NOT NULL,
+    service TEXT,
+    checked_at REAL,
+    PRIMARY KEY (scan_id, host, port)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS hosts (
+    host       TEXT PRIMARY KEY,
+    alive      INTEGER NOT NULL,
+    checked_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_host_port ON results(host, port, scan_id);
+CREATE INDEX IF NOT EXISTS idx_results_scan_state ON results(scan_id, state, host, port);
+CREATE INDEX IF NOT EXISTS idx_scans_target_time ON scans(target, started_at);
+CREATE INDEX IF NOT EXISTS idx_scans_time ON scans(started_at);
+"""
+
+
+class ScanHistory:
+    """One connection per thread: create it in the thread that uses it."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        import sqlite3      # CLI start vaqti: faqat tarix ochilganda yuklanadi
+
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(results)")}
+        if "checked_at" not in columns:
+            with self.db:
+                self.db.execute("ALTER TABLE results ADD COLUMN checked_at REAL")
+                self.db.execute(
+                    "UPDATE results SET checked_at = "
+                    "(SELECT started_at FROM scans WHERE scans.id = results.scan_id)"
+                )
+
+    def close(self):
+        self.db.close()
+
+    def begin_scan(self, target, ports):
+        with self.db:
+            cur = self.db.execute(
+                "INSERT INTO scans (target, ports, started_at) VALUES (?, ?, ?)",
+                (str(target), ports, time.time()),
+            )
+        return cur.lastrowid
+
+    def add_results(self, scan_id, rows, checked_at=None):
+        """Insert (host, port, status, service) rows in one transaction."""
+        checked_at = checked_at or time.time()
+        self.add_cached(scan_id, (row + (checked_at,) for row in rows))
+
+    def add_cached(self, scan_id, rows):
+        """Like add_results, but rows carry their own checked_at, so results
+        carried over from the cache keep their original age."""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO results "
+                "(scan_id, host, port, state, service, checked_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (scan_id, host, port, STATE_IDS[status], service or None, checked_at)
+                    for host, port, status, service, checked_at in rows
+                    if STATE_IDS[status]
+                ),
+            )
+
+    def finish_scan(self, scan_id, status="completed"):
+        with self.db:
+            self.db.execute(
+                "UPDATE scans SET finished_at = ?, status = ? WHERE id = ?",
+                (time.time(), status, scan_id),
+            )
+
+    def scans(self, limit=50, offset=0):
+        return self.db.execute(
+            "SELECT id, target, ports, started_at, finished_at, status FROM scans "
+            "ORDER BY started_at DESC LIMIT ? OFFSET ?",
+            (limit, offset),
+        ).fetchall()
+
+    def previous_scan(self, target, before):
+        """Latest finished scan of `target` that started before `before`."""
+        row = self.db.execute(
+            "SELECT id FROM scans WHERE target = ? AND started_at < ? AND status = 'completed' "
+            "ORDER BY started_at DESC LIMIT 1",
+            (str(target), before),
+        ).fetchone()
+        return row[0] if row else None
+
+    def fresh_results(self, target, ports, ttl=DEFAULT_TTL, now=None):
+        """Latest (host, port, status, service, checked_at) of every port of
+        `target` whose last observation is younger than ttl[status]."""
+        now = now or time.time()
+        oldest = now - max(ttl.values(), default=0)
+        wanted = set(ports)
+        rows = self.db.execute(
+            "SELECT r.host, r.port, r.state, r.service, MAX(r.checked_at) "
+            "FROM results AS r JOIN scans AS s ON s.id = r.scan_id "
+            "WHERE s.target = ? AND r.checked_at > ? "
+            "GROUP BY r.host, r.port",
+            (str(target), oldest),
+        )
+        for host, port, state, service, checked_at in rows:
+            status = STATE_NAMES[state]
+            if port in wanted and checked_at > now - ttl.get(status, 0):
+                yield host, port, status, service or "", checked_at
+
+    def host_states(self, hosts, ttl, now=None):
+        """{host: alive} for hosts whose discovery verdict is younger than ttl."""
+        oldest = (now or time.time()) - ttl
+        states = {}
+        hosts = list(hosts)
+        for i in range(0, len(hosts), 500):     # SQLite parametr chegarasi
+            chunk = hosts[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            states.update(
+                (host, bool(alive)) for host, alive in self.db.execute(
+                    f"SELECT host, alive FROM hosts WHERE host IN ({marks}) AND checked_at > ?",
+                    (*chunk, oldest),
+                )
+            )
+        return states
+
+    def record_hosts(self, rows):
+        """Store (host, alive, checked_at) discovery verdicts."""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO hosts (host, alive, checked_at) VALUES (?, ?, ?)",
+                ((host, int(alive), checked_at) for host, alive, checked_at in rows),
+            )
+
+    def results_page(self, scan_id, after=None, limit=PAGE_SIZE, state=OPEN):
+        """Keyset-paged (host, port, status, service) rows ordered by host, port."""
+        host, port = after if after else ("", -1)
+        rows = self.db.execute(
+            "SELECT host, port, state, service FROM results "
+            "WHERE scan_id = ? AND state = ? AND (host, port) > (?, ?) "
+            "ORDER BY host, port LIMIT ?",
+            (scan_id, state, host, port, limit),
+        ).fetchall()
+        return [(h, p, STATE_NAMES[s], svc or "") for h, p, s, svc in rows]
+
+    def diff(self, old_id, new_id, state=OPEN):
+        """(host, port) rows in `state` in scan new_id but not in old_id."""
+        return self.db.execute(
+            "SELECT cur.host, cur.port FROM results AS cur "
+            "WHERE cur.scan_id = ? AND cur.state = ? AND NOT EXISTS ("
+            "  SELECT 1 FROM results AS old "
+            "  WHERE old.scan_id = ? AND old.host = cur.host AND old.port = cur.port "
+            "  AND old.state = cur.state) "
+            "ORDER BY cur.host, cur.port",
+            (new_id, state, old_id),
+        ).fetchall()
+
+    def newly_open(self, target, since):
+        """Ports open in the latest scan of `target` that were not open in
+        the latest scan started before `since` (a timestamp)."""
+        latest = self.previous_scan(target, time.time() + 1)
+        baseline = self.previous_scan(target, since)
+        if latest is None or baseline is None or latest == baseline:
+            return None
+        return self.diff(baseline, latest)
+
+
+def parse_age(text):
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="history.py", description="Query stored scans.")
+    parser.add_argument("--db", default=DEFAULT_PATH, help=f"database (default: {DEFAULT_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("scans", help="list recent scans")
+    diff = sub.add_parser("diff", help="ports open in NEW but not in OLD")
+    diff.add_argument("old", type=int)
+    diff.add_argument("new", type=int)
+    newly = sub.add_parser("newly-open", help="ports that opened since an earlier scan")
+    newly.add_argument("target")
+    newly.add_argument("--since", default="24h", help="age of the baseline scan (default: 24h)")
+    args = parser.parse_args(argv)
+    if args.command == "newly-open":
+        try:
+            since = time.time() - parse_age(args.since)
+        except ValueError:
+            parser.error(f"bad --since {args.since!r}; expected e.g. 90m, 24h, 7d")
+
+    history = ScanHistory(args.db)
+    try:
+        if args.command == "scans":
+            for scan_id, target, ports, started, finished, status in history.scans():
+                stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started))
+                print(f"{scan_id}\t{stamp}\t{status}\t{target}\t{ports}")
+            return 0
+
+        if args.command == "diff":
+            rows = history.diff(args.old, args.new)
+        else:
+            rows = history.newly_open(args.target, since)
+            if rows is None:
+                print("error: need a completed scan of the target before and after --since",
+                      file=sys.stderr)
+                return 1
+        for host, port in rows:
+            print(f"{host}\t{port}")
+        return 0
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
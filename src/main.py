@@ -1,12 +1,50 @@
+import argparse
 import sys
 from PyQt5.QtWidgets import QApplication
+from profiling import Profiler
+from scanlog import DEBUG, ERROR, INFO, RotatingLogWriter
 from ui import MainWindow
 
 def main():
-    app = QApplication(sys.argv)
-    w = MainWindow()
+    parser = argparse.ArgumentParser(prog="main.py", description="Port scanner GUI.")
+    parser.add_argument("--instrument", action="store_true",
+                        help="measure event-loop lag and slot times; reported in the scan log")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="profile GUI and scanner threads until exit: cProfile for .prof, "
+                             "sampled collapsed stacks for .folded")
+    parser.add_argument("--log-file", metavar="FILE",
+                        help="also append the scan log to FILE (rotated at 1 MB, 3 backups)")
+    parser.add_argument("--log-level", choices=("debug", "info"), default="info",
+                        help="lowest level written to --log-file (default: info)")
+    args, qt_args = parser.parse_known_args()
+
+    profiler = None
+    if args.profile:
+        profiler = Profiler(args.profile)
+        profiler.start()
+
+    log_writer = None
+    log_warning = None
+    if args.log_file:
+        level = DEBUG if args.log_level == "debug" else INFO
+        try:
+            log_writer = RotatingLogWriter(args.log_file, level=level)
+        except OSError as e:
+            # log yozilmasa ham dastur ishga tushadi
+            log_warning = f"Cannot write log file {args.log_file}: {e.strerror or e}; logging to stderr"
+            print(f"warning: {log_warning}", file=sys.stderr)
+            log_writer = RotatingLogWriter(None, level=level)
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    w = MainWindow(instrument=args.instrument, profiler=profiler, log_writer=log_writer)
     w.show()
-    sys.exit(app.exec_())
+    if log_warning:
+        w.append_log(log_warning, level=ERROR)
+    code = app.exec_()
+    w.log.close()
+    if w.profiler:
+        print(f"profile: {w.profiler.stop()}", file=sys.stderr)
+    sys.exit(code)
 
 if __name__ == "__main__":
     main()
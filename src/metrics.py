@@ -0,0 +1,280 @@
+"""Scan metrics: outcome counters, log-bucketed latency histograms and
+Prometheus text export.
+
+The probe loop records every completed probe (outcome, connect RTT,
+in-flight depth) into a ScanMetrics. A record is a dict increment plus a
+frexp() to pick the bucket, so it can stay on for every scan. Buckets
+double in width, so a histogram is a short list of ints whatever the
+scan size, and worker processes ship snapshots of those lists back to
+the coordinator.
+
+    python cli.py 10.0.0.0/24 --metrics-port 9464      # curl localhost:9464/metrics
+    python cli.py 10.0.0.0/24 --metrics scan.prom      # node_exporter textfile
+"""
+import math
+import os
+import threading
+import time
+
+OUTCOMES = ("OPEN", "CLOSED", "FILTERED", "ERROR")
+# 100 us .. ~105 s, har bir bucket oldingisidan 2 barobar keng
+RTT_BASE = 0.0001
+RTT_BUCKETS = 21
+DEPTH_BASE = 1.0
+DEPTH_BUCKETS = 14          # 1 .. 8192 in flight
+RATE_INTERVAL = 1.0
+RATE_ALPHA = 0.3
+
+
+class Histogram:
+    """Counts in buckets with upper bounds base * 2**i, plus +Inf."""
+
+    __slots__ = ("base", "counts", "sum")
+
+    def __init__(self, base=RTT_BASE, buckets=RTT_BUCKETS):
+        self.base = base
+        self.counts = [0] * (buckets + 1)
+        self.sum = 0.0
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def bounds(self):
+        return [self.base * 2 ** i for i in range(len(self.counts) - 1)]
+
+    def observe(self, value):
+        self.sum += value
+        if value <= self.base:
+            self.counts[0] += 1
+            return
+        mantissa, exponent = math.frexp(value / self.base)
+        index = exponent - 1 if mantissa == 0.5 else exponent
+        self.counts[min(index, len(self.counts) - 1)] += 1
+
+    def quantile(self, q):
+        """Estimate (interpolated inside the bucket); None when empty."""
+        total = self.count
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.counts) - 1:
+                    return self.base * 2 ** (index - 1)
+                low = self.base * 2 ** (index - 1) if index else 0.0
+                high = self.base * 2 ** index
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return None
+
+    def add(self, counts, total):
+        for index, count in enumerate(counts):
+            self.counts[index] += count
+        self.sum += total
+
+
+class ScanMetrics:
+    """What the probe loop saw. FILTERED probes are timeouts, so they
+    have no RTT; the in-flight depth is sampled at every completion."""
+
+    def __init__(self):
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.rtt = {state: Histogram() for state in ("OPEN", "CLOSED", "ERROR")}
+        self.depth = Histogram(DEPTH_BASE, DEPTH_BUCKETS)
+        self.in_flight = 0
+
+    def record(self, state, rtt, in_flight):
+        self.outcomes[state] += 1
+        if rtt is not None:
+            self.rtt[state].observe(rtt)
+        self.in_flight = in_flight
+        self.depth.observe(in_flight)
+
+    @property
+    def timeouts(self):
+        return self.outcomes["FILTERED"]
+
+    def answered_rtt(self):
+        """OPEN and CLOSED RTTs in one histogram."""
+        merged = Histogram()
+        for state in ("OPEN", "CLOSED"):
+            merged.add(self.rtt[state].counts, self.rtt[state].sum)
+        return merged
+
+    def snapshot(self):
+        """Plain data for a worker's batch message."""
+        return (dict(self.outcomes),
+                {state: (list(h.counts), h.sum) for state, h in self.rtt.items()},
+                (list(self.depth.counts), self.depth.sum), self.in_flight)
+
+    @classmethod
+    def merged(cls, snapshots):
+        total = cls()
+        for outcomes, rtt, depth, in_flight in snapshots:
+            for state, count in outcomes.items():
+                total.outcomes[state] += count
+            for state, (counts, value) in rtt.items():
+                total.rtt[state].add(counts, value)
+            total.depth.add(*depth)
+            total.in_flight += in_flight
+        return total
+
+
+class Throughput:
+    """EWMA of completed ports/sec, and the ETA it implies."""
+
+    def __init__(self):
+        self.rate = 0.0
+        self._last = None       # (monotonic, scanned)
+
+    def update(self, scanned, now=None):
+        now = time.monotonic() if now is None else now
+        if self._last is None:
+            self._last = (now, scanned)
+            return self.rate
+        elapsed = now - self._last[0]
+        if elapsed >= RATE_INTERVAL:
+            current = (scanned - self._last[1]) / elapsed
+            self.rate = current if not self.rate else (
+                RATE_ALPHA * current + (1 - RATE_ALPHA) * self.rate)
+            self._last = (now, scanned)
+        return self.rate
+
+    def eta(self, remaining):
+        """Seconds left at the smoothed rate; None until there is one."""
+        if remaining <= 0:
+            return 0.0
+        return remaining / self.rate if self.rate else None
+
+
+def summary(engine):
+    """The handful of numbers the GUI shows."""
+    metrics = engine.metrics
+    rtt = metrics.answered_rtt()
+    return {
+        "rate": engine.throughput.rate,
+        "eta": engine.throughput.eta(engine.total - engine.scanned),
+        "rtt_p50": rtt.quantile(0.5),
+        "rtt_p99": rtt.quantile(0.99),
+        "timeouts": metrics.timeouts,
+        "errors": metrics.outcomes["ERROR"],
+        "in_flight": metrics.in_flight,
+    }
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram(lines, name, histogram, labels=""):
+    sep = "," if labels else ""
+    cumulative = 0
+    for bound, count in zip(histogram.bounds() + [math.inf], histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels}{sep}le="{_number(bound)}"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {_number(histogram.sum)}")
+    lines.append(f"{name}_count{suffix} {cumulative}")
+
+
+def render(engine):
+    """Prometheus text exposition (format 0.0.4) for a running engine."""
+    metrics = engine.metrics
+    lines = [
+        "# HELP portscan_probes_total Completed probes by outcome.",
+        "# TYPE portscan_probes_total counter",
+    ]
+    for state, count in metrics.outcomes.items():
+        lines.append(f'portscan_probes_total{{outcome="{state.lower()}"}} {count}')
+
+    lines += ["# HELP portscan_connect_rtt_seconds Connect round-trip time by outcome.",
+              "# TYPE portscan_connect_rtt_seconds histogram"]
+    for state, histogram in metrics.rtt.items():
+        _histogram(lines, "portscan_connect_rtt_seconds", histogram,
+                   f'outcome="{state.lower()}"')
+
+    lines += ["# HELP portscan_in_flight_depth Probes in flight, sampled at each completion.",
+              "# TYPE portscan_in_flight_depth histogram"]
+    _histogram(lines, "portscan_in_flight_depth", metrics.depth)
+
+    lines += ["# HELP portscan_socket_events_total Descriptor budget and retry events.",
+              "# TYPE portscan_socket_events_total counter"]
+    stats = engine.socket_stats
+    for event in ("window_capped", "local_errors", "fd_exhausted", "retries", "gave_up",
+                  "rst_closes", "limit_raised"):
+        lines.append(f'portscan_socket_events_total{{event="{event}"}} {stats.get(event, 0)}')
+
+    eta = engine.throughput.eta(engine.total - engine.scanned)
+    gauges = (
+        ("portscan_timeouts_total", "counter", "Probes that timed out.", metrics.timeouts),
+        ("portscan_local_errors_total", "counter", "Probes that failed locally (incl. retried).",
+         stats.get("local_errors", 0)),
+        ("portscan_in_flight", "gauge", "Probes in flight.", metrics.in_flight),
+        ("portscan_window", "gauge", "In-flight limit.", engine.window),
+        ("portscan_send_rate", "gauge", "Connects started per second.", engine.rate),
+        ("portscan_ports_per_second", "gauge", "Completed ports per second (EWMA).",
+         engine.throughput.rate),
+        ("portscan_eta_seconds", "gauge", "Estimated seconds left (NaN until known).",
+         math.nan if eta is None else eta),
+        ("portscan_ports_scanned", "gauge", "Ports done, including skipped ones.", engine.scanned),
+        ("portscan_ports", "gauge", "Ports in the scan.", engine.total),
+        ("portscan_fd_limit", "gauge", "RLIMIT_NOFILE soft limit.", stats.get("fd_limit", 0)),
+        ("portscan_dead_hosts", "gauge", "Hosts skipped by discovery.", engine.dead_hosts),
+    )
+    for name, kind, help_text, value in gauges:
+        value = "NaN" if isinstance(value, float) and math.isnan(value) else _number(value)
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path, engine):
+    """Write render(engine) atomically (node_exporter textfile collector)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as file:
+        file.write(render(engine))
+    os.replace(tmp, path)
+
+
+class MetricsServer:
+    """Serves render(engine) at http://host:port/metrics on a daemon thread."""
+
+    def __init__(self, engine, port, host="127.0.0.1"):
+        # http.server faqat kerak bo'lganda yuklanadi (CLI start vaqti)
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.engine = engine
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    handler.send_error(404)
+                    return
+                body = render(self.engine).encode()
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                pass    # skaner o'zining portiga ham urinib, RST bilan uzadi
+
+        self.server = Server((host, port), Handler)
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics",
+                                        daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
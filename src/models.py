@@ -0,0 +1,248 @@
+import itertools
+from array import array
+
+from PyQt5.QtCore import (
+    QAbstractListModel, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt,
+)
+from PyQt5.QtGui import QColor
+
+from history import PAGE_SIZE, ScanHistory
+from scanlog import DEBUG, ERROR, INFO, OPEN, format_record
+
+STATUSES = ("OPEN", "CLOSED", "FILTERED", "ERROR")
+STATUS_COLORS = {
+    "OPEN": QColor("#00ff88"),
+    "CLOSED": QColor("#7a8681"),
+}
+SORT_ROLE = Qt.UserRole
+LOG_COLORS = {
+    DEBUG: QColor("#5f6b66"),
+    OPEN: QColor("#00ff88"),
+    ERROR: QColor("#ff5c5c"),
+}
+
+
+class _StringTable:
+    """Interns repeated strings (hosts, services) as small integer ids."""
+
+    def __init__(self):
+        self.names = [""]
+        self.ids = {"": 0}
+
+    def id(self, name):
+        sid = self.ids.get(name)
+        if sid is None:
+            sid = len(self.names)
+            self.names.append(name)
+            self.ids[name] = sid
+        return sid
+
+
+class ResultsModel(QAbstractTableModel):
+    """Scan results stored column-wise in compact arrays.
+
+    Rows are appended in batches with a single beginInsertRows, so a
+    result batch costs one view update regardless of its size.
+    """
+
+    HEADERS = ("Host", "Port", "Status", "Service")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._status_ids = {name: i for i, name in enumerate(STATUSES)}
+        self._reset_storage()
+
+    def _reset_storage(self):
+        self._hosts = array("I")        # index into _host_names
+        self._ports = array("H")
+        self._states = array("B")
+        self._services = array("I")     # index into _service_names
+        self._host_names = _StringTable()
+        self._service_names = _StringTable()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ports)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return self._host_names.names[self._hosts[row]]
+            if col == 1:
+                return str(self._ports[row])
+            if col == 2:
+                return STATUSES[self._states[row]]
+            return self._service_names.names[self._services[row]]
+        if role == SORT_ROLE:
+            if col == 0:
+                return self._host_names.names[self._hosts[row]]
+            if col == 1:
+                return self._ports[row]
+            if col == 2:
+                return self._states[row]
+            return self._service_names.names[self._services[row]]
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.ForegroundRole and col == 2:
+            return STATUS_COLORS.get(STATUSES[self._states[row]])
+        return None
+
+    def append_rows(self, rows):
+        if not rows:
+            return
+        first = len(self._ports)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        error_id = self._status_ids["ERROR"]
+        for host, port, status, service in rows:
+            self._hosts.append(self._host_names.id(host))
+            self._ports.append(port)
+            self._states.append(self._status_ids.get(status.upper().strip(), error_id))
+            self._services.append(self._service_names.id(service))
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._reset_storage()
+        self.endResetModel()
+
+    def rows(self):
+        """The rows present now. Safe to iterate on another thread while
+        the GUI appends (or clear() swaps in new storage)."""
+        hosts = self._host_names.names
+        services = self._service_names.names
+        columns = zip(self._hosts, self._ports, self._states, self._services)
+        for hid, port, state, sid in itertools.islice(columns, len(self._ports)):
+            yield hosts[hid], port, STATUSES[state], services[sid]
+
+
+class HistoryModel(QAbstractTableModel):
+    """Open ports of one stored scan, fetched from SQLite a page at a time
+    as the view scrolls (canFetchMore/fetchMore)."""
+
+    HEADERS = ResultsModel.HEADERS
+
+    def __init__(self, history, scan_id, parent=None):
+        super().__init__(parent)
+        self._history = history
+        self._scan_id = scan_id
+        self._rows = []
+        self._exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._rows[index.row()][index.column()]
+        if role == Qt.DisplayRole:
+            return str(value)
+        if role == SORT_ROLE:
+            return value
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.ForegroundRole and index.column() == 2:
+            return STATUS_COLORS.get(value)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        after = self._rows[-1][:2] if self._rows else None
+        page = self._history.results_page(self._scan_id, after)
+        if len(page) < PAGE_SIZE:
+            self._exhausted = True
+        if page:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+
+    def rows(self):
+        """Every row of the scan, paged straight from the database rather than
+        through the model. The connection is opened on first iteration, in
+        the iterating thread."""
+        history = ScanHistory(self._history.path)
+        try:
+            after = None
+            while True:
+                page = history.results_page(self._scan_id, after)
+                yield from page
+                if len(page) < PAGE_SIZE:
+                    return
+                after = page[-1][:2]
+        finally:
+            history.close()
+
+
+class ResultsFilterProxy(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterKeyColumn(-1)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setSortRole(SORT_ROLE)
+        self.setDynamicSortFilter(True)
+
+
+class LogModel(QAbstractListModel):
+    """A snapshot of a scanlog.LogBuffer at or above `min_level`.
+
+    refresh() re-snapshots only when records were added; the list view
+    asks data() for the visible rows alone, so a full buffer costs the
+    same to draw as an empty one.
+    """
+
+    def __init__(self, buffer, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+        self.min_level = INFO
+        self._rows = []
+        self._seq = -1
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def set_min_level(self, level):
+        self.min_level = level
+        self._seq = -1
+        self.refresh()
+
+    def refresh(self):
+        """Returns True when the rows changed."""
+        if self.buffer.seq == self._seq:
+            return False
+        self.beginResetModel()
+        self._rows = self.buffer.records(self.min_level)
+        self._seq = self.buffer.seq
+        self.endResetModel()
+        return True
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        stamp, level, message = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return format_record(stamp, message)
+        if role == Qt.ForegroundRole:
+            return LOG_COLORS.get(level)
+        return None
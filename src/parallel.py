@@ -0,0 +1,414 @@
+"""Multi-process scanning: the (host, port) space is striped across worker
+processes, each running its own ScanEngine event loop.
+
+The coordinator resolves targets (and runs host discovery) once, block by
+block, and sends every worker each block's live addresses over a Pipe.
+Worker i of N probes the block's pairs whose port-major index is i mod N,
+so one host with many ports and many hosts with one port both spread
+evenly. Workers ship results back in compact batches (host table + packed
+port/state arrays); ParallelScanEngine merges them and exposes the same
+interface as ScanEngine.
+"""
+import multiprocessing
+import signal
+import threading
+import time
+from array import array
+from collections import Counter
+from multiprocessing.connection import wait
+
+from congestion import FixedWindow
+from engine import STOP_POLL, ScanEngine, ScanResult
+from metrics import ScanMetrics, Throughput
+from services import service_name
+from targets import TargetSpec
+from unscanned import UnscannedReport
+
+STATES = ("OPEN", "CLOSED", "FILTERED", "ERROR")
+_STATE_IDS = {name: i for i, name in enumerate(STATES)}
+
+BATCH_INTERVAL = 0.05
+BATCH_SIZE = 8192
+DRAIN_TIMEOUT = 2.0     # after cancel: how long a worker waits for the feeder to stop
+
+
+def _watch_control(control, engine):
+    # coordinator "stop" yuborsa yoki pipe yopilsa - to'xtaymiz
+    try:
+        control.recv()
+    except (EOFError, OSError):
+        pass
+    engine.cancel()
+
+
+class _ShardEngine(ScanEngine):
+    """ScanEngine fed address blocks by the coordinator; probes only the
+    pairs of each block whose index is `shard` mod `shards`."""
+
+    def __init__(self, blocks, shard, shards, spec, ports, timeout, concurrency, done, seed,
+                 banners, fd_limit):
+        super().__init__(spec, ports, timeout, concurrency, done, seed, banners,
+                         fd_limit=fd_limit)
+        self._blocks = blocks
+        self.shard = shard
+        self.shards = shards
+
+    def address_blocks(self):
+        blocks = self._blocks
+        while not self._cancelled:
+            if not blocks.poll(STOP_POLL):
+                continue
+            try:
+                addresses = blocks.recv()
+            except EOFError:
+                return
+            if addresses is None:
+                return
+            self._reached += 1
+            yield addresses
+
+    def _pairs(self, count):
+        return range(self.shard, count * len(self.ports), self.shards)
+
+    def remaining(self):
+        """(host -> port runs of the current block's unprobed share, blocks
+        received but never started as [(number, addresses)]) after cancel."""
+        report = UnscannedReport(self.ports)
+        self._add_tail(report)
+        unstarted = []
+        number = self._reached
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        # feeder to'xtab None yuborguncha pipe'dagi bloklarni yig'amiz
+        while time.monotonic() < deadline:
+            if not self._blocks.poll(STOP_POLL):
+                continue
+            try:
+                addresses = self._blocks.recv()
+            except (EOFError, OSError):
+                break
+            if addresses is None:
+                break
+            unstarted.append((number, addresses))
+            number += 1
+        return report.runs(), unstarted
+
+
+def _worker(blocks, shard, shards, spec, ports, timeout, concurrency, done, seed, banners,
+            fd_limit, conn, control):
+    # Ctrl+C butun guruhga boradi; to'xtatishni coordinator boshqaradi
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    engine = _ShardEngine(blocks, shard, shards, spec, ports, timeout, concurrency, done, seed,
+                          banners, fd_limit)
+    threading.Thread(target=_watch_control, args=(control, engine), daemon=True).start()
+
+    host_ids = {}
+    hosts, host_col, port_col, state_col = [], array("I"), array("H"), array("B")
+    services = {}   # row -> banner service, only where it differs from service_name()
+
+    def flush():
+        conn.send(("batch", hosts, host_col.tobytes(), port_col.tobytes(), state_col.tobytes(),
+                   services, engine.window, engine.rate, engine.socket_stats,
+                   engine.metrics.snapshot(), engine.skipped))
+
+    try:
+        next_flush = time.monotonic() + BATCH_INTERVAL
+        for result in engine:
+            hid = host_ids.get(result.host)
+            if hid is None:
+                hid = host_ids[result.host] = len(hosts)
+                hosts.append(result.host)
+            if result.service and result.service != service_name(result.port):
+                services[len(port_col)] = result.service
+            host_col.append(hid)
+            port_col.append(result.port)
+            state_col.append(_STATE_IDS[result.status])
+
+            if len(port_col) >= BATCH_SIZE or time.monotonic() >= next_flush:
+                flush()
+                host_ids = {}
+                hosts, host_col, port_col, state_col = [], array("I"), array("H"), array("B")
+                services = {}
+                next_flush = time.monotonic() + BATCH_INTERVAL
+
+        if engine.cancelled:
+            conn.send(("stopped",))     # socketlar yopildi; qolgani hisob-kitob
+        if port_col:
+            flush()
+        remaining = engine.remaining() if engine.cancelled else ({}, [])
+        conn.send(("done", engine.socket_stats, engine.metrics.snapshot(), engine.aborted,
+                   engine.skipped, remaining))
+    except Exception as e:
+        conn.send(("error", repr(e)))
+    finally:
+        conn.close()
+        blocks.close()
+
+
+class ParallelScanEngine:
+    """Drop-in for ScanEngine that shards (host, port) pairs across `workers`
+    processes.
+
+    `concurrency` (a window size or congestion.AimdWindow) is the total
+    in-flight budget and is split evenly, as is any pps cap. Names resolve
+    and `discovery` runs once, here, up to `workers` blocks ahead, and
+    workers only ever see live addresses; `failed_hosts`, `dead_hosts` and
+    the extra addresses of multi-address names are counted here as well.
+    cancel() reaches every worker over its control pipe; each stops like
+    ScanEngine does and reports its `aborted` probes with its last batch.
+    `stop_latency` ends when the last worker has closed its sockets.
+    """
+
+    def __init__(self, target, ports, timeout=0.5, concurrency=500,
+                 workers: int = None, done=None, seed=None, banners=None, resolver=None,
+                 discovery=None, fd_limit=None):
+        self.targets = target if isinstance(target, TargetSpec) else TargetSpec(target)
+        self.target = str(self.targets)
+        self.ports = ports
+        self.timeout = timeout
+        self.concurrency = concurrency
+        pairs = len(self.targets) * len(ports)
+        self.workers = max(1, min(workers or multiprocessing.cpu_count(), pairs))
+        self.congestion = concurrency if hasattr(concurrency, "split") else FixedWindow(concurrency)
+        self.done = done
+        self.seed = seed
+        self.banners = banners
+        self.discovery = discovery
+        self.fd_limit = fd_limit
+        # resolve + discovery: coordinator'da bir marta, workerlar faqat probe qiladi
+        self._planner = ScanEngine(self.targets, ports, resolver=resolver, discovery=discovery,
+                                   fd_limit=0)
+        # N worker bloklarni N marta tezroq yeydi: discovery ham N blok oldinda
+        self._planner.lookahead = self.workers
+        self.resolver = self._planner.resolver
+        self._results = 0
+        self._skipped = {}  # conn -> ports the worker found already done
+        self._remaining = {}    # shard -> what it left unprobed (_ShardEngine.remaining)
+        self._socket_stats = {}
+        self._metrics = {}  # conn -> latest ScanMetrics snapshot
+        self.throughput = Throughput()
+        self._worker_stats = {}
+        self._ctx = multiprocessing.get_context("spawn")
+        self._controls = []
+        self._feed_error = None
+        self.aborted = []
+        self.stop_latency = None
+        self._cancelled = False
+        self._cancel_at = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    @property
+    def interrupted(self):
+        """Cancelled before every port had a result."""
+        return self._cancelled and (self.unscanned > 0 or bool(self.aborted))
+
+    @property
+    def total(self):
+        return self._planner.total
+
+    @property
+    def scanned(self):
+        """Results, plus ports of failed/dead hosts and already-done ports."""
+        return self._results + self._planner.scanned + sum(self._skipped.values())
+
+    @property
+    def unscanned(self):
+        return max(0, self.total - self.scanned)
+
+    @property
+    def failed_hosts(self):
+        return self._planner.failed_hosts
+
+    @property
+    def dead_hosts(self):
+        return self._planner.dead_hosts
+
+    @property
+    def window(self):
+        return sum(window for window, _ in self._worker_stats.values())
+
+    @property
+    def rate(self):
+        return sum(rate for _, rate in self._worker_stats.values())
+
+    @property
+    def socket_stats(self):
+        """Workers' socket counters summed; fd_limit is per process."""
+        total = Counter()
+        for stats in self._socket_stats.values():
+            total.update(stats)
+        total["fd_limit"] = max((s.get("fd_limit", 0) for s in self._socket_stats.values()),
+                                default=0)
+        return dict(total)
+
+    @property
+    def metrics(self):
+        return ScanMetrics.merged(self._metrics.values())
+
+    def cancel(self):
+        if not self._cancelled:
+            self._cancel_at = time.monotonic()
+        self._cancelled = True
+        self._planner.cancel()
+        for control in list(self._controls):
+            try:
+                control.send("stop")
+            except OSError:
+                pass
+
+    def __iter__(self):
+        return self.results()
+
+    def _stopped(self, stopped, conns):
+        # ScanEngine kabi: oxirgi worker socketlarini yopgan payt
+        if self._cancel_at is None or self.stop_latency is not None:
+            return
+        if len(stopped) == len(conns):
+            self.stop_latency = time.monotonic() - self._cancel_at
+
+    def unscanned_lines(self):
+        """Same as ScanEngine.unscanned_lines(): the workers' aborted probes
+        and unprobed shares, merged per host, then targets never reached."""
+        report = UnscannedReport(self.ports, self.done)
+        for ip, port in self.aborted:
+            report.add(ip, port)
+        ports, workers = self.ports, self.workers
+        unstarted = {}      # number -> (addresses, shards that never started it)
+        for shard, (runs, blocks) in self._remaining.items():
+            for host, host_runs in runs.items():
+                report.add_runs(host, host_runs)
+            for number, addresses in blocks:
+                unstarted.setdefault(number, (addresses, []))[1].append(shard)
+        for number in sorted(unstarted):
+            addresses, idle = unstarted[number]
+            if len(idle) == workers:
+                for ip in addresses:
+                    report.add_all(ip)
+                continue
+            count = len(addresses)
+            for shard in idle:
+                for index in range(shard, count * len(ports), workers):
+                    port_index, host_index = divmod(index, count)
+                    report.add(addresses[host_index], ports[port_index])
+        return report.lines(self._planner.unreached())
+
+    def _feed(self, feeds):
+        """Send every worker each block of live addresses, then None.
+
+        A full pipe blocks here, which keeps resolution and discovery only
+        a few blocks ahead of the slowest worker."""
+        try:
+            for addresses in self._planner.address_blocks():
+                for feed in feeds:
+                    feed.send(addresses)
+            for feed in feeds:
+                feed.send(None)
+        except OSError:
+            pass    # worker chiqib ketdi; sababini results() ko'radi
+        except Exception as e:
+            self._feed_error = repr(e)
+            self.cancel()
+        finally:
+            for feed in feeds:
+                feed.close()
+
+    def results(self):
+        per_worker = self.congestion.split(self.workers)
+        procs, conns, feeds, owners, shards = [], [], [], {}, {}
+        for shard in range(self.workers):
+            parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+            control_out, control_in = self._ctx.Pipe(duplex=False)
+            blocks_out, blocks_in = self._ctx.Pipe(duplex=False)
+            proc = self._ctx.Process(
+                target=_worker,
+                args=(blocks_out, shard, self.workers, self.target, list(self.ports),
+                      self.timeout, per_worker, self.done, self.seed, self.banners,
+                      self.fd_limit, child_conn, control_out),
+                daemon=True,
+            )
+            proc.start()
+            child_conn.close()
+            control_out.close()
+            blocks_out.close()
+            procs.append(proc)
+            conns.append(parent_conn)
+            feeds.append(blocks_in)
+            owners[parent_conn] = proc
+            shards[parent_conn] = shard
+            self._controls.append(control_in)
+        feeder = threading.Thread(target=self._feed, args=(feeds,), name="feeder", daemon=True)
+        feeder.start()
+        if self._cancelled:
+            self.cancel()
+
+        failure = None
+        live = list(conns)
+        stopped = set()     # workers whose in-flight sockets are closed
+        try:
+            while live:
+                for conn in wait(live, timeout=0.2):
+                    try:
+                        msg = conn.recv()
+                    except EOFError:
+                        live.remove(conn)
+                        stopped.add(conn)
+                        proc = owners[conn]
+                        proc.join(timeout=1)
+                        # "done"/"error" yubormasdan o'lgan worker
+                        failure = failure or f"worker exited with code {proc.exitcode}"
+                        self.cancel()
+                        continue
+
+                    kind = msg[0]
+                    if kind == "batch":
+                        (_, hosts, host_col, port_col, state_col, services, window, rate,
+                         stats, metrics, skipped) = msg
+                        self._skipped[conn] = skipped
+                        self._socket_stats[conn] = stats
+                        self._metrics[conn] = metrics
+                        self._worker_stats[conn] = (window, rate)
+                        host_ids = array("I", host_col)
+                        ports = array("H", port_col)
+                        for row, (hid, port, state) in enumerate(zip(host_ids, ports, state_col)):
+                            self._results += 1
+                            status = STATES[state]
+                            service = ""
+                            if status == "OPEN":
+                                service = services.get(row) or service_name(port)
+                            yield ScanResult(hosts[hid], port, status, service)
+                    elif kind == "stopped":
+                        stopped.add(conn)
+                        self._stopped(stopped, conns)
+                    elif kind == "done":
+                        self._socket_stats[conn] = msg[1]
+                        self._metrics[conn] = msg[2]
+                        self.aborted.extend(msg[3])
+                        self._skipped[conn] = msg[4]
+                        self._remaining[shards[conn]] = msg[5]
+                        live.remove(conn)
+                        stopped.add(conn)
+                        self._stopped(stopped, conns)
+                    else:
+                        failure = msg[1]
+                        live.remove(conn)
+                        stopped.add(conn)
+                        self.cancel()
+            failure = failure or self._feed_error
+            self._stopped(conns, conns)
+        finally:
+            self._planner.cancel()  # iteratsiya tashlab ketilsa feeder ham to'xtasin
+            for control in self._controls:
+                control.close()
+            self._controls = []
+            for proc in procs:
+                proc.join(timeout=2)
+                if proc.is_alive():
+                    proc.terminate()
+            feeder.join(timeout=2)
+            for conn in conns:
+                conn.close()
+
+        if failure:
+            raise RuntimeError(f"scan worker failed: {failure}")
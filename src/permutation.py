@@ -0,0 +1,49 @@
+"""Seeded pseudo-random permutation of range(n) without materializing it.
+
+A 4-round Feistel network is a bijection on a power-of-two domain of at
+least n; cycle-walking (re-encrypting until the value falls below n)
+restricts it to range(n). The domain is less than 4n, so a lookup
+takes fewer than 4 encryptions on average and memory use is constant.
+"""
+import random
+
+ROUNDS = 4
+
+
+class Permutation:
+    def __init__(self, n, seed):
+        self.n = n
+        bits = max(2, (n - 1).bit_length())
+        bits += bits & 1
+        self._half = bits // 2
+        self._mask = (1 << self._half) - 1
+        rng = random.Random(seed)
+        self._keys = [rng.getrandbits(32) for _ in range(ROUNDS)]
+
+    def __len__(self):
+        return self.n
+
+    def _encrypt(self, x):
+        half, mask = self._half, self._mask
+        left, right = x >> half, x & mask
+        for key in self._keys:
+            h = ((right ^ key) * 0x45D9F3B) & 0xFFFFFFFF
+            h ^= h >> 16
+            left, right = right, left ^ (h & mask)
+        return (left << half) | right
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        x = self._encrypt(i)
+        while x >= self.n:
+            x = self._encrypt(x)
+        return x
+
+    def __iter__(self):
+        n, encrypt = self.n, self._encrypt
+        for i in range(n):
+            x = encrypt(i)
+            while x >= n:
+                x = encrypt(x)
+            yield x
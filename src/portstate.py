@@ -0,0 +1,199 @@
+"""Compact per-host port state store.
+
+A host starts sparse: a sorted array of (port << 2 | state), 4 bytes per
+scanned port. Once it holds as many ports as a full map would cost
+(4096), it becomes a PortStateMap: 2 bits per port, 16 KB per host. A
+wide scan of a few ports on many hosts therefore costs bytes per host,
+not 16 KB.
+
+States are UNSCANNED/OPEN/CLOSED/FILTERED. Membership of one state can
+be pulled out as a PortSet (an int bitmask) for fast set algebra:
+
+    store.host("10.0.0.1").ports_in(OPEN) - store.host("10.0.0.2").ports_in(OPEN)
+"""
+import re
+from array import array
+from bisect import bisect_left
+
+UNSCANNED, OPEN, CLOSED, FILTERED = range(4)
+STATE_NAMES = ("UNSCANNED", "OPEN", "CLOSED", "FILTERED")
+STATE_IDS = {name: i for i, name in enumerate(STATE_NAMES)}
+STATE_IDS["ERROR"] = UNSCANNED   # mahalliy xato - port holati noma'lum
+
+PORTS = 65536
+MAP_BYTES = PORTS // 4
+SPARSE_MAX = MAP_BYTES // 4     # 4-byte entries: shundan keyin to'liq map arzonroq
+
+# byte (4 ports) -> nibble with bit k set when port k of the byte is in state s
+_NIBBLE = [
+    bytes(sum(1 << k for k in range(4) if (b >> (2 * k)) & 3 == s) for b in range(256))
+    for s in range(4)
+]
+_NONZERO = re.compile(rb"[^\x00]")
+_popcount = getattr(int, "bit_count", lambda n: bin(n).count("1"))
+
+
+class PortSet:
+    """Immutable set of ports stored as an int (4 bits used per byte)."""
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits=0):
+        self.bits = bits
+
+    def __contains__(self, port):
+        return bool(self.bits >> ((port >> 2) * 8 + (port & 3)) & 1)
+
+    def __len__(self):
+        return _popcount(self.bits)
+
+    def __iter__(self):
+        data = self.bits.to_bytes(MAP_BYTES, "little")
+        for match in _NONZERO.finditer(data):
+            base = match.start() * 4
+            nibble = data[match.start()]
+            for k in range(4):
+                if nibble >> k & 1:
+                    yield base + k
+
+    def __and__(self, other):
+        return PortSet(self.bits & other.bits)
+
+    def __or__(self, other):
+        return PortSet(self.bits | other.bits)
+
+    def __sub__(self, other):
+        return PortSet(self.bits & ~other.bits)
+
+    def __xor__(self, other):
+        return PortSet(self.bits ^ other.bits)
+
+    def __eq__(self, other):
+        return isinstance(other, PortSet) and self.bits == other.bits
+
+    def __repr__(self):
+        return f"PortSet({list(self)})"
+
+
+class PortStateMap:
+    """States of all 65536 ports of one host."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data=None):
+        self.data = bytearray(data) if data is not None else bytearray(MAP_BYTES)
+        if len(self.data) != MAP_BYTES:
+            raise ValueError("port state map must be 16384 bytes")
+
+    def __getitem__(self, port):
+        return (self.data[port >> 2] >> ((port & 3) * 2)) & 3
+
+    def __setitem__(self, port, state):
+        shift = (port & 3) * 2
+        i = port >> 2
+        self.data[i] = (self.data[i] & ~(3 << shift)) | (state << shift)
+
+    def ports_in(self, state):
+        return PortSet(int.from_bytes(self.data.translate(_NIBBLE[state]), "little"))
+
+    def count(self, state):
+        return len(self.ports_in(state))
+
+    def to_bytes(self):
+        return bytes(self.data)
+
+
+class SparsePortStates:
+    """States of the few scanned ports of one host, same interface as
+    PortStateMap. Ports not listed are UNSCANNED."""
+
+    __slots__ = ("entries",)
+
+    def __init__(self):
+        self.entries = array("I")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, port):
+        entries = self.entries
+        i = bisect_left(entries, port << 2)
+        if i < len(entries) and entries[i] >> 2 == port:
+            return entries[i] & 3
+        return UNSCANNED
+
+    def __setitem__(self, port, state):
+        entries = self.entries
+        i = bisect_left(entries, port << 2)
+        if i < len(entries) and entries[i] >> 2 == port:
+            if state == UNSCANNED:
+                del entries[i]
+            else:
+                entries[i] = port << 2 | state
+        elif state != UNSCANNED:
+            entries.insert(i, port << 2 | state)
+
+    def ports_in(self, state):
+        data = bytearray(MAP_BYTES)
+        for entry in self.entries:
+            if entry & 3 == state:
+                port = entry >> 2
+                data[port >> 2] |= 1 << (port & 3)
+        return PortSet(int.from_bytes(data, "little"))
+
+    def count(self, state):
+        return sum(1 for entry in self.entries if entry & 3 == state)
+
+    def to_map(self):
+        states = PortStateMap()
+        for entry in self.entries:
+            states[entry >> 2] = entry & 3
+        return states
+
+
+class ScanStore:
+    """Per-host port states keyed by host, allocated on first result:
+    sparse while a host has few scanned ports, a PortStateMap after."""
+
+    def __init__(self):
+        self._hosts = {}
+
+    def record(self, host, port, status):
+        states = self._hosts.get(host)
+        if states is None:
+            states = self._hosts[host] = SparsePortStates()
+        states[port] = STATE_IDS[status]
+        if type(states) is SparsePortStates and len(states) >= SPARSE_MAX:
+            self._hosts[host] = states.to_map()
+
+    def host(self, host):
+        states = self._hosts.get(host)
+        return states if states is not None else PortStateMap()
+
+    def hosts(self):
+        return list(self._hosts)
+
+    def is_done(self, host, port):
+        states = self._hosts.get(host)
+        return states is not None and states[port] != UNSCANNED
+
+    def __len__(self):
+        return len(self._hosts)
+
+    def __contains__(self, host):
+        return host in self._hosts
+
+    def count(self, state):
+        return sum(states.count(state) for states in self._hosts.values())
+
+    def items(self, state=None):
+        """Yield (host, port, status name), optionally only one state."""
+        wanted = range(1, 4) if state is None else (state,)
+        for host, states in self._hosts.items():
+            for s in wanted:
+                for port in states.ports_in(s):
+                    yield host, port, STATE_NAMES[s]
+
+    def diff(self, a, b, state=OPEN):
+        """Ports in `state` on host a but not on host b."""
+        return self.host(a).ports_in(state) - self.host(b).ports_in(state)
@@ -0,0 +1,218 @@
+"""Opt-in instrumentation: Qt event-loop lag, per-slot timings, and
+cProfile or sampling profiles of the GUI and scanner threads.
+
+    python main.py --instrument              # lag + slot report in the scan log
+    python main.py --profile gui.prof        # cProfile, GUI + scanner thread
+    python main.py --profile gui.folded      # sampling profile, every thread
+    python cli.py 10.0.0.0/24 --profile scan.prof
+
+.prof files open with `python -m pstats` or snakeviz. .folded files hold
+collapsed stacks ("thread;outer;inner count") for flamegraph.pl or
+speedscope. Before Python 3.12 cProfile only sees threads it is enabled
+in, so the GUI covers scans started while profiling is on. The sampler reads
+sys._current_frames() and sees every thread, even mid-scan.
+"""
+import collections
+import contextlib
+import os
+import sys
+import threading
+import time
+
+from metrics import Histogram
+
+SLOTS = ("add_rows", "filter_table", "append_log", "on_progress_update", "on_stats_update",
+         "on_metrics_update", "update_status", "update_inline_status")
+HEARTBEAT_MS = 2
+SAMPLE_INTERVAL = 0.002
+SAMPLING_SUFFIXES = (".folded", ".collapsed", ".txt")
+
+
+class SlotTimes:
+    """Wall time spent in selected methods of one object."""
+
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.total = collections.Counter()
+        self.worst = collections.Counter()
+
+    def wrap(self, obj, names=SLOTS):
+        """Shadow obj.<name> with a timed wrapper. Call before signals are
+        connected: existing connections keep the unwrapped method."""
+        for name in names:
+            method = getattr(obj, name, None)
+            if method is not None:
+                setattr(obj, name, self._timed(name, method))
+
+    def _timed(self, name, method):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                spent = time.perf_counter() - started
+                self.calls[name] += 1
+                self.total[name] += spent
+                if spent > self.worst[name]:
+                    self.worst[name] = spent
+        timed.__name__ = name
+        return timed
+
+    def reset(self):
+        self.calls.clear()
+        self.total.clear()
+        self.worst.clear()
+
+    def report(self):
+        return [
+            f"{name}: {self.calls[name]} call(s), {self.total[name] * 1000:.1f} ms total, "
+            f"worst {self.worst[name] * 1000:.1f} ms"
+            for name, _ in self.total.most_common()
+        ]
+
+
+class LagMonitor:
+    """A HEARTBEAT_MS QTimer; how late each tick fires is event-loop lag."""
+
+    def __init__(self, parent=None, interval_ms=HEARTBEAT_MS):
+        from PyQt5.QtCore import QTimer
+
+        self.interval = interval_ms / 1000
+        self.lag = Histogram()
+        self.worst = 0.0
+        self._last = None
+        self._timer = QTimer(parent)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self):
+        self._last = time.perf_counter()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def reset(self):
+        self.lag = Histogram()
+        self.worst = 0.0
+        self._last = time.perf_counter()
+
+    def _tick(self):
+        now = time.perf_counter()
+        lag = max(0.0, now - self._last - self.interval)
+        self._last = now
+        self.lag.observe(lag)
+        if lag > self.worst:
+            self.worst = lag
+
+    def report(self):
+        if not self.lag.count:
+            return "event-loop lag: no samples"
+        return (f"event-loop lag: p50 {self.lag.quantile(0.5) * 1000:.1f} ms, "
+                f"p99 {self.lag.quantile(0.99) * 1000:.1f} ms, worst {self.worst * 1000:.1f} ms "
+                f"over {self.lag.count} ticks")
+
+
+class Profiler:
+    """Profile to `path`: cProfile for .prof/.pstats, else a sampling
+    profile of collapsed stacks. start() profiles the calling thread (or,
+    sampling, every thread); wrap other threads' work in thread(name)."""
+
+    def __init__(self, path, interval=SAMPLE_INTERVAL):
+        self.path = path
+        self.sampling = path.endswith(SAMPLING_SUFFIXES)
+        self.interval = interval
+        self.active = False
+        self._lock = threading.Lock()
+        self._names = {}
+        self._main = None
+        self._stats = None
+        self._stacks = collections.Counter()
+        self._sampler = None
+
+    def start(self):
+        self.active = True
+        self._names[threading.get_ident()] = threading.current_thread().name
+        if self.sampling:
+            self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+            self._sampler.start()
+        else:
+            import cProfile
+
+            self._main = cProfile.Profile()
+            self._main.enable()
+
+    @contextlib.contextmanager
+    def thread(self, name):
+        """Profile the body in the current thread as `name`."""
+        self._names[threading.get_ident()] = name
+        if self.sampling or not self.active:
+            yield
+            return
+        import cProfile
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 3.12+: cProfile sys.monitoring orqali barcha threadlarni ko'radi
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._add(profile)
+                if not self.active:
+                    self._dump()    # profiling to'xtatilgandan keyin tugagan thread
+
+    def stop(self):
+        """Write the profile; returns its path."""
+        self.active = False
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        with self._lock:
+            if self._main is not None:
+                self._main.disable()
+                self._add(self._main)
+                self._main = None
+            self._dump()
+        return self.path
+
+    def _add(self, profile):
+        if self._stats is None:
+            import pstats
+
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+
+    def _dump(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        if self.sampling:
+            with open(self.path, "w", encoding="utf-8") as file:
+                for stack, count in self._stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+        elif self._stats is not None:
+            self._stats.dump_stats(self.path)
+
+    def _sample(self):
+        own = threading.get_ident()
+        while self.active:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            names.update(self._names)
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+                                 f"{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self._stacks[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
@@ -0,0 +1,114 @@
+"""Concurrent, cached host name resolution.
+
+getaddrinfo runs on a small thread pool so a block of host names resolves
+in parallel, and the engine submits the next block while the current one
+is being probed. Answers are cached in-process: getaddrinfo does not
+expose record TTLs, so positive answers live for `ttl` seconds (the
+system resolver/nscd still honours the real TTL underneath) and
+failures for NEGATIVE_TTL.
+"""
+import ipaddress
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_WORKERS = 16
+DEFAULT_TTL = 300.0
+NEGATIVE_TTL = 30.0
+MAX_CACHE = 65536
+FAMILIES = {"any": socket.AF_UNSPEC, "4": socket.AF_INET, "6": socket.AF_INET6}
+
+
+def is_address(host):
+    try:
+        ipaddress.ip_address(host.split("%", 1)[0])
+    except ValueError:
+        return False
+    return True
+
+
+class Resolver:
+    """`family` is "any", "4" or "6". By default the first address of each
+    family is scanned (so dual-stack hosts are covered over IPv4 and
+    IPv6); `all_addresses` scans every address a name resolves to."""
+
+    def __init__(self, family="any", all_addresses=False, workers=DEFAULT_WORKERS,
+                 ttl=DEFAULT_TTL):
+        if family not in FAMILIES:
+            raise ValueError(f"address family must be one of {', '.join(FAMILIES)}")
+        self.family = family
+        self.all_addresses = all_addresses
+        self.workers = workers
+        self.ttl = ttl
+        self._cache = OrderedDict()     # host -> (expires, addresses or OSError)
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def __getstate__(self):
+        return {"family": self.family, "all_addresses": self.all_addresses,
+                "workers": self.workers, "ttl": self.ttl}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _lookup(self, host):
+        infos = socket.getaddrinfo(host, None, FAMILIES[self.family], socket.SOCK_STREAM)
+        addresses, families = [], set()
+        for family, _, _, _, sockaddr in infos:
+            ip = sockaddr[0]
+            if ip in addresses or (not self.all_addresses and family in families):
+                continue
+            families.add(family)
+            addresses.append(ip)
+        if not addresses:
+            raise socket.gaierror(f"no {self.family} address for {host}")
+        return addresses
+
+    def resolve(self, host):
+        """Addresses to scan for `host` (blocking, cached); raises OSError."""
+        if is_address(host):
+            return [host]
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(host)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(host)
+                result = entry[1]
+            else:
+                entry = None
+        if entry is None:
+            try:
+                result = self._lookup(host)
+                expires = now + self.ttl
+            except OSError as e:
+                result = e
+                expires = now + NEGATIVE_TTL
+            with self._lock:
+                self._cache[host] = (expires, result)
+                if len(self._cache) > MAX_CACHE:
+                    self._cache.popitem(last=False)
+        if isinstance(result, OSError):
+            raise result
+        return list(result)
+
+    def submit(self, hosts):
+        """Start resolving `hosts` in the background; returns [(host, future)]
+        in the same order. Address literals complete immediately."""
+        pending = []
+        for host in hosts:
+            if is_address(host):
+                future = Future()
+                future.set_result([host])
+            else:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="resolver")
+                future = self._pool.submit(self.resolve, host)
+            pending.append((host, future))
+        return pending
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
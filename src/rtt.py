@@ -0,0 +1,117 @@
+"""Per-host probe timeouts derived from measured connect RTT.
+
+Uses the TCP retransmission-timer estimator (RFC 6298, as nmap does):
+a smoothed RTT and RTT variance per host, timeout = srtt + 4 * rttvar,
+clamped to [floor, ceiling]. A host with no samples yet gets the larger
+of `initial` and the scan-wide estimate, so a slow WAN host is not probed
+with the timeout learnt from fast LAN hosts. Until it answers once, its
+timeout doubles per timeout interval in which probes expire (the RFC 6298
+backoff is per timer, not per outstanding probe), up to `silent_ceiling`.
+That defaults to `initial`, so a fully filtered host is never probed more
+slowly than a fixed timeout of the same value.
+"""
+import time
+from collections import OrderedDict
+
+DEFAULT_FLOOR = 0.05
+DEFAULT_CEILING = 3.0
+
+ALPHA = 1 / 8
+BETA = 1 / 4
+# blok bo'yicha skan qilinadi - eski hostlarni unutsa bo'ladi
+MAX_HOSTS = 4096
+
+
+class FixedTimeout:
+    def __init__(self, timeout: float):
+        self.initial = timeout
+
+    def timeout(self, host):
+        return self.initial
+
+    def observe(self, host, rtt):
+        pass
+
+    def expired(self, host):
+        pass
+
+
+class _Estimator:
+    __slots__ = ("srtt", "rttvar")
+
+    def __init__(self, rtt):
+        self.srtt = rtt
+        self.rttvar = rtt / 2
+
+    def update(self, rtt):
+        self.rttvar += BETA * (abs(self.srtt - rtt) - self.rttvar)
+        self.srtt += ALPHA * (rtt - self.srtt)
+
+    def rto(self):
+        return self.srtt + 4 * self.rttvar
+
+
+class AdaptiveTimeout:
+    def __init__(self, initial: float = 1.0, floor: float = DEFAULT_FLOOR,
+                 ceiling: float = DEFAULT_CEILING, silent_ceiling: float = None):
+        if floor > ceiling:
+            raise ValueError("timeout floor is above ceiling")
+        self.initial = initial
+        self.floor = floor
+        self.ceiling = ceiling
+        self.silent_ceiling = self._clamp(initial if silent_ceiling is None else silent_ceiling)
+        self._global = None
+        self._hosts = OrderedDict()
+        self._backoff = OrderedDict()   # host -> (timeout, end of its interval), no samples yet
+
+    def _clamp(self, value):
+        return min(self.ceiling, max(self.floor, value))
+
+    def timeout(self, host):
+        est = self._hosts.get(host)
+        if est is not None:
+            return self._clamp(est.rto())
+        if self._global is None:
+            base = self._clamp(self.initial)
+        else:
+            base = self._clamp(max(self.initial, self._global.rto()))
+        backoff = self._backoff.get(host)
+        return max(base, backoff[0]) if backoff is not None else base
+
+    def expired(self, host, now=None):
+        """A probe of `host` timed out; back off while it has no samples,
+        once per timeout interval: probes in flight with it expire together."""
+        if host in self._hosts:
+            return
+        now = time.monotonic() if now is None else now
+        backoff = self._backoff.get(host)
+        if backoff is not None and now < backoff[1]:
+            return
+        current = self.timeout(host)
+        timeout = min(self.silent_ceiling, current * 2)
+        if timeout <= current:
+            return
+        self._backoff[host] = (timeout, now + timeout)
+        self._backoff.move_to_end(host)
+        if len(self._backoff) > MAX_HOSTS:
+            self._backoff.popitem(last=False)
+
+    def observe(self, host, rtt):
+        self._backoff.pop(host, None)
+        est = self._hosts.get(host)
+        if est is None:
+            self._hosts[host] = _Estimator(rtt)
+            if len(self._hosts) > MAX_HOSTS:
+                self._hosts.popitem(last=False)
+        else:
+            est.update(rtt)
+            self._hosts.move_to_end(host)
+
+        if self._global is None:
+            self._global = _Estimator(rtt)
+        else:
+            self._global.update(rtt)
+
+    def srtt(self, host):
+        est = self._hosts.get(host)
+        return est.srtt if est else None
@@ -0,0 +1,149 @@
+"""Scan log: a fixed-size ring buffer of leveled records.
+
+Adding a record stores (time, level, message) in preallocated slots; no
+formatting happens until a row is actually drawn (models.LogModel) or
+written to disk. Records below the buffer's level are dropped before any
+work is done, and callers building per-port messages check wants(DEBUG)
+first, so debug lines cost one comparison unless they are enabled. An
+optional RotatingLogWriter appends records to a file from a background
+thread.
+"""
+import os
+import queue
+import sys
+import threading
+import time
+
+DEBUG, INFO, OPEN, ERROR = 10, 20, 25, 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", OPEN: "OPEN", ERROR: "ERROR"}
+CAPACITY = 5000
+MAX_BYTES = 1 << 20
+BACKUPS = 3
+
+
+def format_record(stamp, message):
+    return f"[{time.strftime('%H:%M:%S', time.localtime(stamp))}] {message}"
+
+
+class LogBuffer:
+    """The newest `capacity` records at or above `level`."""
+
+    def __init__(self, capacity=CAPACITY, level=INFO, writer=None):
+        self.capacity = capacity
+        self.level = level
+        self.writer = writer
+        self.seq = 0        # records ever added; views compare it to skip redraws
+        self._times = [0.0] * capacity
+        self._levels = bytearray(capacity)
+        self._messages = [""] * capacity
+
+    def __len__(self):
+        return min(self.seq, self.capacity)
+
+    def wants(self, level):
+        return level >= self.level or (self.writer is not None and level >= self.writer.level)
+
+    def add(self, level, *messages):
+        writer = self.writer
+        to_file = writer is not None and level >= writer.level
+        if level < self.level and not to_file:
+            return
+        now = time.time()
+        if to_file:
+            writer.put(now, level, messages)
+        if level < self.level:
+            return
+        capacity = self.capacity
+        for message in messages:
+            slot = self.seq % capacity
+            self._times[slot] = now
+            self._levels[slot] = level
+            self._messages[slot] = message
+            self.seq += 1
+
+    def records(self, min_level=DEBUG):
+        """[(time, level, message)], oldest first."""
+        count = len(self)
+        start = self.seq - count
+        capacity = self.capacity
+        times, levels, messages = self._times, self._levels, self._messages
+        rows = []
+        for n in range(start, start + count):
+            slot = n % capacity
+            if levels[slot] >= min_level:
+                rows.append((times[slot], levels[slot], messages[slot]))
+        return rows
+
+    def clear(self):
+        self.seq = 0
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class RotatingLogWriter:
+    """Appends records to `path` on a background thread; when the file
+    passes `max_bytes` it becomes path.1 (path.1 -> path.2, ...). With
+    `path` None records go to stderr, unrotated."""
+
+    def __init__(self, path, level=INFO, max_bytes=MAX_BYTES, backups=BACKUPS):
+        self.path = path
+        self.level = level
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.error = None
+        if path is None:
+            self._file = sys.stderr
+        else:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, stamp, level, messages):
+        if self.error is None:
+            self._queue.put((stamp, level, messages))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while True:
+                item = self._queue.get()
+                batch = [item]
+                while item is not None and not self._queue.empty():
+                    item = self._queue.get()
+                    batch.append(item)
+                lines = []
+                for record in batch:
+                    if record is None:
+                        break
+                    stamp, level, messages = record
+                    day = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stamp))
+                    lines.extend(f"{day} {LEVEL_NAMES.get(level, level)} {m}\n" for m in messages)
+                self._file.write("".join(lines))
+                self._file.flush()
+                if self.path is not None and self._file.tell() >= self.max_bytes:
+                    self._rotate()
+                if batch[-1] is None:
+                    break
+        except OSError as e:
+            self.error = e      # fayl yozilmasa ham skan to'xtamaydi
+        finally:
+            if self.path is not None:
+                self._file.close()
+
+    def _rotate(self):
+        self._file.close()
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"):
+                os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8")
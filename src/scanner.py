@@ -1,71 +1,320 @@
-import socket
+import itertools
+import sqlite3
+import time
+
 from PyQt5.QtCore import QThread, pyqtSignal
 
-COMMON_SERVICES = {
-    21: "FTP",
-    22: "SSH",
-    23: "TELNET",
-    25: "SMTP",
-    53: "DNS",
-    80: "HTTP",
-    110: "POP3",
-    143: "IMAP",
-    443: "HTTPS",
-    3306: "MYSQL",
-    3389: "RDP",
-}
+from engine import ScanEngine, parse_ports
+from exporters import open_exporter
+from history import ScanHistory
+from metrics import summary
+from parallel import ParallelScanEngine
+from portstate import OPEN, ScanStore
+from services import service_name
+
+# GUI ga signal ko'pi bilan 20 Hz
+FLUSH_INTERVAL = 0.05
+EXPORT_BATCH = 10000
 
 
 class ScannerThread(QThread):
-    found = pyqtSignal(int, str, str)   # port, status, service
-    scanning = pyqtSignal(int)          # current port
+    found = pyqtSignal(list)            # [(host, port, status, service), ...]
+    scanning = pyqtSignal(int)          # last probed port (throttled)
     progress = pyqtSignal(int)          # 0..100
+    stats = pyqtSignal(int, float)      # in-flight window, probes/sec
+    metrics = pyqtSignal(dict)          # metrics.summary(): ETA, RTT quantiles, timeouts
     error = pyqtSignal(str)
+    notice = pyqtSignal(str)            # non-fatal messages for the log
     finished = pyqtSignal()
 
-    def __init__(self, target: str, start_port: int, end_port: int, timeout: float = 0.5):
+    def __init__(self, target, port_spec: str, timeout=0.5, concurrency=500, workers: int = 1,
+                 checkpoint=None, history_path=None, ttl=None, export_path=None,
+                 export_all=False, seed=None, banners=None, resolver=None,
+                 discovery=None, profiler=None):
         super().__init__()
         self.target = target
-        self.start_port = start_port
-        self.end_port = end_port
+        self.port_spec = port_spec
         self.timeout = timeout
-        self._stop = False
+        self.concurrency = concurrency
+        self.checkpoint = checkpoint
+        self.history_path = history_path
+        self.ttl = ttl
+        self.export_path = export_path
+        self.export_all = export_all
+        self.profiler = profiler
+        self.exporter = None
+        self._export_rows = []
+        self._record = None
+        self.history = None
+        self.scan_id = None
+        self._history_rows = []
+        self.store = checkpoint.store if checkpoint else ScanStore()
+        # incremental: cache'dagi yangi natijalar store'ga run() da yoziladi
+        done = self.store if checkpoint or ttl else None
+        ports = parse_ports(port_spec)
+        if workers > 1:
+            self.engine = ParallelScanEngine(target, ports, timeout, concurrency, workers, done,
+                                             seed, banners, resolver, discovery)
+        else:
+            self.engine = ScanEngine(target, ports, timeout, concurrency, done, seed, banners,
+                                     resolver, discovery)
 
     def stop(self):
-        self._stop = True
+        self.engine.cancel()
 
     def run(self):
         try:
-            ip = socket.gethostbyname(self.target)
-        except Exception as e:
-            self.error.emit(f"Target resolve bo‘lmadi: {e}")
-            self.finished.emit()
+            if self.profiler is None:
+                self._run()
+                return
+            with self.profiler.thread("scanner"):
+                self._run()
+        finally:
+            self.finished.emit()    # GUI "Scanning" holatida qolib ketmasin
+
+    def _run(self):
+        engine = self.engine
+        self._record = self.checkpoint.add if self.checkpoint else self.store.record
+
+        resumed = [
+            (host, port, status, service_name(port))
+            for host, port, status in self.store.items(OPEN)
+        ]
+        if resumed:
+            self.found.emit(resumed)
+
+        self._open_export()
+        if self.exporter:
+            if self.export_all:
+                resumed = [
+                    (host, port, status, service_name(port) if status == "OPEN" else "")
+                    for host, port, status in self.store.items()
+                ]
+            self._export_rows.extend(resumed)
+        self._open_history()
+        if self.ttl:
+            self._load_cached()
+
+        batch = []
+        last_port = None
+        next_flush = 0.0
+
+        try:
+            for result in engine:
+                last_port = result.port
+                self._record(result.host, result.port, result.status)
+                if self.history:
+                    self._history_rows.append(result)
+                if self.exporter and (self.export_all or result.status == "OPEN"):
+                    self._export_rows.append(result)
+                if result.status == "OPEN":
+                    batch.append((result.host, result.port, result.status, result.service))
+
+                now = time.monotonic()
+                if now >= next_flush:
+                    next_flush = now + FLUSH_INTERVAL
+                    self._flush(batch, last_port)
+                    batch = []
+        except (RuntimeError, OSError, ValueError) as e:
+            self.error.emit(str(e))
+            engine.cancel()
+
+        self._flush(batch, last_port)
+        # Stop oxirgi portdan keyin bosilgan bo'lsa skan baribir to'liq
+        stopped = engine.interrupted
+        if self.checkpoint:
+            self._write_checkpoint(finish=not stopped)
+        if self.checkpoint:
+            try:
+                self.checkpoint.close()
+            except OSError as e:
+                self.notice.emit(f"Checkpoint write failed: {e}")
+            self.checkpoint = None
+        self._close_history("stopped" if stopped else "completed")
+        self._close_export(partial=stopped)
+        if stopped:
+            self._report_unscanned()
+
+        stats = engine.socket_stats
+        if stats.get("local_errors") or stats.get("window_capped"):
+            self.notice.emit(
+                f"Sockets: fd limit {stats['fd_limit']}, {stats.get('local_errors', 0)} local "
+                f"error(s), {stats.get('retries', 0)} retried, {stats.get('gave_up', 0)} given up"
+            )
+        if engine.dead_hosts:
+            self.notice.emit(f"Discovery: {engine.dead_hosts} host(s) down, skipped")
+        if engine.failed_hosts:
+            failed = list(engine.failed_hosts.items())
+            details = "; ".join(f"{host}: {err}" for host, err in failed[:5])
+            more = f" (+{len(failed) - 5})" if len(failed) > 5 else ""
+            self.error.emit(f"Target resolve bo‘lmadi: {details}{more}")
+
+    def _open_history(self):
+        if not self.history_path:
+            return
+        try:
+            self.history = ScanHistory(self.history_path)
+            self.scan_id = self.history.begin_scan(self.engine.target, self.port_spec)
+            # resume: tarixdagi skan to'liq bo'lsin
+            self.history.add_results(self.scan_id, (
+                (host, port, status, service_name(port) if status == "OPEN" else "")
+                for host, port, status in self.store.items()
+            ))
+        except (sqlite3.Error, OSError) as e:
+            self.history = None
+            self.notice.emit(f"History disabled: {e}")
+
+    def _load_cached(self):
+        """Merge still-fresh results from earlier scans so only stale ports
+        are probed."""
+        if not self.history:
+            self.notice.emit("Incremental scan needs history; probing every port")
+            return
+        store = self.store
+        cached = []
+        try:
+            for host, port, status, service, checked_at in self.history.fresh_results(
+                    self.engine.target, self.engine.ports, self.ttl):
+                if not store.is_done(host, port):
+                    store.record(host, port, status)
+                    cached.append((host, port, status, service, checked_at))
+            self.history.add_cached(self.scan_id, cached)
+        except sqlite3.Error as e:
+            self.notice.emit(f"History read failed: {e}")
+            return
+
+        opened = [row[:4] for row in cached if row[2] == "OPEN"]
+        if opened:
+            self.found.emit(opened)
+        if self.exporter:
+            self._export_rows.extend(row[:4] for row in cached
+                                     if self.export_all or row[2] == "OPEN")
+        self.notice.emit(f"Incremental: {len(cached)} port(s) still fresh, not re-probed")
+
+    def _open_export(self):
+        if not self.export_path:
+            return
+        try:
+            self.exporter = open_exporter(self.export_path)
+        except (OSError, ValueError) as e:
+            self.notice.emit(f"Export disabled: {e}")
+
+    def _write_export(self):
+        rows, self._export_rows = self._export_rows, []
+        try:
+            self.exporter.write_rows(rows)
+        except OSError as e:
+            self.notice.emit(f"Export write failed: {e}")
+            self.exporter = None
+
+    def _close_export(self, partial=False):
+        if not self.exporter:
             return
+        self._write_export()
+        if self.exporter:
+            try:
+                self.exporter.close()
+                note = " (partial: scan stopped)" if partial else ""
+                self.notice.emit(
+                    f"Exported {self.exporter.rows} row(s) to {self.export_path}{note}"
+                )
+            except OSError as e:
+                self.notice.emit(f"Export write failed: {e}")
+            self.exporter = None
 
-        total = max(1, (self.end_port - self.start_port + 1))
-        scanned = 0
+    def _report_unscanned(self):
+        engine = self.engine
+        aborted = engine.aborted
+        latency = (f" in {engine.stop_latency * 1000:.0f} ms"
+                   if engine.stop_latency is not None else "")
+        self.notice.emit(
+            f"Stopped{latency}: {engine.unscanned:,} of {engine.total:,} port(s) not scanned, "
+            f"{len(aborted):,} of them aborted in flight; resume probes them again"
+        )
+        lines = list(engine.unscanned_lines())
+        if lines:
+            self.notice.emit("Unscanned (target, ports):\n" + "\n".join(lines))
 
-        for port in range(self.start_port, self.end_port + 1):
-            if self._stop:
-                break
-
-            self.scanning.emit(port)
-            scanned += 1
-            pct = int((scanned / total) * 100)
-            self.progress.emit(pct)
+    def _write_checkpoint(self, finish=False):
+        try:
+            if finish:
+                self.checkpoint.finish()
+            else:
+                self.checkpoint.flush()
+        except OSError as e:
+            # masalan disk to'lgan: skan davom etadi, natijalar faqat xotirada
+            self.notice.emit(f"Checkpoint write failed, resume disabled: {e}")
+            try:
+                self.checkpoint.close()
+            except OSError:
+                pass
+            self.checkpoint = None
+            self._record = self.store.record
 
+    def _close_history(self, status):
+        if not self.history:
+            return
+        try:
+            self._save_history_rows()
+            self.history.finish_scan(self.scan_id, status)
+        except sqlite3.Error as e:
+            self.notice.emit(f"History write failed: {e}")
+        finally:
+            self.history.close()
+            self.history = None
+
+    def _save_history_rows(self):
+        if self._history_rows:
+            rows, self._history_rows = self._history_rows, []
+            self.history.add_results(self.scan_id, rows)
+
+    def _flush(self, batch, last_port):
+        if self.checkpoint:
+            self._write_checkpoint()
+        if self.history:
             try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(self.timeout)
-                res = sock.connect_ex((ip, port))
-                sock.close()
+                self._save_history_rows()
+            except sqlite3.Error as e:
+                self.notice.emit(f"History write failed: {e}")
+                self.history.close()
+                self.history = None
+        if self.exporter and self._export_rows:
+            self._write_export()
+        if batch:
+            self.found.emit(batch)
+        if last_port is not None:
+            self.scanning.emit(last_port)
+        total = max(1, self.engine.total)     # ko'p manzilli hostlarda o'sadi
+        self.progress.emit(min(100, int((self.engine.scanned / total) * 100)))
+        self.stats.emit(self.engine.window, self.engine.rate)
+        self.engine.throughput.update(self.engine.scanned)
+        self.metrics.emit(summary(self.engine))
+
 
-                if res == 0:
-                    service = COMMON_SERVICES.get(port, "")
-                    self.found.emit(port, "OPEN", service)
+class ExportThread(QThread):
+    """Writes `rows` (an iterable of (host, port, status, service)) to `path`
+    off the GUI thread, EXPORT_BATCH rows at a time. The iterable is
+    consumed here, so row sources that page from SQLite must open their
+    connection lazily (models.HistoryModel.rows() does)."""
 
-            except Exception:
-                # scan davom etsin, bitta port xato bo‘lsa ham
-                continue
+    exported = pyqtSignal(int)          # rows written
+    error = pyqtSignal(str)
 
-        self.finished.emit()
+    def __init__(self, rows, path, parent=None):
+        super().__init__(parent)
+        self.rows = rows
+        self.path = path
+
+    def run(self):
+        rows = iter(self.rows)
+        try:
+            with open_exporter(self.path) as exporter:
+                while True:
+                    batch = list(itertools.islice(rows, EXPORT_BATCH))
+                    if not batch:
+                        break
+                    exporter.write_rows(batch)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            self.error.emit(f"Export failed: {e}")
+            return
+        self.exported.emit(exporter.rows)
@@ -0,0 +1,222 @@
+"""Port -> service name and most-often-open port order.
+
+The table is precompiled into data/services.bin and memory-mapped on the
+first lookup, so importing this module costs nothing at startup and a
+lookup is two struct reads into the map.
+
+data/services.bin is generated, not edited: it is built from the IANA
+service-name registry committed next to it as
+data/service-names-port-numbers.csv (a snapshot of
+https://www.iana.org/assignments/service-names-port-numbers/service-names-port-numbers.csv,
+trimmed to its first four columns). The registry has names but no open
+frequencies, so the ranking is only RANKED_PORTS' order; build from
+nmap-services to rank by its measured frequencies instead. Past the
+ranked ports the order goes on with named ports, then the rest, each in
+port order, so top(n) works for any n. Frequencies only decide the order
+at build time and are not stored.
+
+    python services.py build                                  # the IANA csv
+    python services.py build /usr/share/nmap/nmap-services    # or /etc/services
+    python services.py lookup 22 80 3389
+    python services.py top 20
+
+File layout (little-endian):
+
+    MAGIC | u32 ranked port count | u32 blob size
+    u32[65537]  name offsets into the blob (name of p = blob[off[p]:off[p+1]])
+    u16[65536]  ranked ports most often open first, then named ports, then the rest
+    blob        upper-case service names, utf-8
+"""
+import mmap
+import os
+import struct
+import sys
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DATA_PATH = os.path.join(DATA_DIR, "services.bin")
+REGISTRY_PATH = os.path.join(DATA_DIR, "service-names-port-numbers.csv")
+MAGIC = b"PSSVC2\n\0"
+PORTS = 65536
+
+_HEADER = struct.Struct("<8sII")
+_U32 = struct.Struct("<I")
+_U16 = struct.Struct("<H")
+_OFFSETS = _HEADER.size
+_ORDER = _OFFSETS + (PORTS + 1) * _U32.size
+_BLOB = _ORDER + PORTS * _U16.size
+
+# Qisqa, tanish nomlar (nmap/IANA nomlari o'rniga)
+ALIASES = {
+    53: "DNS",
+    443: "HTTPS",
+    3389: "RDP",
+}
+
+# nmap-services'dagi eng ko'p ochiq TCP portlar tartibi. Chastota
+# ma'lumoti bo'lmagan manba (IANA, /etc/services) uchun tartib sifatida.
+RANKED_PORTS = (
+    80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080,
+    1723, 111, 995, 993, 5900, 1025, 587, 8888, 199, 1720, 465, 548, 113, 81,
+    6001, 10000, 514, 5060, 179, 1026, 2000, 8443, 8000, 32768, 554, 26, 1433,
+    49152, 2001, 515, 8008, 49154, 1027, 5666, 646, 5000, 5631, 631, 49153,
+    8081, 2049, 88, 79, 5800, 106, 2121, 1110, 49155, 6000, 513, 990, 5357,
+    427, 49156, 543, 544, 5101, 144, 7, 389, 8009, 3128, 444, 9999, 5009,
+    7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051, 6646, 49157, 1028,
+    873, 1755, 2717, 4899, 9100, 119, 37,
+)
+
+
+class ServiceIndex:
+    def __init__(self, path=DATA_PATH):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.ranked, blob_size = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or len(self._map) != _BLOB + blob_size:
+            raise ValueError(f"not a service index: {path}")
+        self._names = {}
+
+    def name(self, port):
+        name = self._names.get(port)
+        if name is None:
+            start = _U32.unpack_from(self._map, _OFFSETS + port * 4)[0]
+            end = _U32.unpack_from(self._map, _OFFSETS + port * 4 + 4)[0]
+            name = self._names[port] = self._map[_BLOB + start:_BLOB + end].decode("utf-8")
+        return name
+
+    def top(self, n):
+        """The n ports most likely to be open, most likely first. Only the
+        first `ranked` are ordered by how often they are open."""
+        n = max(0, min(n, PORTS - 1))
+        return list(struct.unpack_from(f"<{n}H", self._map, _ORDER))
+
+
+_index = None
+
+
+def index():
+    global _index
+    if _index is None:
+        _index = ServiceIndex()
+    return _index
+
+
+def service_name(port):
+    return index().name(port)
+
+
+def top_ports(n):
+    return index().top(n)
+
+
+def parse_services(lines):
+    """(names, frequencies) for tcp ports from nmap-services or /etc/services
+    lines. nmap-services has the open frequency in the third column."""
+    names, freqs = {}, {}
+    for line in lines:
+        fields = line.split("#", 1)[0].split()
+        if len(fields) < 2 or not fields[1].endswith("/tcp"):
+            continue
+        try:
+            port = int(fields[1][:-4])
+        except ValueError:
+            continue
+        if not 0 < port < PORTS:
+            continue
+        freq = 0.0
+        if len(fields) > 2:
+            try:
+                freq = float(fields[2])
+            except ValueError:
+                pass    # /etc/services: aliases
+        if fields[0] == "unknown" or (port in names and freqs.get(port, 0) >= freq):
+            continue
+        names[port] = fields[0]
+        freqs[port] = freq
+    return names, freqs
+
+
+def parse_registry(file):
+    """(names, frequencies) for tcp ports from the IANA service-name registry
+    csv. Only the name, port and protocol columns are read, so both the full
+    registry and the trimmed copy in data/ work. No frequencies."""
+    import csv
+
+    names = {}
+    for row in csv.DictReader(file):
+        name = (row.get("Service Name") or "").strip()
+        if not name or (row.get("Transport Protocol") or "").strip() != "tcp":
+            continue
+        first, _, last = (row.get("Port Number") or "").strip().partition("-")
+        try:
+            first = int(first)
+            last = int(last) if last else first
+        except ValueError:
+            continue
+        for port in range(max(first, 1), min(last, PORTS - 1) + 1):
+            names.setdefault(port, name)
+    return names, dict.fromkeys(names, 0.0)
+
+
+def build(sources=(REGISTRY_PATH,), path=DATA_PATH):
+    names, freqs = {}, {}
+    for source in sources:
+        with open(source, encoding="utf-8", errors="replace", newline="") as file:
+            if source.endswith(".csv"):
+                src_names, src_freqs = parse_registry(file)
+            else:
+                src_names, src_freqs = parse_services(file)
+        for port, name in src_names.items():
+            names.setdefault(port, name)
+            freqs[port] = max(freqs.get(port, 0.0), src_freqs[port])
+    for port, name in ALIASES.items():
+        names[port] = name
+
+    blob = bytearray()
+    offsets = []
+    for port in range(PORTS):
+        offsets.append(len(blob))
+        blob += names.get(port, "").upper().encode("utf-8")
+    offsets.append(len(blob))
+
+    if any(freqs.values()):
+        order = sorted(range(1, PORTS), key=lambda p: (-freqs.get(p, 0.0), p not in names, p))
+        ranked = sum(1 for p in order if freqs.get(p, 0.0) > 0)
+    else:
+        # chastota yo'q: faqat RANKED_PORTS tartibi, o'lchov o'ylab topilmaydi
+        rank = {port: i for i, port in enumerate(RANKED_PORTS)}
+        order = sorted(range(1, PORTS), key=lambda p: (rank.get(p, len(rank)), p not in names, p))
+        ranked = len(rank)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, ranked, len(blob)))
+        file.write(struct.pack(f"<{PORTS + 1}I", *offsets))
+        file.write(struct.pack(f"<{PORTS}H", *order, 0))
+        file.write(blob)
+    return len(names), ranked
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in ("build", "lookup", "top"):
+        print("usage: python services.py build SOURCE... | lookup PORT... | top N",
+              file=sys.stderr)
+        return 2
+    command, args = argv[0], argv[1:]
+    try:
+        if command == "build":
+            named, ranked = build(args or [REGISTRY_PATH])
+            print(f"{named} named ports, {ranked} ranked -> {DATA_PATH}")
+        elif command == "lookup":
+            for port in map(int, args):
+                print(f"{port}\t{service_name(port)}")
+        else:
+            print(",".join(map(str, top_ports(int(args[0]) if args else 100))))
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Target specs: hosts, CIDR blocks, dash ranges and @files, expanded lazily.
+
+    "scanme.nmap.org"              single host
+    "10.0.0.0/16"                  CIDR block (network/broadcast skipped)
+    "10.0.0.1-10.0.0.50"           address range
+    "10.0.0.1-50"                  last-octet range
+    "2001:db8::/120"               IPv6 CIDR block
+    "@targets.txt"                 file with one spec per line, '#' comments
+
+Several specs may be combined with commas or whitespace. Nothing is
+materialized: iterating a TargetSpec yields one host string at a time,
+so a /8 costs the same memory as a single host. @files are read once up
+front to check every line and count hosts, then again as they are scanned.
+"""
+import ipaddress
+import os
+from itertools import islice
+
+HOST_BLOCK = 256
+
+
+def _split(spec):
+    return spec.replace(",", " ").split()
+
+
+def _parse_item(item):
+    """Return (iter_factory, count) for one spec item; raises ValueError."""
+    if item.startswith("@"):
+        path = item[1:]
+        if not os.path.isfile(path):
+            raise ValueError(f"target file not found: {path}")
+        return _file_hosts(path), _check_file(path)
+
+    if "/" in item:
+        try:
+            net = ipaddress.ip_network(item, strict=False)
+        except ValueError:
+            raise ValueError(f"bad CIDR block: {item!r}") from None
+        if net.num_addresses <= 2:
+            return (lambda: (str(a) for a in net)), net.num_addresses
+        # IPv6 hosts() faqat subnet-router anycast manzilini tashlab ketadi
+        skipped = 2 if net.version == 4 else 1
+        return (lambda: (str(a) for a in net.hosts())), net.num_addresses - skipped
+
+    first, sep, last = item.partition("-")
+    if sep:
+        try:
+            lo = ipaddress.IPv4Address(first)
+            if "." in last:
+                hi = ipaddress.IPv4Address(last)
+            elif last.isdigit() and int(last) <= 255:
+                hi = ipaddress.IPv4Address((int(lo) & ~0xFF) | int(last))
+            else:
+                raise ValueError(last)
+        except ValueError:
+            # "my-host.example" kabi nomlar
+            return (lambda: iter((item,))), 1
+        if hi < lo:
+            raise ValueError(f"empty address range: {item!r}")
+        start, end = int(lo), int(hi)
+        return (lambda: (str(ipaddress.IPv4Address(i)) for i in range(start, end + 1))), end - start + 1
+
+    return (lambda: iter((item,))), 1
+
+
+def _last_ipv4(item):
+    """Last host of an IPv4 CIDR block or range item, else None."""
+    try:
+        if "/" in item:
+            net = ipaddress.ip_network(item, strict=False)
+            if net.version != 4:
+                return None
+            last = net.broadcast_address if net.num_addresses <= 2 else net.broadcast_address - 1
+            return str(last)
+        first, sep, last = item.partition("-")
+        if not sep:
+            return None
+        lo = ipaddress.IPv4Address(first)
+        if "." in last:
+            return str(ipaddress.IPv4Address(last))
+        return str(ipaddress.IPv4Address((int(lo) & ~0xFF) | int(last)))
+    except ValueError:
+        return None
+
+
+def _file_items(path):
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            for item in _split(line.split("#", 1)[0]):
+                yield number, item
+
+
+def _check_file(path):
+    """Parse every item of a target file up front, so a bad line is
+    reported before the scan starts; returns the host count."""
+    count = 0
+    try:
+        for number, item in _file_items(path):
+            try:
+                _, hosts = _parse_item(item)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: {e}") from None
+            count += hosts
+    except OSError as e:
+        raise ValueError(f"cannot read target file {path}: {e.strerror}") from None
+    except UnicodeDecodeError:
+        raise ValueError(f"target file is not UTF-8 text: {path}") from None
+    return count
+
+
+def _file_hosts(path):
+    def hosts():
+        for _, item in _file_items(path):
+            factory, _ = _parse_item(item)
+            yield from factory()
+    return hosts
+
+
+class TargetSpec:
+    def __init__(self, spec: str):
+        self.spec = spec.strip()
+        self._items = _split(self.spec)
+        self._parts = [_parse_item(item) for item in self._items]
+        if not self._parts:
+            raise ValueError("empty target")
+        self._count = sum(count for _, count in self._parts)
+
+    def __iter__(self):
+        for factory, _ in self._parts:
+            yield from factory()
+
+    def __len__(self):
+        return self._count
+
+    def blocks(self, size=HOST_BLOCK):
+        """Yield lists of at most `size` hosts."""
+        hosts = iter(self)
+        while True:
+            block = list(islice(hosts, size))
+            if not block:
+                return
+            yield block
+
+    def after(self, skip):
+        """Spec items covering every host but the first `skip`; a partly
+        skipped IPv4 block or range comes back as a "first-last" range."""
+        for item, (factory, count) in zip(self._items, self._parts):
+            if skip >= count:
+                skip -= count
+                continue
+            if skip == 0:
+                yield item
+                continue
+            hosts = islice(factory(), skip, None)
+            skip = 0
+            last = _last_ipv4(item)
+            if last is None:
+                yield from hosts
+                continue
+            first = next(hosts, None)
+            if first is not None:
+                yield first if first == last else f"{first}-{last}"
+
+    def __str__(self):
+        return self.spec
@@ -1,9 +1,11 @@
-import csv
+import os
+import random
+import sqlite3
 import time
 
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import (
+    QCheckBox,
     QFileDialog,
     QComboBox,
     QFrame,
@@ -12,28 +14,76 @@ from PyQt5.QtWidgets import (
     QHeaderView,
     QLabel,
     QLineEdit,
+    QListView,
+    QMenu,
     QMessageBox,
     QProgressBar,
     QPushButton,
-    QPlainTextEdit,
     QSpinBox,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QToolButton,
     QVBoxLayout,
     QWidget,
 )
 
-from scanner import ScannerThread
+from banners import BannerGrabber
+from checkpoint import Checkpoint, CheckpointError
+from congestion import AimdWindow, FixedWindow
+from engine import MAX_CONCURRENCY, parse_ports
+from history import DEFAULT_PATH as HISTORY_PATH, DEFAULT_TTL, ScanHistory
+from models import HistoryModel, LogModel, ResultsFilterProxy, ResultsModel
+from portstate import CLOSED, FILTERED, OPEN
+from profiling import LagMonitor, Profiler, SlotTimes
+from discovery import HostDiscovery
+from resolver import Resolver
+from rtt import AdaptiveTimeout
+from scanlog import DEBUG, ERROR, INFO, OPEN as LOG_OPEN, LogBuffer
+from scanner import ExportThread, ScannerThread
+from targets import TargetSpec
+
+CHECKPOINT_PATH = os.path.join(os.path.expanduser("~"), ".port_scanner", "last_scan.ckpt")
+EXPORT_FILTERS = ";;".join([
+    "CSV (*.csv *.csv.gz)",
+    "NDJSON (*.ndjson *.ndjson.gz)",
+    "Binary (*.pscan *.pscan.gz)",
+])
+TOP_PRESETS = {
+    "Top 20 (most common)": 20,
+    "Top 100 (most common)": 100,
+    "Top 1000 (most common)": 1000,
+}
+LOG_LEVELS = {
+    "Debug (per port)": DEBUG,
+    "Info": INFO,
+    "Open ports": LOG_OPEN,
+    "Errors": ERROR,
+}
+LOG_REFRESH_MS = 100
 
 
 class MainWindow(QWidget):
-    def __init__(self):
+    def __init__(self, instrument=False, profiler=None, log_writer=None):
         super().__init__()
         self.setWindowTitle("Port Scanner")
         self.resize(980, 700)
 
+        # log yozuvlari bufferga tushadi, ko'rinish timer bilan yangilanadi
+        self.log = LogBuffer(writer=log_writer)
+        self.log_model = LogModel(self.log, self)
+
+        # instrumentatsiya: slotlar signal ulanishidan oldin o'raladi
+        self.profiler = profiler
+        self.slot_times = self.lag_monitor = None
+        if instrument:
+            self.slot_times = SlotTimes()
+            self.slot_times.wrap(self)
+            self.lag_monitor = LagMonitor(self)
+            self.lag_monitor.start()
+
         self.thread = None
+        self.export_thread = None
+        self.last_store = None
+        self.history_db = None
         self.scan_started_at = None
         self.scan_was_stopped = False
         self.open_ports_count = 0
@@ -48,10 +98,16 @@ class MainWindow(QWidget):
         self._scan_dots = 0
         self._status_mode = "Ready"
 
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(LOG_REFRESH_MS)
+        self.log_timer.timeout.connect(self.refresh_log)
+
         self.build_ui()
         self.apply_hacker_theme()
+        self.refresh_history()
         self.update_status("Ready")
         self.update_inline_status("Ready to scan")
+        self.log_timer.start()
 
     def build_ui(self):
         root = QVBoxLayout(self)
@@ -106,15 +162,22 @@ class MainWindow(QWidget):
         icon_label.setObjectName("fieldTag")
 
         self.target = QLineEdit()
-        self.target.setPlaceholderText("Enter IP or domain (e.g. 127.0.0.1, scanme.nmap.org)")
+        self.target.setPlaceholderText(
+            "IP, domain, CIDR or range (e.g. 127.0.0.1, scanme.nmap.org, 10.0.0.0/24, 10.0.0.1-50)"
+        )
         self.target.textChanged.connect(self.on_target_changed)
 
+        self.btn_target_file = QPushButton("Load List")
+        self.btn_target_file.setObjectName("btnSecondary")
+        self.btn_target_file.clicked.connect(self.choose_target_file)
+
         self.inline_status = QLabel("")
         self.inline_status.setObjectName("inlineNeutral")
 
         grid.addWidget(icon_label, 0, 0)
         grid.addWidget(self.target, 0, 1)
-        grid.addWidget(self.inline_status, 1, 1)
+        grid.addWidget(self.btn_target_file, 0, 2)
+        grid.addWidget(self.inline_status, 1, 1, 1, 2)
         grid.setColumnStretch(1, 1)
 
         layout.addWidget(title)
@@ -149,18 +212,89 @@ class MainWindow(QWidget):
             [
                 "Custom",
                 "Common (1-1024)",
-                "Top 100 (1-100)",
+                *TOP_PRESETS,
                 "Full (1-65535)",
             ]
         )
         self.port_preset.currentTextChanged.connect(self.apply_port_preset)
 
+        self.concurrency = QSpinBox()
+        self.concurrency.setRange(1, MAX_CONCURRENCY)
+        self.concurrency.setValue(min(500, MAX_CONCURRENCY))
+
+        self.workers = QSpinBox()
+        self.workers.setRange(1, os.cpu_count() or 1)
+        self.workers.setValue(1)
+
+        self.adaptive_timeout = QCheckBox("Adaptive timeout (RTT based)")
+        self.adaptive_timeout.setChecked(True)
+
+        self.adaptive_window = QCheckBox("Adaptive window (AIMD)")
+        self.adaptive_window.setChecked(True)
+
+        self.incremental = QCheckBox("Incremental (reuse fresh results)")
+        self.incremental.setToolTip(
+            "Skip ports whose last result is still fresh: closed for 6 h, filtered for 1 h. "
+            "Open ports are always re-checked."
+        )
+
+        self.stream_export = QCheckBox("Stream results to file")
+        self.stream_export.setToolTip(
+            "Write open ports to CSV, NDJSON or binary while the scan runs. "
+            "Add .gz to the file name to compress."
+        )
+
+        self.randomize = QCheckBox("Randomize order")
+        self.randomize.setToolTip(
+            "Probe host/port pairs in a seeded pseudo-random order instead of sequentially."
+        )
+
+        self.grab_banners = QCheckBox("Grab banners (service/version)")
+        self.grab_banners.setToolTip(
+            "Read greetings and send small HTTP/TLS probes to open ports to identify the service."
+        )
+
+        self.address_family = QComboBox()
+        self.address_family.addItem("IPv4 + IPv6", "any")
+        self.address_family.addItem("IPv4 only", "4")
+        self.address_family.addItem("IPv6 only", "6")
+        self.address_family.setToolTip("Which addresses of a host name to scan")
+
+        self.all_addresses = QCheckBox("Scan every resolved address")
+
+        self.skip_dead = QCheckBox("Skip dead hosts")
+        self.skip_dead.setToolTip(
+            "Check each host with a few quick connects first and skip hosts that answer none."
+        )
+
+        self.max_rate = QSpinBox()
+        self.max_rate.setRange(0, 1000000)
+        self.max_rate.setSingleStep(100)
+        self.max_rate.setSpecialValueText("Unlimited")
+        self.max_rate.setSuffix(" pps")
+
         grid.addWidget(QLabel("Start Port"), 0, 0)
         grid.addWidget(self.start_port, 0, 1)
         grid.addWidget(QLabel("End Port"), 0, 2)
         grid.addWidget(self.end_port, 0, 3)
         grid.addWidget(QLabel("Preset"), 1, 0)
-        grid.addWidget(self.port_preset, 1, 1, 1, 3)
+        grid.addWidget(self.port_preset, 1, 1)
+        grid.addWidget(QLabel("Concurrency"), 1, 2)
+        grid.addWidget(self.concurrency, 1, 3)
+        grid.addWidget(self.adaptive_timeout, 2, 0, 1, 2)
+        grid.addWidget(QLabel("Workers"), 2, 2)
+        grid.addWidget(self.workers, 2, 3)
+        grid.addWidget(self.adaptive_window, 3, 0, 1, 2)
+        grid.addWidget(QLabel("Max Rate"), 3, 2)
+        grid.addWidget(self.max_rate, 3, 3)
+        grid.addWidget(self.incremental, 4, 0, 1, 2)
+        grid.addWidget(self.stream_export, 4, 2, 1, 2)
+        grid.addWidget(self.randomize, 5, 0, 1, 2)
+        grid.addWidget(self.grab_banners, 5, 2, 1, 2)
+        grid.addWidget(QLabel("Addresses"), 6, 0)
+        grid.addWidget(self.address_family, 6, 1)
+        grid.addWidget(self.all_addresses, 6, 2, 1, 2)
+        grid.addWidget(self.skip_dead, 7, 0, 1, 2)
         grid.setColumnStretch(1, 1)
         grid.setColumnStretch(3, 1)
 
@@ -174,22 +308,48 @@ class MainWindow(QWidget):
         self.btn_stop.setObjectName("btnStop")
         self.btn_stop.setEnabled(False)
 
+        self.btn_resume = QPushButton("Resume")
+        self.btn_resume.setObjectName("btnSecondary")
+        self.btn_resume.setEnabled(os.path.exists(CHECKPOINT_PATH))
+
         self.btn_clear = QPushButton("Clear")
         self.btn_clear.setObjectName("btnSecondary")
 
-        self.btn_export = QPushButton("Export CSV")
+        self.btn_export = QPushButton("Export")
         self.btn_export.setObjectName("btnSecondary")
 
+        self.btn_diagnostics = QToolButton()
+        self.btn_diagnostics.setObjectName("diagnostics")
+        self.btn_diagnostics.setText("Diagnostics")
+        self.btn_diagnostics.setPopupMode(QToolButton.InstantPopup)
+        menu = QMenu(self.btn_diagnostics)
+        self.action_profile = menu.addAction("Start cProfile...")
+        self.action_sample = menu.addAction("Start sampling profile...")
+        self.action_stop_profile = menu.addAction("Stop profiling")
+        menu.addSeparator()
+        self.action_report = menu.addAction("Lag / slot timing report")
+        self.action_report.setEnabled(self.lag_monitor is not None)
+        self.action_report.setToolTip("Start the app with --instrument to enable")
+        self.btn_diagnostics.setMenu(menu)
+        self.set_profiling_ui()
+
         buttons.addWidget(self.btn_scan)
         buttons.addWidget(self.btn_stop)
+        buttons.addWidget(self.btn_resume)
         buttons.addStretch(1)
         buttons.addWidget(self.btn_clear)
         buttons.addWidget(self.btn_export)
+        buttons.addWidget(self.btn_diagnostics)
 
         self.btn_scan.clicked.connect(self.start_scan)
         self.btn_stop.clicked.connect(self.stop_scan)
+        self.btn_resume.clicked.connect(self.resume_scan)
         self.btn_clear.clicked.connect(self.clear_table)
-        self.btn_export.clicked.connect(self.export_csv)
+        self.btn_export.clicked.connect(self.export_results)
+        self.action_profile.triggered.connect(lambda: self.start_profiling(sampling=False))
+        self.action_sample.triggered.connect(lambda: self.start_profiling(sampling=True))
+        self.action_stop_profile.triggered.connect(self.stop_profiling)
+        self.action_report.triggered.connect(self.log_instrumentation)
 
         layout.addWidget(title)
         layout.addLayout(grid)
@@ -218,10 +378,33 @@ class MainWindow(QWidget):
         self.open_ports_label = QLabel("Open ports found: 0")
         self.open_ports_label.setObjectName("metricPill")
 
+        self.window_label = QLabel("Window: -")
+        self.window_label.setObjectName("metricPill")
+
+        self.rate_label = QLabel("Rate: -")
+        self.rate_label.setObjectName("metricPill")
+
+        self.eta_label = QLabel("ETA: -")
+        self.eta_label.setObjectName("metricPill")
+
+        self.rtt_label = QLabel("RTT: -")
+        self.rtt_label.setObjectName("metricPill")
+        self.rtt_label.setToolTip(
+            "Connect round-trip time of answered probes, median / 99th percentile"
+        )
+
+        self.timeouts_label = QLabel("Timeouts: 0")
+        self.timeouts_label.setObjectName("metricPill")
+
         layout.addWidget(self.progress, 1)
         layout.addWidget(self.progress_percent)
         layout.addWidget(self.elapsed_label)
         layout.addWidget(self.open_ports_label)
+        layout.addWidget(self.window_label)
+        layout.addWidget(self.rate_label)
+        layout.addWidget(self.eta_label)
+        layout.addWidget(self.rtt_label)
+        layout.addWidget(self.timeouts_label)
         return card
 
     def build_results_section(self):
@@ -241,23 +424,41 @@ class MainWindow(QWidget):
         self.search_box.setClearButtonEnabled(True)
         self.search_box.textChanged.connect(self.filter_table)
 
+        self.history_box = QComboBox()
+        self.history_box.setMinimumWidth(260)
+        self.history_box.currentIndexChanged.connect(self.show_history_scan)
+
         top_row.addWidget(title)
+        top_row.addWidget(self.history_box)
         top_row.addStretch(1)
         top_row.addWidget(self.search_box)
 
-        self.table = QTableWidget(0, 3)
-        self.table.setHorizontalHeaderLabels(["Port", "Status", "Service"])
+        self.results_model = ResultsModel(self)
+        self.results_proxy = ResultsFilterProxy(self)
+        self.results_proxy.setSourceModel(self.results_model)
+
+        self.table = QTableView()
+        self.table.setModel(self.results_proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(1, Qt.AscendingOrder)
         self.table.setEditTriggers(self.table.NoEditTriggers)
         self.table.setSelectionBehavior(self.table.SelectRows)
         self.table.setAlternatingRowColors(True)
         self.table.setShowGrid(False)
         self.table.setMouseTracking(True)
         self.table.verticalHeader().setVisible(False)
+        # ResizeToContents har bir qatorni o'lchaydi - katta jadvalda sekin
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(32)
 
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.Stretch)
+        header.setSectionResizeMode(0, QHeaderView.Interactive)
+        header.setSectionResizeMode(1, QHeaderView.Interactive)
+        header.setSectionResizeMode(2, QHeaderView.Interactive)
+        header.setSectionResizeMode(3, QHeaderView.Stretch)
+        header.resizeSection(0, 160)
+        header.resizeSection(1, 90)
+        header.resizeSection(2, 110)
 
         layout.addLayout(top_row)
         layout.addWidget(self.table)
@@ -282,15 +483,22 @@ class MainWindow(QWidget):
         self.log_toggle.setChecked(True)
         self.log_toggle.clicked.connect(self.toggle_scan_log)
 
+        self.log_level = QComboBox()
+        self.log_level.addItems(LOG_LEVELS)
+        self.log_level.setCurrentText("Info")
+        self.log_level.currentTextChanged.connect(self.set_log_level)
+
         header.addWidget(title)
         header.addStretch(1)
+        header.addWidget(self.log_level)
         header.addWidget(self.log_toggle)
 
-        self.scan_log = QPlainTextEdit()
-        self.scan_log.setReadOnly(True)
+        self.scan_log = QListView()
         self.scan_log.setObjectName("scanLog")
+        self.scan_log.setModel(self.log_model)
+        self.scan_log.setUniformItemSizes(True)
+        self.scan_log.setSelectionMode(QListView.ExtendedSelection)
         self.scan_log.setMinimumHeight(130)
-        self.scan_log.setMaximumBlockCount(400)
 
         layout.addLayout(header)
         layout.addWidget(self.scan_log)
@@ -419,7 +627,7 @@ class MainWindow(QWidget):
                 color: #5e6964;
                 border-color: #25302c;
             }
-            QToolButton#logToggle {
+            QToolButton#logToggle, QToolButton#diagnostics {
                 background-color: #121a18;
                 color: #9fd8bf;
                 border: 1px solid #2c5b48;
@@ -427,7 +635,7 @@ class MainWindow(QWidget):
                 padding: 5px 12px;
                 font-weight: 700;
             }
-            QToolButton#logToggle:hover {
+            QToolButton#logToggle:hover, QToolButton#diagnostics:hover {
                 border-color: #00ff88;
                 color: #cbffe5;
             }
@@ -449,7 +657,7 @@ class MainWindow(QWidget):
                 padding: 5px 9px;
                 font-size: 12px;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #0f1413;
                 alternate-background-color: #121917;
                 border: 1px solid #27312e;
@@ -464,15 +672,15 @@ class MainWindow(QWidget):
                 padding: 8px;
                 font-weight: 700;
             }
-            QTableWidget::item {
+            QTableView::item {
                 color: #ccd5d1;
                 padding: 6px;
                 border-bottom: 1px solid #18201d;
             }
-            QTableWidget::item:hover {
+            QTableView::item:hover {
                 background-color: #163126;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #1a3a2b;
                 color: #ecfff6;
             }
@@ -495,10 +703,26 @@ class MainWindow(QWidget):
     def set_running_ui(self, running):
         self.btn_scan.setEnabled(not running)
         self.btn_stop.setEnabled(running)
+        self.btn_resume.setEnabled(not running and os.path.exists(CHECKPOINT_PATH))
         self.target.setEnabled(not running)
-        self.start_port.setEnabled(not running)
-        self.end_port.setEnabled(not running)
+        self.btn_target_file.setEnabled(not running)
+        ranged = self.port_preset.currentText() not in TOP_PRESETS
+        self.start_port.setEnabled(not running and ranged)
+        self.end_port.setEnabled(not running and ranged)
         self.port_preset.setEnabled(not running)
+        self.history_box.setEnabled(not running)
+        self.concurrency.setEnabled(not running)
+        self.workers.setEnabled(not running)
+        self.adaptive_timeout.setEnabled(not running)
+        self.adaptive_window.setEnabled(not running)
+        self.max_rate.setEnabled(not running)
+        self.incremental.setEnabled(not running)
+        self.randomize.setEnabled(not running)
+        self.grab_banners.setEnabled(not running)
+        self.address_family.setEnabled(not running)
+        self.all_addresses.setEnabled(not running)
+        self.skip_dead.setEnabled(not running)
+        self.stream_export.setEnabled(not running)
 
     def update_status(self, mode):
         self._status_mode = mode
@@ -532,18 +756,34 @@ class MainWindow(QWidget):
         self.inline_status.style().polish(self.inline_status)
 
     def on_target_changed(self):
-        if self.target.text().strip():
-            self.update_inline_status("Target looks valid.")
-        else:
+        text = self.target.text().strip()
+        if not text:
             self.update_inline_status("Ready to scan")
+            return
+        try:
+            TargetSpec(text)
+        except ValueError as e:
+            self.update_inline_status(str(e), error=True)
+        else:
+            self.update_inline_status("Target looks valid.")
+
+    def choose_target_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Load target list",
+            "",
+            "Text Files (*.txt);;All Files (*)",
+        )
+        if path:
+            self.target.setText(f"@{path}")
 
     def apply_port_preset(self, preset_text):
+        ranged = preset_text not in TOP_PRESETS
+        self.start_port.setEnabled(ranged)
+        self.end_port.setEnabled(ranged)
         if preset_text == "Common (1-1024)":
             self.start_port.setValue(1)
             self.end_port.setValue(1024)
-        elif preset_text == "Top 100 (1-100)":
-            self.start_port.setValue(1)
-            self.end_port.setValue(100)
         elif preset_text == "Full (1-65535)":
             self.start_port.setValue(1)
             self.end_port.setValue(65535)
@@ -558,11 +798,64 @@ class MainWindow(QWidget):
             QMessageBox.warning(self, "Validation Error", "Please enter a target (IP or domain).")
             return
 
-        if start_port > end_port:
+        try:
+            targets = TargetSpec(target)
+        except ValueError as e:
+            self.update_inline_status(str(e), error=True)
+            QMessageBox.warning(self, "Validation Error", str(e))
+            return
+
+        top = TOP_PRESETS.get(self.port_preset.currentText())
+        if top:
+            port_spec = f"top:{top}"
+        elif start_port > end_port:
             self.update_inline_status("Start Port cannot be greater than End Port.", error=True)
             QMessageBox.warning(self, "Validation Error", "Start Port cannot be greater than End Port.")
             return
+        else:
+            port_spec = f"{start_port}-{end_port}"
+        seed = random.getrandbits(63) if self.randomize.isChecked() else None
+
+        try:
+            checkpoint = Checkpoint.create(CHECKPOINT_PATH, targets, port_spec, seed)
+        except OSError as e:
+            checkpoint = None
+            self.append_log(f"Checkpoint disabled: {e}")
+
+        self.launch_scan(targets, port_spec, checkpoint, seed)
+
+    def resume_scan(self):
+        try:
+            checkpoint = Checkpoint.load(CHECKPOINT_PATH)
+            targets = TargetSpec(checkpoint.target)
+            ports = parse_ports(checkpoint.ports)
+        except (OSError, ValueError, CheckpointError) as e:
+            QMessageBox.warning(self, "Resume", f"Cannot resume: {e}")
+            return
 
+        if checkpoint.complete:
+            QMessageBox.information(self, "Resume", "The last scan already completed.")
+            return
+
+        self.target.setText(checkpoint.target)
+        presets = {f"top:{n}": name for name, n in TOP_PRESETS.items()}
+        self.port_preset.setCurrentText(presets.get(checkpoint.ports, "Custom"))
+        self.start_port.setValue(min(ports))
+        self.end_port.setValue(max(ports))
+        self.randomize.setChecked(checkpoint.seed is not None)
+        self.results_model.clear()
+
+        try:
+            checkpoint.resume()
+        except OSError as e:
+            QMessageBox.warning(self, "Resume", f"Cannot resume: {e}")
+            return
+
+        self.launch_scan(targets, checkpoint.ports, checkpoint, checkpoint.seed)
+        self.append_log(f"Resumed: {len(checkpoint.store)} host(s) already have results")
+
+    def launch_scan(self, targets, port_spec, checkpoint, seed=None):
+        self.history_box.setCurrentIndex(0)
         self.set_running_ui(True)
         self.update_status("Scanning")
         self.update_inline_status("Scanning target...")
@@ -571,17 +864,53 @@ class MainWindow(QWidget):
         self.progress_percent.setText("0%")
         self.open_ports_count = 0
         self.open_ports_label.setText("Open ports found: 0")
+        self.eta_label.setText("ETA: -")
+        self.rtt_label.setText("RTT: -")
+        self.timeouts_label.setText("Timeouts: 0")
 
         self.scan_was_stopped = False
         self.scan_started_at = time.time()
+        if self.lag_monitor:
+            self.lag_monitor.reset()
+            self.slot_times.reset()
         self.elapsed_label.setText("Elapsed: 00:00")
         self.elapsed_timer.start()
 
-        self.thread = ScannerThread(target, start_port, end_port, timeout=0.5)
-        self.thread.found.connect(self.add_row)
+        export_path = None
+        if self.stream_export.isChecked():
+            export_path, _ = QFileDialog.getSaveFileName(
+                self, "Stream results to", "scan_results.csv", EXPORT_FILTERS
+            )
+            if not export_path:
+                self.stream_export.setChecked(False)
+
+        window_cls = AimdWindow if self.adaptive_window.isChecked() else FixedWindow
+        window = window_cls(int(self.concurrency.value()), max_rate=int(self.max_rate.value()))
+
+        self.thread = ScannerThread(
+            targets,
+            port_spec,
+            timeout=AdaptiveTimeout(initial=0.5) if self.adaptive_timeout.isChecked() else 0.5,
+            concurrency=window,
+            workers=int(self.workers.value()),
+            checkpoint=checkpoint,
+            history_path=HISTORY_PATH,
+            ttl=DEFAULT_TTL if self.incremental.isChecked() else None,
+            export_path=export_path or None,
+            seed=seed,
+            banners=BannerGrabber() if self.grab_banners.isChecked() else None,
+            resolver=Resolver(self.address_family.currentData(), self.all_addresses.isChecked()),
+            discovery=(HostDiscovery(cache_path=HISTORY_PATH)
+                       if self.skip_dead.isChecked() else None),
+            profiler=self.profiler,
+        )
+        self.thread.found.connect(self.add_rows)
         self.thread.scanning.connect(self.on_scanning_port)
         self.thread.progress.connect(self.on_progress_update)
+        self.thread.stats.connect(self.on_stats_update)
+        self.thread.metrics.connect(self.on_metrics_update)
         self.thread.error.connect(self.show_error)
+        self.thread.notice.connect(self.append_log)
         self.thread.finished.connect(self.scan_finished)
         self.thread.start()
         self.append_log("Scan started")
@@ -598,6 +927,26 @@ class MainWindow(QWidget):
         self.progress.setValue(value)
         self.progress_percent.setText(f"{value}%")
 
+    def on_stats_update(self, window, rate):
+        self.window_label.setText(f"Window: {window}")
+        self.rate_label.setText(f"Rate: {rate:,.0f}/s")
+
+    def on_metrics_update(self, summary):
+        eta = summary["eta"]
+        if eta is None:
+            self.eta_label.setText("ETA: -")
+        else:
+            minutes, seconds = divmod(int(eta), 60)
+            self.eta_label.setText(f"ETA: {minutes:02d}:{seconds:02d}")
+        if summary["rtt_p50"] is not None:
+            self.rtt_label.setText(
+                f"RTT: {summary['rtt_p50'] * 1000:.1f} / {summary['rtt_p99'] * 1000:.1f} ms"
+            )
+        self.timeouts_label.setText(f"Timeouts: {summary['timeouts']:,}")
+        self.timeouts_label.setToolTip(
+            f"{summary['errors']:,} local error(s), {summary['in_flight']} in flight"
+        )
+
     def update_elapsed_time(self):
         if not self.scan_started_at:
             self.elapsed_label.setText("Elapsed: 00:00")
@@ -610,8 +959,19 @@ class MainWindow(QWidget):
     def scan_finished(self):
         self.elapsed_timer.stop()
         self.update_elapsed_time()
-        self.set_running_ui(False)
+        self.last_store = self.thread.store
         self.thread = None
+        self.set_running_ui(False)
+        self.refresh_history()
+
+        store = self.last_store
+        self.append_log(
+            f"Summary: {len(store)} host(s), {store.count(OPEN)} open, "
+            f"{store.count(CLOSED)} closed, {store.count(FILTERED)} filtered"
+        )
+
+        if self.lag_monitor:
+            self.log_instrumentation()
 
         if self.scan_was_stopped:
             self.update_status("Stopped")
@@ -621,91 +981,165 @@ class MainWindow(QWidget):
             self.update_status("Ready")
             self.update_inline_status("Scan completed.")
             self.append_log("Scan completed")
+
+    def open_history(self):
+        if self.history_db is None:
+            try:
+                self.history_db = ScanHistory(HISTORY_PATH)
+            except (sqlite3.Error, OSError) as e:
+                self.append_log(f"History unavailable: {e}")
+        return self.history_db
+
+    def refresh_history(self):
+        history = self.open_history()
+        self.history_box.blockSignals(True)
+        self.history_box.clear()
+        self.history_box.addItem("Live results", None)
+        if history:
+            for scan_id, target, ports, started, _, status in history.scans():
+                stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(started))
+                self.history_box.addItem(f"#{scan_id} {stamp} {target} [{status}]", scan_id)
+        self.history_box.setCurrentIndex(0)
+        self.history_box.blockSignals(False)
+
+    def show_history_scan(self, index):
+        previous = self.results_proxy.sourceModel()
+        scan_id = self.history_box.itemData(index)
+        history = self.open_history() if scan_id is not None else None
+        if history:
+            self.results_proxy.setSourceModel(HistoryModel(history, scan_id, self))
+        else:
+            self.results_proxy.setSourceModel(self.results_model)
+        if previous is not self.results_model:
+            previous.deleteLater()
 
     def show_error(self, message):
         self.update_inline_status("Scan failed. Check target and try again.", error=True)
-        self.append_log(f"ERROR {message}")
+        self.append_log(f"ERROR {message}", level=ERROR)
         QMessageBox.critical(self, "Error", message)
 
     def on_scanning_port(self, port):
-        self.append_log(f"Scanning port {port}")
-
-    def add_row(self, port, status, service):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-
-        port_item = QTableWidgetItem(str(port))
-        status_item = QTableWidgetItem(status)
-        service_item = QTableWidgetItem(service)
-
-        for item in (port_item, status_item, service_item):
-            item.setTextAlignment(Qt.AlignCenter)
-
-        status_upper = status.upper().strip()
-        if status_upper == "OPEN":
-            status_item.setForeground(QColor("#00ff88"))
-            self.open_ports_count += 1
-            self.open_ports_label.setText(f"Open ports found: {self.open_ports_count}")
-            service_display = f" ({service})" if service else ""
-            self.append_log(f"OPEN {port}{service_display}")
-        elif status_upper == "CLOSED":
-            status_item.setForeground(QColor("#7a8681"))
-
-        self.table.setItem(row, 0, port_item)
-        self.table.setItem(row, 1, status_item)
-        self.table.setItem(row, 2, service_item)
-
-        self.filter_table(self.search_box.text())
+        if self.log.wants(DEBUG):
+            self.append_log(f"Scanning port {port}", level=DEBUG)
+
+    def add_rows(self, rows):
+        self.results_model.append_rows(rows)
+
+        opened = [
+            f"OPEN {host}:{port}" + (f" ({service})" if service else "")
+            for host, port, status, service in rows
+            if status.upper().strip() == "OPEN"
+        ]
+        if opened:
+            self.open_ports_count += len(opened)
+            self.open_ports_label.setText(f"Open ports found: {self.open_ports_count}")
+            self.append_log(*opened, level=LOG_OPEN)
 
     def filter_table(self, query):
-        text = query.strip().lower()
-        for row in range(self.table.rowCount()):
-            row_text = " ".join(
-                self.table.item(row, col).text().lower() if self.table.item(row, col) else ""
-                for col in range(self.table.columnCount())
-            )
-            self.table.setRowHidden(row, text not in row_text)
+        self.results_proxy.setFilterFixedString(query.strip())
 
     def clear_table(self):
-        self.table.setRowCount(0)
+        self.history_box.setCurrentIndex(0)
+        self.results_model.clear()
         self.progress.setValue(0)
         self.progress_percent.setText("0%")
         self.open_ports_count = 0
         self.open_ports_label.setText("Open ports found: 0")
         self.search_box.clear()
 
+    def set_profiling_ui(self):
+        profiling = self.profiler is not None
+        self.action_profile.setEnabled(not profiling)
+        self.action_sample.setEnabled(not profiling)
+        self.action_stop_profile.setEnabled(profiling)
+
+    def start_profiling(self, sampling):
+        default = "scan.folded" if sampling else "scan.prof"
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Write profile to", default,
+            "Collapsed stacks (*.folded)" if sampling else "cProfile (*.prof)",
+        )
+        if not path:
+            return
+        suffix = ".folded" if sampling else ".prof"
+        if not path.endswith(suffix):
+            path += suffix
+        self.profiler = Profiler(path)
+        self.profiler.start()
+        self.set_profiling_ui()
+        self.append_log(f"Profiling to {path}")
+
+    def stop_profiling(self):
+        if not self.profiler:
+            return
+        try:
+            path = self.profiler.stop()
+            self.append_log(f"Profile written to {path}")
+        except OSError as e:
+            self.append_log(f"Profile write failed: {e}")
+        self.profiler = None
+        self.set_profiling_ui()
+
+    def log_instrumentation(self):
+        if not self.lag_monitor:
+            return
+        self.append_log(self.lag_monitor.report(), *self.slot_times.report())
+
     def toggle_scan_log(self):
         visible = self.log_toggle.isChecked()
         self.scan_log.setVisible(visible)
+        self.log_level.setVisible(visible)
         self.log_toggle.setText("Hide Log" if visible else "Show Log")
+        if visible:
+            self.refresh_log()
 
-    def append_log(self, message):
-        stamp = time.strftime("%H:%M:%S")
-        self.scan_log.appendPlainText(f"[{stamp}] {message}")
-
-    def export_csv(self):
-        if self.table.rowCount() == 0:
+    def set_log_level(self, text):
+        level = LOG_LEVELS[text]
+        # debug yozuvlari faqat tanlanganda yig'iladi
+        self.log.level = DEBUG if level == DEBUG else INFO
+        self.log_model.set_min_level(level)
+        self.scan_log.scrollToBottom()
+
+    def append_log(self, *messages, level=INFO):
+        self.log.add(level, *messages)
+
+    def refresh_log(self):
+        if not self.scan_log.isVisible():
+            return
+        bar = self.scan_log.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum()
+        if self.log_model.refresh() and at_bottom:
+            self.scan_log.scrollToBottom()
+
+    def export_results(self):
+        model = self.results_proxy.sourceModel()
+        if model.rowCount() == 0:
             QMessageBox.information(self, "Info", "Table is empty. Run a scan first.")
             return
 
         path, _ = QFileDialog.getSaveFileName(
             self,
-            "Save CSV",
+            "Export Results",
             "scan_results.csv",
-            "CSV Files (*.csv)",
+            EXPORT_FILTERS,
         )
         if not path:
             return
 
-        with open(path, "w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Port", "Status", "Service"])
-            for row in range(self.table.rowCount()):
-                port_item = self.table.item(row, 0)
-                status_item = self.table.item(row, 1)
-                service_item = self.table.item(row, 2)
-                if not port_item or not status_item or not service_item:
-                    continue
-                writer.writerow([port_item.text(), status_item.text(), service_item.text()])
-
-        QMessageBox.information(self, "Success", "CSV exported successfully.")
+        # HistoryModel.rows() o'z ulanishini shu thread ichida ochadi
+        self.btn_export.setEnabled(False)
+        self.export_thread = ExportThread(model.rows(), path)
+        self.export_thread.exported.connect(self.on_exported)
+        self.export_thread.error.connect(self.on_export_error)
+        self.export_thread.finished.connect(self.export_finished)
+        self.export_thread.start()
+
+    def on_exported(self, rows):
+        QMessageBox.information(self, "Success", f"Exported {rows} rows.")
+
+    def on_export_error(self, message):
+        QMessageBox.warning(self, "Export", message)
+
+    def export_finished(self):
+        self.export_thread = None
+        self.btn_export.setEnabled(True)
@@ -0,0 +1,171 @@
+"""Ports an interrupted scan has no result for, as "TARGET PORTS" lines.
+
+Each line can be scanned again as `python cli.py TARGET -p PORTS`:
+
+    10.0.0.7 22,80,8000-8100
+    10.0.0.8-10.0.0.255 1-1024
+    10.1.0.0/16 1-1024
+
+A host missing a few ports keeps them in a set; past SPARSE_MAX ports
+(or when all or whole runs are added) it gets a 64 KB mask indexed by
+port, where adding costs one byte write and turning it into ranges is a
+regex over the mask. Consecutive IPv4 hosts missing the same ports share
+one line; targets the scan never reached are listed as the spec items
+they came from.
+"""
+import ipaddress
+import re
+import socket
+
+PORTS = 65536
+SPARSE_MAX = 1024
+_RUN = re.compile(rb"\x01+")
+
+
+def port_spec(runs):
+    """"22,80,8000-8100" for [(22, 22), (80, 80), (8000, 8100)]."""
+    return ",".join(str(lo) if lo == hi else f"{lo}-{hi}" for lo, hi in runs)
+
+
+def _runs(mask):
+    return [(m.start(), m.end() - 1) for m in _RUN.finditer(mask)]
+
+
+def _set_runs(ports):
+    runs = []
+    for port in sorted(ports):
+        if runs and runs[-1][1] == port - 1:
+            runs[-1][1] = port
+        else:
+            runs.append([port, port])
+    return [(lo, hi) for lo, hi in runs]
+
+
+def _ipv4(host):
+    try:
+        return int.from_bytes(socket.inet_aton(host), "big") if host.count(".") == 3 else None
+    except OSError:
+        return None
+
+
+def _sort_key(host):
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return (2, 0, host)
+    return (address.version - 4, int(address), "")
+
+
+class UnscannedReport:
+    """Collects unscanned (host, port) pairs; `done` (a ScanStore) drops
+    pairs that already have a result from an earlier run."""
+
+    def __init__(self, ports, done=None):
+        self.ports = ports
+        self.done = done
+        self._all = bytearray(PORTS)
+        for port in ports:
+            self._all[port] = 1
+        self._masks = {}    # host -> set of ports, or a bytearray mask
+
+    def __bool__(self):
+        return bool(self._masks)
+
+    def _mask(self, host):
+        mask = self._masks.get(host)
+        if mask is None:
+            mask = self._masks[host] = bytearray(PORTS)
+        elif type(mask) is set:
+            ports, mask = mask, bytearray(PORTS)
+            for port in ports:
+                mask[port] = 1
+            self._masks[host] = mask
+        return mask
+
+    def add(self, host, port):
+        mask = self._masks.get(host)
+        if mask is None:
+            self._masks[host] = {port}
+        elif type(mask) is set:
+            mask.add(port)
+            if len(mask) > SPARSE_MAX:
+                self._mask(host)
+        else:
+            mask[port] = 1
+
+    def add_all(self, host):
+        mask = self._masks.get(host)
+        if mask is None:
+            self._masks[host] = bytearray(self._all)
+        else:
+            mask = self._mask(host)
+            merged = int.from_bytes(mask, "little") | int.from_bytes(self._all, "little")
+            mask[:] = merged.to_bytes(PORTS, "little")
+
+    def add_runs(self, host, runs):
+        mask = self._masks.get(host)
+        if type(mask) is not bytearray and sum(hi - lo + 1 for lo, hi in runs) <= SPARSE_MAX:
+            ports = self._masks.setdefault(host, set())
+            for lo, hi in runs:
+                ports.update(range(lo, hi + 1))
+            if len(ports) <= SPARSE_MAX:
+                return
+        mask = self._mask(host)
+        for lo, hi in runs:
+            mask[lo:hi + 1] = b"\x01" * (hi - lo + 1)
+
+    def _host_runs(self, host):
+        mask = self._masks[host]
+        return _set_runs(mask) if type(mask) is set else _runs(mask)
+
+    def runs(self):
+        """{host: [(first, last), ...]}, compact enough to send over a pipe."""
+        return {host: self._host_runs(host) for host in self._masks}
+
+    def _without_done(self, host, mask):
+        if self.done is not None and host in self.done:
+            states = self.done.host(host)
+            for state in range(1, 4):
+                for port in states.ports_in(state):
+                    mask[port] = 0
+        return mask
+
+    def lines(self, unreached=()):
+        """Yield "TARGET PORTS" lines: collected hosts in address order, then
+        `unreached` target items with every port."""
+        pending = None      # [first ipv4, last ipv4, first host, last host, spec]
+        everything = port_spec(_runs(self._all))
+
+        def rows():
+            for host in sorted(self._masks, key=_sort_key):
+                if self.done is not None and host in self.done:
+                    yield host, port_spec(_runs(self._without_done(host, self._mask(host))))
+                else:
+                    yield host, port_spec(self._host_runs(host))
+            for item in unreached:
+                if self.done is not None and item in self.done:
+                    yield item, port_spec(_runs(self._without_done(item, bytearray(self._all))))
+                else:
+                    yield item, everything
+
+        for host, spec in rows():
+            if not spec:
+                continue
+            number = _ipv4(host)
+            if (pending and number is not None and number == pending[1] + 1
+                    and spec == pending[4]):
+                pending[1], pending[3] = number, host
+                continue
+            if pending:
+                yield self._line(pending)
+            pending = [number, number, host, host, spec] if number is not None else None
+            if pending is None:
+                yield f"{host} {spec}"
+        if pending:
+            yield self._line(pending)
+
+    @staticmethod
+    def _line(pending):
+        first, last, first_host, last_host, spec = pending
+        target = first_host if first == last else f"{first_host}-{last_host}"
+        return f"{target} {spec}"
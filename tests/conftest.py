@@ -0,0 +1,5 @@
+import os
+import sys
+
+# modullar src/ ichida tekis joylashgan (from engine import ...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
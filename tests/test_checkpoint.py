@@ -0,0 +1,63 @@
+import pytest
+
+from checkpoint import Checkpoint, CheckpointError
+
+
+def _write(path):
+    ckpt = Checkpoint.create(path, "10.0.0.0/30", "1-1024", seed=42)
+    ckpt.add("10.0.0.1", 22, "OPEN")
+    ckpt.add("10.0.0.1", 23, "CLOSED")
+    ckpt.add("10.0.0.2", 80, "FILTERED")
+    ckpt.add("10.0.0.2", 81, "UNSCANNED")   # qayta ochilganda yana tekshiriladi
+    ckpt.close()
+
+
+def test_roundtrip(tmp_path):
+    path = str(tmp_path / "scan.ckpt")
+    _write(path)
+    ckpt = Checkpoint.load(path)
+    assert (ckpt.target, ckpt.ports, ckpt.seed) == ("10.0.0.0/30", "1-1024", 42)
+    assert not ckpt.complete
+    assert sorted(ckpt.store.items()) == [
+        ("10.0.0.1", 22, "OPEN"), ("10.0.0.1", 23, "CLOSED"), ("10.0.0.2", 80, "FILTERED")]
+    assert not ckpt.is_done("10.0.0.2", 81)
+
+    ckpt.resume()
+    ckpt.add("10.0.0.3", 443, "OPEN")
+    ckpt.finish()
+    ckpt.close()
+    ckpt = Checkpoint.load(path)
+    assert ckpt.complete
+    assert ckpt.is_done("10.0.0.3", 443) and ckpt.is_done("10.0.0.1", 22)
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    path = tmp_path / "scan.ckpt"
+    _write(str(path))
+    whole = path.read_bytes()
+    path.write_bytes(whole[:-3])    # oxirgi yozuv yarim yozilgan
+    ckpt = Checkpoint.load(str(path))
+    assert not ckpt.is_done("10.0.0.2", 80)
+    assert ckpt.is_done("10.0.0.1", 23)
+
+    ckpt.resume()
+    ckpt.add("10.0.0.2", 80, "FILTERED")
+    ckpt.close()
+    assert Checkpoint.load(str(path)).is_done("10.0.0.2", 80)
+    assert path.read_bytes() == whole
+
+
+@pytest.mark.parametrize("data", [b"", b"garbage", b"PSCKPT1\n\x40\x00\x00\x00{}"])
+def test_damaged_file(tmp_path, data):
+    path = tmp_path / "scan.ckpt"
+    path.write_bytes(data)
+    with pytest.raises(CheckpointError):
+        Checkpoint.load(str(path))
+
+
+def test_unknown_record(tmp_path):
+    path = tmp_path / "scan.ckpt"
+    _write(str(path))
+    path.write_bytes(path.read_bytes() + b"Z")
+    with pytest.raises(CheckpointError):
+        Checkpoint.load(str(path))
@@ -0,0 +1,68 @@
+import socket
+
+import pytest
+
+import cli
+from checkpoint import Checkpoint
+from exporters import read_rows
+from services import service_name
+
+
+def test_bad_target_file_line_is_a_usage_error(tmp_path, capsys):
+    hosts = tmp_path / "hosts.txt"
+    hosts.write_text("127.0.0.1\n10.0.0.0/33\n", encoding="utf-8")
+    assert cli.main([f"@{hosts}", "-p", "1"]) == 2
+    assert "hosts.txt:2: bad CIDR block" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv", [["127.0.0.1", "-p", "0"], ["10.0.0.0/33", "-p", "80"]])
+def test_bad_arguments(argv, capsys):
+    assert cli.main(argv) == 2
+    assert capsys.readouterr().err.startswith("error: ")
+
+
+def test_setup_failure_removes_created_files(tmp_path, capsys):
+    busy = socket.socket()
+    busy.bind(("127.0.0.1", 0))
+    busy.listen(1)
+    out, ckpt = tmp_path / "out.csv", tmp_path / "scan.ckpt"
+    try:
+        code = cli.main(["127.0.0.1", "-p", "1", "-o", str(out), "--checkpoint", str(ckpt),
+                         "--metrics-port", str(busy.getsockname()[1])])
+    finally:
+        busy.close()
+    assert code == 2
+    assert "error: metrics:" in capsys.readouterr().err
+    assert not out.exists() and not ckpt.exists()
+
+
+def test_history_failure_keeps_resumed_checkpoint(tmp_path, capsys):
+    ckpt = tmp_path / "scan.ckpt"
+    Checkpoint.create(str(ckpt), "127.0.0.1", "1-2").close()
+    out = tmp_path / "out.ndjson"
+    code = cli.main(["--resume", str(ckpt), "-o", str(out), "--history", str(tmp_path)])
+    assert code == 2
+    assert "error: history:" in capsys.readouterr().err
+    assert ckpt.exists() and not out.exists()
+    assert not Checkpoint.load(str(ckpt)).complete
+
+
+def test_scan_writes_checkpoint_and_export(tmp_path, capsys):
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(4)
+    port = listener.getsockname()[1]
+    out, ckpt = tmp_path / "out.csv", tmp_path / "scan.ckpt"
+    try:
+        assert cli.main(["127.0.0.1", "-p", str(port), "-o", str(out),
+                         "--checkpoint", str(ckpt)]) == 0
+    finally:
+        listener.close()
+    assert list(read_rows(str(out))) == [("127.0.0.1", port, "OPEN", service_name(port))]
+    assert Checkpoint.load(str(ckpt)).complete
+
+    # tugagan checkpoint: natijalar qayta yoziladi, skan qilinmaydi
+    again = tmp_path / "again.csv"
+    assert cli.main(["--resume", str(ckpt), "-o", str(again)]) == 0
+    assert list(read_rows(str(again))) == list(read_rows(str(out)))
+    assert f"127.0.0.1\t{port}\tOPEN" in capsys.readouterr().out
@@ -0,0 +1,39 @@
+from congestion import EPOCH_MIN, AimdWindow, FixedWindow
+
+
+def test_pps_cap_delays_sends():
+    window = FixedWindow(100, max_rate=100)
+    waits = [window.acquire(0.0) for _ in range(10)]
+    assert waits[:5] == [0.0] * 5
+    assert all(wait > 0 for wait in waits[5:])
+
+
+def test_aimd_grows_on_clean_epochs():
+    window = AimdWindow(1000, initial=64)
+    for _ in range(500):
+        window.record("CLOSED")
+    assert window.window > 64
+    assert window.decreases == 0
+
+
+def test_aimd_halves_on_timeout_spike():
+    window = AimdWindow(1000, initial=64)
+    for _ in range(200):
+        window.record("OPEN")
+    before = window.window
+    for _ in range(2 * int(before) + EPOCH_MIN):    # kamida bitta to'liq epoch
+        window.record("FILTERED")
+    assert window.decreases >= 1
+    assert window.window < before
+
+
+def test_filtered_host_raises_baseline_not_alarm():
+    window = AimdWindow(1000, initial=64)
+    for _ in range(2000):
+        window.record("FILTERED")
+    assert window.decreases == 0
+
+
+def test_split_shares_maximum_and_rate():
+    part = AimdWindow(1000, initial=64, max_rate=400).split(4)
+    assert (part.maximum, part.limit, part.max_rate) == (250, 16, 100)
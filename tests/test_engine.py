@@ -0,0 +1,150 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from engine import ScanEngine, parse_ports
+from parallel import ParallelScanEngine
+from targets import TargetSpec
+
+
+@pytest.fixture
+def loopback():
+    """(open ports, closed ports) on 127.0.0.1."""
+    listeners, closed = [], []
+    for _ in range(3):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(16)
+        listeners.append(sock)
+    for _ in range(3):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        closed.append(sock.getsockname()[1])
+        sock.close()
+    yield sorted(s.getsockname()[1] for s in listeners), sorted(closed)
+    for sock in listeners:
+        sock.close()
+
+
+def _states(results):
+    return {(r.host, r.port): r.status for r in results}
+
+
+def _pairs(lines):
+    """(host, port) pairs named by unscanned_lines()."""
+    pairs = set()
+    for line in lines:
+        target, spec = line.split()
+        ports = parse_ports(spec)
+        pairs.update((host, port) for host in TargetSpec(target) for port in ports)
+    return pairs
+
+
+@pytest.mark.parametrize("seed", [None, 5])
+def test_loopback_scan(loopback, seed):
+    open_ports, closed_ports = loopback
+    engine = ScanEngine("127.0.0.1", open_ports + closed_ports, timeout=1.0, concurrency=8,
+                        seed=seed, fd_limit=0)
+    states = _states(engine)
+    assert states == {**{("127.0.0.1", p): "OPEN" for p in open_ports},
+                      **{("127.0.0.1", p): "CLOSED" for p in closed_ports}}
+    assert engine.scanned == engine.total == 6
+    assert not engine.interrupted
+    assert list(engine.unscanned_lines()) == []
+
+
+def test_done_pairs_are_skipped(loopback):
+    from portstate import ScanStore
+
+    open_ports, closed_ports = loopback
+    done = ScanStore()
+    done.record("127.0.0.1", open_ports[0], "OPEN")
+    engine = ScanEngine("127.0.0.1", open_ports + closed_ports, timeout=1.0, done=done,
+                        fd_limit=0)
+    ports = [r.port for r in engine]
+    assert sorted(ports) == sorted(open_ports[1:] + closed_ports)
+    assert engine.skipped == 1 and engine.scanned == engine.total
+
+
+def test_cancel_lists_every_unscanned_port():
+    ports = list(range(1, 2001))
+    engine = ScanEngine("127.0.0.1-3", ports, timeout=1.0, concurrency=16, fd_limit=0)
+    results = []
+    for result in engine:
+        results.append(result)
+        if len(results) == 50:
+            engine.cancel()
+    assert engine.cancelled and engine.interrupted
+    assert engine.stop_latency is not None and engine.stop_latency < 1.0
+    assert engine.unscanned == engine.total - len(results) > 0
+
+    scanned = {(r.host, r.port) for r in results}
+    missing = _pairs(engine.unscanned_lines())
+    assert not scanned & missing
+    assert scanned | missing == {(f"127.0.0.{h}", p) for h in (1, 2, 3) for p in ports}
+
+
+@pytest.fixture
+def blackhole():
+    """A port every loopback address accepts SYNs for and never answers:
+    the listener's queue is full, so connects stay in flight until cancelled."""
+    listener = socket.socket()
+    listener.bind(("0.0.0.0", 0))
+    listener.listen(0)
+    port = listener.getsockname()[1]
+    fillers = []
+    for _ in range(4):
+        filler = socket.socket()
+        filler.setblocking(False)
+        filler.connect_ex(("127.0.0.1", port))
+        fillers.append(filler)
+    time.sleep(0.2)
+    yield port
+    for sock in fillers + [listener]:
+        sock.close()
+
+
+# user-025: Stop closes every in-flight socket within 50 ms
+STOP_BOUND = 0.05
+
+
+def test_cancel_from_another_thread(blackhole):
+    engine = ScanEngine("127.4.0.0/22", [blackhole], timeout=10.0, concurrency=1000)
+    timer = threading.Timer(0.5, engine.cancel)
+    timer.start()
+    try:
+        count = sum(1 for _ in engine)
+    finally:
+        timer.cancel()
+    assert count == 0
+    assert len(engine.aborted) == 1000
+    assert engine.interrupted
+    assert engine.stop_latency < STOP_BOUND, engine.stop_latency
+
+
+def test_parallel_cancel_bound(blackhole):
+    engine = ParallelScanEngine("127.4.0.0/21", [blackhole], timeout=10.0, concurrency=2000,
+                                workers=4)
+    # workerlar ishga tushib, oynani to'ldirgandan keyin
+    timer = threading.Timer(2.0, engine.cancel)
+    timer.start()
+    try:
+        count = sum(1 for _ in engine)
+    finally:
+        timer.cancel()
+    assert count == 0
+    assert len(engine.aborted) == 2000
+    assert engine.stop_latency < STOP_BOUND, engine.stop_latency
+    missing = _pairs(engine.unscanned_lines())
+    assert missing == {(host, blackhole) for host in TargetSpec("127.4.0.0/21")}
+
+
+def test_parallel_matches_single(loopback):
+    open_ports, closed_ports = loopback
+    ports = open_ports + closed_ports
+    single = _states(ScanEngine("127.0.0.1-2", ports, timeout=1.0, fd_limit=0))
+    engine = ParallelScanEngine("127.0.0.1-2", ports, timeout=1.0, workers=2, seed=3, fd_limit=0)
+    assert _states(engine) == single
+    assert engine.scanned == engine.total == 12
@@ -0,0 +1,64 @@
+import struct
+
+import pytest
+
+from exporters import MAGIC_V1, detect_format, main, open_exporter, read_rows
+
+ROWS = [
+    ("10.0.0.1", 22, "OPEN", "ssh"),
+    ("10.0.0.1", 80, "CLOSED", ""),
+    ("host,with\"quotes", 443, "FILTERED", "https"),
+    ("2001:db8::1", 65535, "ERROR", ""),
+]
+
+
+@pytest.mark.parametrize("name", [
+    "out.csv", "out.csv.gz", "out.ndjson", "out.jsonl", "out.ndjson.gz", "out.pscan",
+    "out.pscan.gz",
+])
+def test_roundtrip(tmp_path, name):
+    path = str(tmp_path / name)
+    with open_exporter(path) as exporter:
+        exporter.write_rows(ROWS[:2])
+        exporter.write_rows(iter(ROWS[2:]))
+        exporter.write_rows([])
+    assert exporter.rows == len(ROWS)
+    assert list(read_rows(path)) == ROWS
+
+
+def test_convert(tmp_path):
+    src, dst = str(tmp_path / "a.pscan.gz"), str(tmp_path / "b.csv")
+    with open_exporter(src) as exporter:
+        exporter.write_rows(ROWS)
+    assert main([src, dst]) == 0
+    assert list(read_rows(dst)) == ROWS
+
+
+def test_unknown_format():
+    assert detect_format("X.PSCAN.gz") == "binary"
+    with pytest.raises(ValueError):
+        detect_format("out.txt")
+
+
+def test_truncated_binary(tmp_path):
+    path = tmp_path / "out.pscan"
+    with open_exporter(str(path)) as exporter:
+        exporter.write_rows(ROWS)
+    path.write_bytes(path.read_bytes()[:-2])
+    with pytest.raises(ValueError):
+        list(read_rows(str(path)))
+
+
+def test_binary_more_than_65535_services(tmp_path):
+    path = str(tmp_path / "banners.pscan")
+    rows = [("10.0.0.1", n % 65535 + 1, "OPEN", f"banner {n}") for n in range(70000)]
+    with open_exporter(path) as exporter:
+        exporter.write_rows(rows)
+    assert list(read_rows(path)) == rows
+
+
+def test_reads_version_1(tmp_path):
+    path = tmp_path / "old.pscan"
+    path.write_bytes(MAGIC_V1 + b"H\x08\x0010.0.0.1" + b"S\x03\x00ssh"
+                     + struct.pack("<cIHBH", b"R", 0, 22, 1, 1))
+    assert list(read_rows(str(path))) == [("10.0.0.1", 22, "OPEN", "ssh")]
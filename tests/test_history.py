@@ -0,0 +1,48 @@
+import pytest
+
+from history import ScanHistory, parse_age
+
+TTL = {"OPEN": 0, "CLOSED": 600, "FILTERED": 60}
+
+
+@pytest.fixture
+def history():
+    history = ScanHistory(":memory:")
+    yield history
+    history.close()
+
+
+def test_fresh_results_respect_state_ttl(history):
+    scan = history.begin_scan("10.0.0.1", "1-100")
+    history.add_results(scan, [
+        ("10.0.0.1", 22, "OPEN", "ssh"),
+        ("10.0.0.1", 23, "CLOSED", ""),
+        ("10.0.0.1", 24, "FILTERED", ""),
+    ], checked_at=1000.0)
+    history.finish_scan(scan)
+    fresh = {port: status for _, port, status, _, _ in
+             history.fresh_results("10.0.0.1", range(1, 101), TTL, now=1030.0)}
+    assert fresh == {23: "CLOSED", 24: "FILTERED"}
+    fresh = [port for _, port, *_ in history.fresh_results("10.0.0.1", [23, 24], TTL, now=1100.0)]
+    assert fresh == [23]
+
+
+def test_cached_rows_keep_their_age(history):
+    first = history.begin_scan("10.0.0.1", "23")
+    history.add_results(first, [("10.0.0.1", 23, "CLOSED", "")], checked_at=1000.0)
+    second = history.begin_scan("10.0.0.1", "23")
+    history.add_cached(second, history.fresh_results("10.0.0.1", [23], TTL, now=1500.0))
+    assert list(history.fresh_results("10.0.0.1", [23], TTL, now=1700.0)) == []
+
+
+def test_host_states_ttl(history):
+    history.record_hosts([("10.0.0.1", True, 1000.0), ("10.0.0.2", False, 900.0)])
+    assert history.host_states(["10.0.0.1", "10.0.0.2", "10.0.0.3"], 150, now=1100.0) == {
+        "10.0.0.1": True,
+    }
+
+
+def test_parse_age():
+    assert parse_age("90") == 90
+    assert parse_age("2h") == 7200
+    assert parse_age("1d") == 86400
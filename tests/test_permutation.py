@@ -0,0 +1,25 @@
+import pytest
+
+from permutation import Permutation
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 7, 64, 1000, 4097])
+def test_bijection(n):
+    perm = Permutation(n, seed=n)
+    values = list(perm)
+    assert sorted(values) == list(range(n))
+    assert [perm[i] for i in range(n)] == values
+
+
+def test_seeded():
+    assert list(Permutation(500, 1)) == list(Permutation(500, 1))
+    assert list(Permutation(500, 1)) != list(Permutation(500, 2))
+
+
+def test_index_bounds():
+    perm = Permutation(10, 0)
+    assert len(perm) == 10
+    with pytest.raises(IndexError):
+        perm[10]
+    with pytest.raises(IndexError):
+        perm[-1]
@@ -0,0 +1,62 @@
+import random
+
+from portstate import (
+    CLOSED, FILTERED, OPEN, SPARSE_MAX, UNSCANNED, PortSet, PortStateMap, ScanStore,
+    SparsePortStates,
+)
+
+
+def test_port_state_map_roundtrip():
+    states = PortStateMap()
+    states[0], states[1], states[65535], states[4] = OPEN, CLOSED, FILTERED, OPEN
+    assert (states[0], states[1], states[65535], states[4], states[2]) == (
+        OPEN, CLOSED, FILTERED, OPEN, UNSCANNED)
+    assert list(states.ports_in(OPEN)) == [0, 4]
+    assert states.count(FILTERED) == 1
+    assert PortStateMap(states.to_bytes())[65535] == FILTERED
+
+
+def test_port_set_operations():
+    states = PortStateMap()
+    for port in (1, 2, 3, 100):
+        states[port] = OPEN
+    other = PortStateMap()
+    for port in (3, 100, 200):
+        other[port] = OPEN
+    a, b = states.ports_in(OPEN), other.ports_in(OPEN)
+    assert list(a & b) == [3, 100]
+    assert list(a | b) == [1, 2, 3, 100, 200]
+    assert list(a - b) == [1, 2]
+    assert list(a ^ b) == [1, 2, 200]
+    assert 100 in a and 200 not in a
+    assert len(a) == 4
+    assert a == PortStateMap(states.to_bytes()).ports_in(OPEN)
+    assert PortSet() == other.ports_in(CLOSED)
+
+
+def test_sparse_matches_map():
+    rng = random.Random(7)
+    sparse, dense = SparsePortStates(), PortStateMap()
+    for _ in range(2000):
+        port, state = rng.randrange(65536), rng.randrange(4)
+        sparse[port] = state
+        dense[port] = state
+    for state in (OPEN, CLOSED, FILTERED):
+        assert sparse.ports_in(state) == dense.ports_in(state)
+        assert sparse.count(state) == dense.count(state)
+    assert sparse.to_map().to_bytes() == dense.to_bytes()
+
+
+def test_scan_store_promotes_busy_hosts():
+    store = ScanStore()
+    store.record("10.0.0.1", 22, "OPEN")
+    for port in range(1, SPARSE_MAX + 2):
+        store.record("10.0.0.2", port, "CLOSED")
+    assert type(store.host("10.0.0.1")) is SparsePortStates
+    assert type(store.host("10.0.0.2")) is PortStateMap
+    assert store.is_done("10.0.0.2", SPARSE_MAX + 1)
+    assert not store.is_done("10.0.0.1", 23)
+    assert "10.0.0.1" in store and "10.0.0.3" not in store
+    assert store.count(CLOSED) == SPARSE_MAX + 1
+    assert list(store.items(OPEN)) == [("10.0.0.1", 22, "OPEN")]
+    assert list(store.diff("10.0.0.1", "10.0.0.2")) == [22]
@@ -0,0 +1,53 @@
+import pytest
+
+from rtt import AdaptiveTimeout, FixedTimeout
+
+
+def test_silent_host_stays_at_initial_by_default():
+    timeouts = AdaptiveTimeout(0.5)
+    for n in range(1000):
+        timeouts.expired("10.0.0.1", now=n * 0.6)
+    assert timeouts.timeout("10.0.0.1") == 0.5
+
+
+def test_backoff_once_per_interval():
+    timeouts = AdaptiveTimeout(0.5, silent_ceiling=3.0)
+    # bir vaqtda yuborilgan 500 ta probe bitta interval ichida tugaydi
+    for n in range(500):
+        timeouts.expired("10.0.0.1", now=n * 0.0005)
+    assert timeouts.timeout("10.0.0.1") == 1.0
+    timeouts.expired("10.0.0.1", now=0.9)
+    assert timeouts.timeout("10.0.0.1") == 1.0
+    timeouts.expired("10.0.0.1", now=1.3)
+    assert timeouts.timeout("10.0.0.1") == 2.0
+    timeouts.expired("10.0.0.1", now=3.5)
+    assert timeouts.timeout("10.0.0.1") == 3.0
+    timeouts.expired("10.0.0.1", now=10.0)
+    assert timeouts.timeout("10.0.0.1") == 3.0
+    assert timeouts.timeout("10.0.0.2") == 0.5
+
+
+def test_answer_ends_backoff():
+    timeouts = AdaptiveTimeout(0.5, floor=0.001, silent_ceiling=3.0)
+    timeouts.expired("10.0.0.1", now=0.0)
+    timeouts.observe("10.0.0.1", 0.002)
+    assert timeouts.timeout("10.0.0.1") == pytest.approx(0.002 + 4 * 0.001)
+    timeouts.expired("10.0.0.1", now=5.0)
+    assert timeouts.timeout("10.0.0.1") == pytest.approx(0.006)
+
+
+def test_estimate_is_clamped():
+    timeouts = AdaptiveTimeout(0.5, floor=0.05, ceiling=1.0)
+    timeouts.observe("lan", 0.0001)
+    assert timeouts.timeout("lan") == 0.05
+    for _ in range(20):
+        timeouts.observe("wan", 2.0)
+    assert timeouts.timeout("wan") == 1.0
+    # namuna yo'q host: initial va umumiy bahodan kattasi
+    assert timeouts.timeout("new") == 1.0
+
+
+def test_bounds():
+    with pytest.raises(ValueError):
+        AdaptiveTimeout(0.5, floor=2.0, ceiling=1.0)
+    assert FixedTimeout(0.3).timeout("any") == 0.3
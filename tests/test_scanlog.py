@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from scanlog import ERROR, INFO, LogBuffer, RotatingLogWriter
+
+
+def test_writer_appends_to_file(tmp_path):
+    path = tmp_path / "logs" / "scan.log"
+    writer = RotatingLogWriter(str(path))
+    log = LogBuffer(writer=writer)
+    log.add(INFO, "started", "done")
+    writer.close()
+    lines = path.read_text().splitlines()
+    assert [line.split(" ", 3)[2:] for line in lines] == [["INFO", "started"], ["INFO", "done"]]
+
+
+def test_writer_rotates(tmp_path):
+    path = tmp_path / "scan.log"
+    writer = RotatingLogWriter(str(path), max_bytes=100, backups=2)
+    for n in range(20):
+        writer.put(0.0, INFO, (f"line {n} " + "x" * 40,))
+    writer.close()
+    assert writer.error is None
+    assert os.path.exists(f"{path}.1")
+    assert not os.path.exists(f"{path}.3")
+
+
+def test_unwritable_path_raises(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    with pytest.raises(OSError):
+        RotatingLogWriter(str(blocker / "scan.log"))
+
+
+def test_stderr_writer(capsys):
+    writer = RotatingLogWriter(None)
+    writer.put(0.0, ERROR, ("cannot write log file",))
+    writer.close()
+    assert "ERROR cannot write log file" in capsys.readouterr().err
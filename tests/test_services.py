@@ -0,0 +1,22 @@
+from services import ServiceIndex, build
+
+NMAP = """\
+# name port/proto frequency
+http	80/tcp	0.484143
+telnet	23/tcp	0.221265	# comment
+domain	53/udp	0.213496
+ssh	22/tcp	0.182286
+rare	7000/tcp	0.000010
+"""
+
+
+def test_build_ranks_by_measured_frequency(tmp_path):
+    source = tmp_path / "nmap-services"
+    source.write_text(NMAP, encoding="utf-8")
+    path = str(tmp_path / "services.bin")
+    assert build([str(source)], path) == (7, 4)     # + ALIASES
+    index = ServiceIndex(path)
+    assert index.ranked == 4
+    assert index.top(6) == [80, 23, 22, 7000, 53, 443]
+    assert (index.name(22), index.name(53), index.name(3389), index.name(9)) == (
+        "SSH", "DNS", "RDP", "")
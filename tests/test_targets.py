@@ -0,0 +1,84 @@
+import pytest
+
+from engine import parse_ports
+from targets import TargetSpec
+
+
+def test_parse_ports_ranges_and_duplicates():
+    assert parse_ports("80,22, 8000-8002,22") == [22, 80, 8000, 8001, 8002]
+    assert parse_ports("1-3,,5") == [1, 2, 3, 5]
+
+
+@pytest.mark.parametrize("spec", ["", "0", "65536", "10-5", "http", "1-x", "top:0", "top:x"])
+def test_parse_ports_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_ports(spec)
+
+
+def test_parse_ports_top_comes_first():
+    ports = parse_ports("top:10,1-5")
+    top = parse_ports("top:10")
+    assert len(top) == 10
+    assert ports[:10] == top
+    assert ports[10:] == sorted(set(range(1, 6)) - set(top))
+
+
+def test_target_spec_forms(tmp_path):
+    hosts = tmp_path / "hosts.txt"
+    hosts.write_text("# lab\nexample.test  10.9.0.1-2\n", encoding="utf-8")
+    spec = TargetSpec(f"10.0.0.0/30, 10.0.1.254-10.0.2.1 10.0.3.5-6 my-host.local @{hosts}")
+    assert list(spec) == [
+        "10.0.0.1", "10.0.0.2",
+        "10.0.1.254", "10.0.1.255", "10.0.2.0", "10.0.2.1",
+        "10.0.3.5", "10.0.3.6",
+        "my-host.local",
+        "example.test", "10.9.0.1", "10.9.0.2",
+    ]
+    assert len(spec) == 12
+    assert [len(b) for b in spec.blocks(5)] == [5, 5, 2]
+
+
+def test_target_spec_ipv6_and_small_blocks():
+    assert list(TargetSpec("2001:db8::/126")) == ["2001:db8::1", "2001:db8::2", "2001:db8::3"]
+    assert list(TargetSpec("10.0.0.8/31")) == ["10.0.0.8", "10.0.0.9"]
+
+
+@pytest.mark.parametrize("spec", ["", "10.0.0.0/33", "10.0.0.9-10.0.0.1", "@/no/such/file"])
+def test_target_spec_rejects(spec):
+    with pytest.raises(ValueError):
+        TargetSpec(spec)
+
+
+def test_after_covers_exactly_the_rest():
+    spec = TargetSpec("10.0.0.0/29 solo.test 10.0.1.1-4")
+    hosts = list(spec)
+    for skip in range(len(hosts) + 1):
+        rest = " ".join(spec.after(skip))
+        assert (list(TargetSpec(rest)) if rest else []) == hosts[skip:]
+    assert list(spec.after(2)) == ["10.0.0.3-10.0.0.6", "solo.test", "10.0.1.1-4"]
+
+
+def test_bad_file_line_is_reported_up_front(tmp_path):
+    hosts = tmp_path / "hosts.txt"
+    hosts.write_text("10.0.0.1\n\n10.0.0.0/33  # typo\n", encoding="utf-8")
+    with pytest.raises(ValueError, match=r"hosts\.txt:3: bad CIDR block"):
+        TargetSpec(f"@{hosts}")
+
+
+def test_file_count_without_expanding(tmp_path):
+    hosts = tmp_path / "hosts.txt"
+    hosts.write_text("10.0.0.0/8\nexample.test\n", encoding="utf-8")
+    spec = TargetSpec(f"@{hosts} 10.1.0.1-3")
+    assert len(spec) == (1 << 24) - 2 + 1 + 3
+
+
+def test_top_ports_past_the_ranked_ones():
+    from services import RANKED_PORTS, service_name
+
+    ports = parse_ports("top:1000")
+    assert len(set(ports)) == 1000
+    assert ports[:len(RANKED_PORTS)] == list(RANKED_PORTS)
+    rest = ports[len(RANKED_PORTS):]
+    assert rest == sorted(rest)
+    assert all(service_name(port) for port in rest)
+    assert len(parse_ports("top:65535")) == 65535
@@ -0,0 +1,36 @@
+from portstate import ScanStore
+from unscanned import SPARSE_MAX, UnscannedReport, port_spec
+
+
+def test_sparse_and_mask_hosts_agree():
+    ports = list(range(1, 5001))
+    report = UnscannedReport(ports)
+    for port in (22, 23, 24, 80):
+        report.add("10.0.0.1", port)
+    for port in range(100, 100 + SPARSE_MAX + 10):
+        report.add("10.0.0.2", port)
+    report.add_runs("10.0.0.3", [(1, 3), (7, 7)])
+    report.add("10.0.0.3", 4)
+    report.add("10.0.0.4", 9)
+    report.add_all("10.0.0.4")
+    assert report.runs() == {
+        "10.0.0.1": [(22, 24), (80, 80)],
+        "10.0.0.2": [(100, 100 + SPARSE_MAX + 9)],
+        "10.0.0.3": [(1, 4), (7, 7)],
+        "10.0.0.4": [(1, 5000)],
+    }
+
+
+def test_lines_merge_hosts_and_drop_done():
+    done = ScanStore()
+    done.record("10.0.0.3", 80, "OPEN")
+    report = UnscannedReport([22, 80, 443], done)
+    for host in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+        report.add(host, 80)
+    report.add("host.test", 22)
+    assert list(report.lines(["10.0.1.0-10.0.1.255"])) == [
+        "10.0.0.1-10.0.0.2 80",
+        "host.test 22",
+        "10.0.1.0-10.0.1.255 22,80,443",
+    ]
+    assert port_spec([(1, 1), (5, 9)]) == "1,5-9"